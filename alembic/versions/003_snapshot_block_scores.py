@@ -0,0 +1,74 @@
+"""Add normalized snapshot_block_scores table
+
+Revision ID: 003_block_scores
+Revises: 002_matrix
+Create Date: 2026-10-18
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_block_scores'
+down_revision = '002_matrix'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of BLOCKS question counts x 4 points at the time of this migration
+BLOCK_MAX_SCORES = {
+    'Percepção e Atitude': 12,
+    'Uso Prático': 12,
+    'Conhecimento e Entendimento': 8,
+    'Cultura e Autonomia Digital': 8,
+}
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    block_scores = op.create_table(
+        'snapshot_block_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_id', sa.Integer(), nullable=False),
+        sa.Column('block', sa.String(length=100), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('max_score', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['snapshot_id'], ['proficiency_snapshots.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('snapshot_id', 'block', name='uq_snapshot_block_scores_snapshot_block')
+    )
+    op.create_index('ix_snapshot_block_scores_block_score', 'snapshot_block_scores', ['block', 'score'], unique=False)
+    
+    # Backfill from the JSON column, paging snapshots by id
+    connection = op.get_bind()
+    select_page = sa.text(
+        "SELECT id, block_scores_json FROM proficiency_snapshots "
+        "WHERE block_scores_json IS NOT NULL AND id > :last_id ORDER BY id LIMIT :limit"
+    )
+    
+    last_id = 0
+    while True:
+        snapshots = connection.execute(select_page, {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not snapshots:
+            break
+        last_id = snapshots[-1][0]
+        
+        batch = [
+            {
+                'snapshot_id': snapshot_id,
+                'block': block,
+                'score': int(score),
+                'max_score': BLOCK_MAX_SCORES.get(block)
+            }
+            for snapshot_id, payload in snapshots
+            for block, score in json.loads(payload).items()
+        ]
+        if batch:
+            op.bulk_insert(block_scores, batch)
+
+
+def downgrade():
+    op.drop_index('ix_snapshot_block_scores_block_score', table_name='snapshot_block_scores')
+    op.drop_table('snapshot_block_scores')
@@ -0,0 +1,40 @@
+"""Add analytics_rollups table
+
+Revision ID: 004_analytics_rollups
+Revises: 003_block_scores
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_analytics_rollups'
+down_revision = '003_block_scores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analytics_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('group_key', sa.String(length=255), nullable=False),
+        sa.Column('snapshot_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('level_counts_json', sa.Text(), nullable=True),
+        sa.Column('block_sums_json', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dimension', 'group_key', name='uq_analytics_rollups_dimension_group')
+    )
+    # Rows are filled by `flask rebuild-analytics`, or by the startup backfills
+    # (app.services.bootstrap, `flask bootstrap-data`) when the table is empty.
+
+
+def downgrade():
+    op.drop_table('analytics_rollups')
@@ -0,0 +1,31 @@
+"""Add data_versions table for the admin stats cache
+
+Revision ID: 005_data_versions
+Revises: 004_analytics_rollups
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_data_versions'
+down_revision = '004_analytics_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_versions = op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(data_versions, [{'name': 'stats', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('data_versions')
@@ -0,0 +1,23 @@
+"""Index sessions for the latest completed session per user
+
+Revision ID: 006_sessions_latest
+Revises: 005_data_versions
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '006_sessions_latest'
+down_revision = '005_data_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sessions_status_user_ended', 'sessions', ['status', 'user_id', 'ended_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sessions_status_user_ended', table_name='sessions')
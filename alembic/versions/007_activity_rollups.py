@@ -0,0 +1,43 @@
+"""Add hourly/daily activity_rollups table
+
+Revision ID: 007_activity_rollups
+Revises: 006_sessions_latest
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_activity_rollups'
+down_revision = '006_sessions_latest'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'activity_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('group_key', sa.String(length=255), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('sessions_started', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sessions_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sessions_abandoned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_spent_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('time_spent_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('level_counts_json', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('granularity', 'dimension', 'group_key', 'bucket_start', name='uq_activity_rollups_bucket')
+    )
+    # Rows are filled by `flask rebuild-activity`, or by the startup backfills
+    # (app.services.bootstrap, `flask bootstrap-data`) when the table is empty.
+
+
+def downgrade():
+    op.drop_table('activity_rollups')
@@ -0,0 +1,32 @@
+"""Add quantile sketch columns to the analytics and activity rollups
+
+Revision ID: 008_quantile_sketches
+Revises: 007_activity_rollups
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_quantile_sketches'
+down_revision = '007_activity_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analytics_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sketches_json', sa.Text(), nullable=True))
+    with op.batch_alter_table('activity_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sketches_json', sa.Text(), nullable=True))
+    # Existing rows are rebuilt with sketches by `flask rebuild-analytics` and
+    # `flask rebuild-activity` (or `flask bootstrap-data --force`).
+
+
+def downgrade():
+    with op.batch_alter_table('activity_rollups', schema=None) as batch_op:
+        batch_op.drop_column('sketches_json')
+    with op.batch_alter_table('analytics_rollups', schema=None) as batch_op:
+        batch_op.drop_column('sketches_json')
@@ -0,0 +1,41 @@
+"""Add item_stats table with running per-item response statistics
+
+Revision ID: 009_item_stats
+Revises: 008_quantile_sketches
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_item_stats'
+down_revision = '008_quantile_sketches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'item_stats',
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('points_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('points_mean', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('points_m2', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('latency_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('choice_counts_json', sa.Text(), nullable=True),
+        sa.Column('points_counts_json', sa.Text(), nullable=True),
+        sa.Column('latency_histogram_json', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id']),
+        sa.PrimaryKeyConstraint('item_id')
+    )
+    # Rows are filled by `flask rebuild-item-stats`, or by the startup backfills
+    # (app.services.bootstrap, `flask bootstrap-data`) when the table is empty.
+
+
+def downgrade():
+    op.drop_table('item_stats')
@@ -0,0 +1,40 @@
+"""Add change_log table for the incremental export
+
+Revision ID: 010_change_log
+Revises: 009_item_stats
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_change_log'
+down_revision = '009_item_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Existing rows become upserts so that `since=0` is a full initial sync
+    for entity, table in (('user', 'users'), ('session', 'sessions'),
+                          ('snapshot', 'proficiency_snapshots'), ('response', 'responses')):
+        op.execute(
+            f"INSERT INTO change_log (entity, entity_id, op, changed_at) "
+            f"SELECT '{entity}', id, 'upsert', CURRENT_TIMESTAMP FROM {table} ORDER BY id"
+        )
+
+
+def downgrade():
+    op.drop_table('change_log')
@@ -0,0 +1,45 @@
+"""Add export_jobs table for background exports
+
+Revision ID: 011_export_jobs
+Revises: 010_change_log
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_export_jobs'
+down_revision = '010_change_log'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('filters_json', sa.Text(), nullable=True),
+        sa.Column('data_version', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rows_total', sa.Integer(), nullable=True),
+        sa.Column('rows_done', sa.Integer(), nullable=False),
+        sa.Column('artifact_path', sa.String(length=500), nullable=True),
+        sa.Column('artifact_size', sa.BigInteger(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('requested_by', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_export_jobs_cache_key', 'export_jobs', ['cache_key'])
+
+
+def downgrade():
+    op.drop_index('ix_export_jobs_cache_key', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,39 @@
+"""Add indexed users.frente derived from the email domain
+
+Revision ID: 012_user_frente
+Revises: 011_export_jobs
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_user_frente'
+down_revision = '011_export_jobs'
+branch_labels = None
+depends_on = None
+
+# FRENTE_MAPPING (app/models/user.py) at the time of this migration
+FRENTE_MAPPING = {
+    'oaz.co': 'SOUQ',
+    'thesaint.com.br': 'THESAINT'
+}
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('frente', sa.String(length=50), nullable=True))
+        batch_op.create_index('ix_users_frente', ['frente'])
+    
+    cases = ' '.join(
+        f"WHEN lower(email) LIKE '%@{domain}' THEN '{frente}'" for domain, frente in FRENTE_MAPPING.items()
+    )
+    op.execute(f"UPDATE users SET frente = CASE {cases} ELSE 'Outro' END WHERE email IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_frente')
+        batch_op.drop_column('frente')
@@ -0,0 +1,34 @@
+"""Add items.calibrated to keep generated items out of CAT selection
+
+Revision ID: 013_item_calibrated
+Revises: 012_user_frente
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_item_calibrated'
+down_revision = '012_user_frente'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calibrated', sa.Boolean(), nullable=False, server_default=sa.true()))
+    
+    # Generated items (tagged by both selectors) keep their guessed parameters
+    items = sa.table('items', sa.column('tags', sa.String), sa.column('calibrated', sa.Boolean))
+    op.execute(
+        items.update()
+        .where(sa.or_(items.c.tags.like('%generated%'), items.c.tags.like('%validated%')))
+        .values(calibrated=False)
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('calibrated')
@@ -0,0 +1,27 @@
+"""Store the ability posterior on sessions
+
+Revision ID: 014_session_posterior
+Revises: 013_item_calibrated
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_session_posterior'
+down_revision = '013_item_calibrated'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left NULL for existing sessions: AgentScorer replays their history once
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('posterior_json', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.drop_column('posterior_json')
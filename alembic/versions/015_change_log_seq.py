@@ -0,0 +1,37 @@
+"""Number change log rows in commit order
+
+Revision ID: 015_change_log_seq
+Revises: 014_session_posterior
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_change_log_seq'
+down_revision = '014_session_posterior'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=True))
+        batch_op.create_unique_constraint('uq_change_log_seq', ['seq'])
+
+    # Existing rows keep their id as seq, so watermarks already handed out
+    # to clients stay valid; the counter continues after them
+    op.execute('UPDATE change_log SET seq = id')
+    op.execute(
+        "INSERT INTO data_versions (name, version, updated_at) "
+        "SELECT 'change_log', COALESCE(MAX(id), 0), CURRENT_TIMESTAMP FROM change_log"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM data_versions WHERE name = 'change_log'")
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_change_log_seq', type_='unique')
+        batch_op.drop_column('seq')
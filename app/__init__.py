@@ -47,6 +47,12 @@ def create_app(config_class=Config):
     
     db.init_app(app)
     
+    from app.services.tracing import init_tracing
+    init_tracing(app)
+    
+    from app.cli import register_commands
+    register_commands(app)
+    
     @app.template_filter('chr')
     def chr_filter(value):
         """Convert number to ASCII character (0->A, 1->B, etc.)"""
@@ -69,13 +75,24 @@ def create_app(config_class=Config):
         @app.route('/health')
         def health_check():
             """Health check endpoint for deployment."""
-            return {'status': 'healthy', 'service': 'oaz-ia-profiler'}, 200
+            from app.services.logger import rpa_shipper
+            return {'status': 'healthy', 'service': 'oaz-ia-profiler', 'rpa_monitor': rpa_shipper.stats()}, 200
         
-        from app.models import user, session as session_model, item, response, snapshot, recommendation, audit
+        from app.models import user, session as session_model, item, response, snapshot, snapshot_block_score, recommendation, audit, analytics_rollup, data_version, activity_rollup, item_stat, change_log, export_job
         
         # Create all tables FIRST with new schema
         db.create_all()
         
+        # One-time backfills of derived tables: one worker runs them while the
+        # others wait (or `flask bootstrap-data` when BOOTSTRAP_ON_START is off)
+        if app.config.get('BOOTSTRAP_ON_START', True):
+            from app.services.bootstrap import bootstrap_data
+            bootstrap_data()
+        
+        # Record user/session/snapshot/response changes for the incremental export
+        from app.services.changes import register_change_tracking
+        register_change_tracking()
+        
         # THEN seed database (after tables exist)
         if app.config.get('SEED_ON_START', False):
             from app.core.utils import seed_database
@@ -1,6 +1,7 @@
 from typing import Dict, Any
 import json
 import random
+from flask import current_app
 from app.core.llm_provider import LLMProvider
 from app.models import Item
 from app.services.logger import llm_logger
@@ -13,13 +14,27 @@ class AgentGenerator:
     
     def __init__(self):
         # Use OpenAI for intelligent question generation
-        self.llm = LLMProvider('openai')
+        provider = current_app.config.get('LLM_PROVIDER', 'openai')
+        self.llm = LLMProvider(provider)
+        # Only an explicit LLM_PROVIDER=stub produces placeholder questions;
+        # a missing API key must not put fake questions in front of users
+        self.stub_questions = provider == 'stub'
     
     def generate_matrix_question(
         self,
         block_name: str,
         response_history: list = None,
         user_context: dict = None
+    ) -> Dict[str, Any]:
+        """Generate a matrix question (see _generate_matrix_question), traced as one span."""
+        with llm_logger.span('generate_matrix_question', {'block': block_name}):
+            return self._generate_matrix_question(block_name, response_history, user_context)
+    
+    def _generate_matrix_question(
+        self,
+        block_name: str,
+        response_history: list = None,
+        user_context: dict = None
     ) -> Dict[str, Any]:
         """
         Generate a MACRO (transversal) question for Phase 1 assessment.
@@ -38,8 +53,6 @@ class AgentGenerator:
         """
         from app.core.blocks_config import BLOCKS
         
-        llm_logger.event_start('generate_matrix_question', {'block': block_name})
-        
         if not user_context:
             user_context = {'name': 'Usuário'}
         
@@ -160,6 +173,8 @@ LEMBRE-SE:
         try:
             # Skip if LLM provider is stub
             if self.llm.provider == 'stub' or not self.llm.client:
+                if self.stub_questions:
+                    return self._stub_matrix_question(block_name, response_history, user_context)
                 llm_logger.event_warning('openai_not_available', {'block': block_name})
                 return None
             
@@ -243,6 +258,46 @@ LEMBRE-SE:
             llm_logger.event_error('generate_matrix_question_failed', error=e, details={'block': block_name})
             return None
     
+    def _stub_matrix_question(
+        self,
+        block_name: str,
+        response_history: list = None,
+        user_context: dict = None
+    ) -> Dict[str, Any]:
+        """Deterministic matrix question (LLM_PROVIDER=stub), same shape and shuffling as the OpenAI path."""
+        from app.core.blocks_config import BLOCKS
+        
+        block_config = BLOCKS.get(block_name, {})
+        examples = block_config.get('examples') or [block_name]
+        asked = sum(1 for r in (response_history or []) if r.get('block') == block_name)
+        
+        choices_with_points = [
+            ('Nunca considerei ou não vejo relevância', 1),
+            ('Já ouvi falar e tenho curiosidade de testar', 2),
+            ('Uso regularmente e vejo benefícios claros', 3),
+            ('Domino completamente e ajudo outros a usar', 4),
+        ]
+        random.shuffle(choices_with_points)
+        points_mapping = {i: c[1] for i, c in enumerate(choices_with_points)}
+        
+        llm_logger.event_info('generate_matrix_question_stub', {'block': block_name, 'points_mapping': points_mapping})
+        
+        return {
+            'stem': f"{examples[asked % len(examples)]} ({asked + 1})",
+            'type': 'matrix',
+            'block': block_name,
+            'choices': [c[0] for c in choices_with_points],
+            'progressive_levels': False,
+            'tags': f'generated,matrix,stub,{block_config.get("id", "unknown")}',
+            'metadata': {
+                'generated': True,
+                'stub': True,
+                'block_description': block_config.get('description', ''),
+                'user_context': user_context or {'name': 'Usuário'},
+                'points_mapping': points_mapping
+            }
+        }
+    
     def generate_variation(self, original_item: Dict[str, Any]) -> Dict[str, Any]:
         """Generate variation of an existing item."""
         prompt = f"Create a variation of this question: {original_item.get('stem')}"
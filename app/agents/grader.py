@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from flask import current_app
 from app.models import Item
 from app.core.llm_provider import LLMProvider
 
@@ -10,7 +11,7 @@ class AgentGrader:
     
     def __init__(self):
         # Use OpenAI for intelligent grading (falls back to stub if API key missing)
-        self.llm = LLMProvider('openai')
+        self.llm = LLMProvider(current_app.config.get('LLM_PROVIDER', 'openai'))
     
     def grade_response(self, item: Item, answer: str) -> Dict[str, Any]:
         """
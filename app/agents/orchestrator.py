@@ -5,6 +5,7 @@ from app.agents.grader import AgentGrader
 from app.agents.scorer import AgentScorer
 from app.agents.recommender import AgentRecommender
 from app.models import Session, Response, Item
+from app.services.item_stats import record_response
 from app import db
 
 class AgentOrchestrator:
@@ -76,14 +77,16 @@ class AgentOrchestrator:
         response.rubric_breakdown = grading_result.get('breakdown', {})
         response.ai_flags = grading_result.get('flags', {})
         db.session.add(response)
-        db.session.commit()
+        record_response(response)
         
+        # Scored before the commit so the session's stored posterior lands with the response
         self.state['proficiency'] = self.scorer.update_proficiency(
             self.session_id,
             item,
             grading_result['score'],
             self.state['proficiency']
         )
+        db.session.commit()
         
         self.state['items_answered'] += 1
         self.state['response_history'].append({
@@ -3,12 +3,17 @@ Matrix-based Orchestrator for simplified 4-block assessment
 No IRT, simple additive scoring (10-40 points)
 """
 
+from datetime import datetime
 from typing import Dict, Any, Optional
 from app.agents.selector_matrix import AgentSelectorMatrix
 from app.agents.grader_matrix import AgentGraderMatrix
-from app.models import Session, Response, Item, ProficiencySnapshot
+from app.models import Session, Response, Item, ProficiencySnapshot, SnapshotBlockScore
 from app.core.blocks_config import BLOCKS, MATURITY_LEVELS, TOTAL_QUESTIONS
 from app.services.logger import agent_logger
+from app.services.analytics import apply_snapshots_to_rollups
+from app.services.activity import record_session_completed
+from app.services.item_stats import record_response
+from app.services.cache import bump_data_version
 from app import db
 
 
@@ -111,6 +116,7 @@ class AgentOrchestratorMatrix:
         response.latency_ms = latency_ms
         
         db.session.add(response)
+        record_response(response)
         db.session.commit()
         
         # Update state
@@ -189,12 +195,19 @@ class AgentOrchestratorMatrix:
         snapshot.raw_score = total_score
         snapshot.maturity_level = maturity_level['name']
         snapshot.block_scores = block_scores
+        snapshot.block_score_rows = SnapshotBlockScore.rows_for(block_scores)
         
         db.session.add(snapshot)
         
         # Update session status to completed (CRITICAL for result rendering)
         if self.session:
             self.session.status = 'completed'
+            # Final before the rollups read them
+            self.session.ended_at = datetime.utcnow()
+            self.session.time_spent_s = int((self.session.ended_at - self.session.started_at).total_seconds())
+            apply_snapshots_to_rollups(self.session.user, [snapshot])
+            record_session_completed(self.session, total_score, maturity_level['name'])
+            bump_data_version()
             agent_logger.event_success('orchestrator_session_completed', {'session_id': self.session_id})
         else:
             agent_logger.event_error('orchestrator_session_not_found', details={'session_id': self.session_id})
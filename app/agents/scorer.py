@@ -1,16 +1,48 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
 from app.models import Item, Response, ProficiencySnapshot
-from app.core.scoring import IRTScorer
+from app.core import ability_estimation
+from app.core.scoring import IRTScorer, THETA_GRID_POINTS
+from app.services.cache import bump_data_version
+from app.services.changes import record_deletions
 from app import db
 
+DEFAULT_COMPETENCY_STATE = {
+    'score': 50.0,
+    'ci_low': 20.0,
+    'ci_high': 80.0,
+    'items_count': 0
+}
+
 class AgentScorer:
     """
     Updates competency scores using IRT-lite algorithm.
     Maintains proficiency estimates and confidence intervals.
+    
+    Estimators (ABILITY_ESTIMATOR):
+    - 'eap' / 'map': grid posterior per competency (app.core.ability_estimation),
+      CI from the posterior SD (default 'eap')
+    - 'heuristic': legacy learning-rate step with fixed CI shrinkage
+    
+    With a grid estimator the log-posteriors are stored on the session
+    (Session.posterior) with every scored response, so a new scorer resumes
+    from them instead of replaying the history. The stored state is only
+    trusted while it covers every response of the session; otherwise (and
+    for 'heuristic') the history is replayed.
     """
     
-    def __init__(self):
+    ESTIMATORS = ability_estimation.ESTIMATORS + ('heuristic',)
+    
+    def __init__(self, estimator: Optional[str] = None):
         self.irt = IRTScorer()
+        self.estimator = estimator or current_app.config.get('ABILITY_ESTIMATOR', 'eap')
+        if self.estimator not in self.ESTIMATORS:
+            raise ValueError(f"Unknown ability estimator: {self.estimator}")
+        # competency -> log-posterior on the theta grid; kept out of the
+        # proficiency dict so that stays JSON-serializable
+        self.posteriors: Dict[str, Any] = {}
     
     def update_proficiency(
         self,
@@ -23,12 +55,24 @@ class AgentScorer:
         Update proficiency for the item's competency based on response.
         """
         competency = item.competency
-        comp_data = current_proficiency.get(competency, {
-            'score': 50.0,
-            'ci_low': 20.0,
-            'ci_high': 80.0,
-            'items_count': 0
-        })
+        comp_data = current_proficiency.get(competency, DEFAULT_COMPETENCY_STATE)
+        
+        if self.estimator != 'heuristic':
+            log_post = self.posteriors.get(competency)
+            if log_post is None:
+                log_post = ability_estimation.prior_from_summary(
+                    comp_data['score'], comp_data['ci_low'], comp_data['ci_high']
+                )
+            log_post = ability_estimation.update(
+                log_post, item.discrimination_a, item.difficulty_b, response_score
+            )
+            self.posteriors[competency] = log_post
+            current_proficiency[competency] = {
+                **ability_estimation.summarize(log_post, self.estimator),
+                'items_count': comp_data['items_count'] + 1
+            }
+            self._store_posterior(session_id, current_proficiency)
+            return current_proficiency
         
         current_score = comp_data['score']
         current_ci_width = comp_data['ci_high'] - comp_data['ci_low']
@@ -50,35 +94,133 @@ class AgentScorer:
         
         return current_proficiency
     
+    @staticmethod
+    def _response_count(session_id: int) -> int:
+        return db.session.query(func.count(Response.id)).filter(Response.session_id == session_id).scalar()
+    
+    def _store_posterior(self, session_id: int, proficiency: Dict[str, Any]):
+        """
+        Stage the posteriors and proficiency on the session, tagged with the
+        number of responses they include; the caller commits.
+        """
+        from app.models import Session
+        
+        session = db.session.get(Session, session_id)
+        if session is None:
+            return
+        session.posterior = {
+            'estimator': self.estimator,
+            'grid_points': THETA_GRID_POINTS,
+            'responses': self._response_count(session_id),
+            'proficiency': proficiency,
+            'log_posteriors': {
+                competency: log_post.tolist() for competency, log_post in self.posteriors.items()
+            }
+        }
+    
+    def _load_posterior(self, session) -> Optional[Dict[str, Any]]:
+        """Proficiency from the stored posterior, or None when it is missing or stale."""
+        state = session.posterior
+        if (
+            state.get('estimator') != self.estimator
+            or state.get('grid_points') != THETA_GRID_POINTS
+            or state.get('responses') != self._response_count(session.id)
+        ):
+            return None
+        
+        for competency, log_post in state['log_posteriors'].items():
+            self.posteriors[competency] = np.asarray(log_post, dtype=np.float64)
+        return state['proficiency']
+    
     def get_current_proficiency(self, session_id: int) -> Dict[str, Any]:
         """
-        Reconstruct current proficiency from session responses.
+        Current proficiency of a session.
+        
+        With a grid estimator this is read from the stored posterior when it
+        is up to date; otherwise the whole history is applied in one
+        vectorized pass (the likelihood factorizes), from a single projected
+        query, and the result is stored for the next request.
         """
         from app.agents.profiler import AgentProfiler
         from app.models import Session
         
-        session = Session.query.get(session_id)
+        session = db.session.get(Session, session_id)
+        if self.estimator != 'heuristic':
+            proficiency = self._load_posterior(session)
+            if proficiency is not None:
+                return proficiency
+        
         profiler = AgentProfiler()
         proficiency = profiler.initialize_proficiency(
             session.initial_response if session.initial_response else ""
         )
         
-        responses = Response.query.filter_by(session_id=session_id)\
-            .order_by(Response.created_at).all()
+        if self.estimator == 'heuristic':
+            responses = Response.query.filter_by(session_id=session_id)\
+                .order_by(Response.created_at).all()
+            
+            for response in responses:
+                proficiency = self.update_proficiency(
+                    session_id,
+                    response.item,
+                    response.graded_score_0_1,
+                    proficiency
+                )
+            
+            return proficiency
+        
+        rows = db.session.query(
+            Item.competency,
+            func.coalesce(Item.discrimination_a, 0.5),
+            func.coalesce(Item.difficulty_b, 1.0),
+            func.coalesce(Response.graded_score_0_1, 0.0)
+        ).join(Item, Response.item_id == Item.id)\
+            .filter(Response.session_id == session_id).all()
         
-        for response in responses:
-            proficiency = self.update_proficiency(
-                session_id,
-                response.item,
-                response.graded_score_0_1,
-                proficiency
+        if not rows:
+            return proficiency
+        
+        competencies = list(proficiency)
+        for competency, _, _, _ in rows:
+            if competency not in proficiency:
+                proficiency[competency] = dict(DEFAULT_COMPETENCY_STATE)
+                competencies.append(competency)
+        positions = {competency: i for i, competency in enumerate(competencies)}
+        
+        priors = [
+            ability_estimation.prior_from_summary(
+                proficiency[c]['score'], proficiency[c]['ci_low'], proficiency[c]['ci_high']
             )
+            for c in competencies
+        ]
+        posteriors = ability_estimation.accumulate(
+            priors,
+            [positions[row[0]] for row in rows],
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            [row[3] for row in rows]
+        )
+        
+        counts = {}
+        for row in rows:
+            counts[row[0]] = counts.get(row[0], 0) + 1
+        
+        for competency, count in counts.items():
+            log_post = posteriors[positions[competency]]
+            self.posteriors[competency] = log_post
+            proficiency[competency] = {
+                **ability_estimation.summarize(log_post, self.estimator),
+                'items_count': proficiency[competency]['items_count'] + count
+            }
         
+        self._store_posterior(session_id, proficiency)
         return proficiency
     
     def save_snapshot(self, session_id: int, proficiency: Dict[str, Any]):
         """Save proficiency snapshot to database."""
-        ProficiencySnapshot.query.filter_by(session_id=session_id).delete()
+        previous = ProficiencySnapshot.query.filter_by(session_id=session_id)
+        record_deletions('snapshot', [snapshot.id for snapshot in previous.with_entities(ProficiencySnapshot.id)])
+        previous.delete()
         
         for competency, data in proficiency.items():
             snapshot = ProficiencySnapshot(
@@ -90,4 +232,5 @@ class AgentScorer:
             )
             db.session.add(snapshot)
         
+        bump_data_version()
         db.session.commit()
@@ -1,7 +1,9 @@
 from typing import Dict, Any, List, Optional
+from flask import current_app
 from app.models import Item, Response
 from app.agents.generator import AgentGenerator
 from app.agents.semantic_validator import SemanticValidator
+from app.core.item_bank import get_item_bank_index, register_item
 from app import db
 import random
 import logging
@@ -13,11 +15,20 @@ class AgentSelector:
     Selects next question to maximize information gain.
     Can use existing items OR generate adaptive questions dynamically.
     Now includes semantic validation and adaptive difficulty progression.
+    
+    Strategies (ITEM_SELECTION_STRATEGY):
+    - 'heuristic': hand-tuned bonuses + adaptive generation (default)
+    - 'max_info': CAT over the calibrated bank, maximizing 2PL Fisher information
     """
     
-    def __init__(self):
+    STRATEGIES = ('heuristic', 'max_info')
+    
+    def __init__(self, strategy: Optional[str] = None):
         self.generator = AgentGenerator()
         self.validator = SemanticValidator()
+        self.strategy = strategy or current_app.config.get('ITEM_SELECTION_STRATEGY', 'heuristic')
+        if self.strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown item selection strategy: {self.strategy}")
     
     def select_next_item(
         self,
@@ -43,25 +54,19 @@ class AgentSelector:
         
         answered_ids = [r['item_id'] for r in response_history]
         
-        available_items = Item.query.filter(
-            Item.active == True,
-            ~Item.id.in_(answered_ids) if answered_ids else True
-        ).all()
+        # Candidate pool: active items not yet answered, as a mask over the in-memory index
+        index = get_item_bank_index()
+        available_mask = index.available_mask(answered_ids)
         
-        if not available_items:
+        if not available_mask.any():
             return None
         
+        if self.strategy == 'max_info':
+            return self._select_max_information(index, proficiency, answered_ids, available_mask)
+        
         last_competency = response_history[-1]['competency'] if response_history else None
         last_type = response_history[-1]['type'] if response_history else None
         
-        # Score existing items
-        scored_items = []
-        for item in available_items:
-            score = self._score_item(item, proficiency, last_competency, last_type)
-            scored_items.append((score, item))
-        
-        scored_items.sort(reverse=True, key=lambda x: x[0])
-        
         # Decide: use existing question or generate adaptive one?
         should_generate = self._should_generate_adaptive(proficiency, response_history)
         
@@ -138,6 +143,7 @@ class AgentSelector:
                         answer_key=generated_data.get('answer_key'),
                         rubric=generated_data.get('rubric'),
                         tags=generated_data.get('tags', '') + ',validated,high_quality',
+                        calibrated=False,
                         active=True
                     )
                     
@@ -149,6 +155,7 @@ class AgentSelector:
                     
                     db.session.add(generated_item)
                     db.session.commit()
+                    register_item(generated_item)
                     
                     logger.info(f"[ADAPTIVE] ✅ Created validated item ID {generated_item.id} (Quality: {quality_validation.get('quality_score', 0):.1f}/100)")
                     return generated_item
@@ -163,9 +170,14 @@ class AgentSelector:
             logger.info("[ADAPTIVE] 🔄 Graceful fallback: selecting from existing item bank")
             # Continue to fallback below (don't return None)
         
-        # Fallback: Select best existing item from scored_items
-        if scored_items:
-            selected_item = scored_items[0][1]  # Highest scored item
+        # Fallback: Select best existing item (vectorized scoring over the index)
+        selected_item = self._pick_active(
+            index,
+            lambda mask: index.best_item_id(proficiency, last_competency, last_type, mask),
+            answered_ids,
+            available_mask
+        )
+        if selected_item:
             logger.info(f"[FALLBACK] Selected existing item ID {selected_item.id}: {selected_item.stem[:60]}...")
             return selected_item
         
@@ -173,6 +185,55 @@ class AgentSelector:
         logger.error("[FALLBACK] No items available (neither generated nor existing)")
         return None
     
+    def _pick_active(self, index, pick, answered_ids: List[int], available_mask) -> Optional[Item]:
+        """
+        Load the item chosen by pick(mask). The index can lag behind the
+        database (another worker's edit until the next version check), so an
+        item deactivated since is dropped from the index and the next
+        candidate is taken.
+        """
+        excluded = list(answered_ids)
+        while True:
+            best_id = pick(available_mask)
+            if best_id is None:
+                return None
+            item = db.session.get(Item, best_id)
+            if item is not None and item.active:
+                return item
+            
+            logger.warning(f"[SELECTOR] Item {best_id} is no longer active; taking the next candidate")
+            if item is not None:
+                index.upsert(item)
+            excluded.append(best_id)
+            available_mask = index.available_mask(excluded)
+    
+    def _select_max_information(
+        self,
+        index,
+        proficiency: Dict[str, Any],
+        answered_ids: List[int],
+        available_mask
+    ) -> Optional[Item]:
+        """
+        Maximum-information CAT step: one information-table lookup per
+        competency at its current theta, best available item wins.
+        Only calibrated items are candidates: generated items are indexed
+        with calibrated=False (their 2PL parameters are guesses) until
+        calibrate-items fits them.
+        """
+        selected_item = self._pick_active(
+            index,
+            lambda mask: index.max_information_item_id(proficiency, mask),
+            answered_ids,
+            available_mask
+        )
+        if selected_item is None:
+            logger.error("[CAT] No calibrated item available for any competency")
+            return None
+        
+        logger.info(f"[CAT] Selected max-information item ID {selected_item.id} ({selected_item.competency})")
+        return selected_item
+    
     def _should_generate_adaptive(
         self,
         proficiency: Dict[str, Any],
@@ -185,6 +246,11 @@ class AgentSelector:
         # Try to generate adaptive questions when:
         # 1. We have enough history to personalize (2+ responses)
         # 2. User is making progress (not stuck on first questions)
+        # 3. A real LLM is available (the stub cannot write adaptive questions)
+        
+        if self.generator.llm.client is None:
+            logger.info("[ADAPTIVE] No LLM client, using existing items")
+            return False
         
         if len(response_history) < 2:
             # Use existing items for first few questions (baseline)
@@ -362,6 +428,9 @@ class AgentSelector:
         """
         Score item for selection based on multiple factors.
         Higher score = better candidate.
+        
+        Scalar reference for ItemBankIndex.score_candidates, which applies
+        the same rules to the whole bank at once.
         """
         score = 0.0
         
@@ -7,6 +7,7 @@ from typing import Dict, Any, List, Optional
 from app.models import Item
 from app.agents.generator import AgentGenerator
 from app.core.blocks_config import BLOCKS
+from app.core.item_bank import register_item
 from app.services.logger import agent_logger
 from app import db
 
@@ -81,6 +82,7 @@ class AgentSelectorMatrix:
             choices=generated_data.get('choices', []),
             progressive_levels=True,
             tags='generated,matrix',
+            calibrated=False,
             active=True
         )
         
@@ -90,6 +92,7 @@ class AgentSelectorMatrix:
         
         db.session.add(generated_item)
         db.session.commit()
+        register_item(generated_item)
         
         agent_logger.event_success('selector_item_created', {'item_id': generated_item.id, 'block': next_block, 'session_id': session_id})
         return generated_item
@@ -23,7 +23,9 @@ class SemanticValidator:
     """
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        api_key = os.environ.get('OPENAI_API_KEY')
+        # Without a key embeddings are unavailable and validation degrades gracefully
+        self.client = OpenAI(api_key=api_key) if api_key else None
         self.min_similarity = 0.65
         self.max_similarity = 0.85
         self.embedding_cache = {}
@@ -36,6 +38,9 @@ class SemanticValidator:
         if text in self.embedding_cache:
             return self.embedding_cache[text]
         
+        if self.client is None:
+            return None
+        
         try:
             response = self.client.embeddings.create(
                 model="text-embedding-3-small",
@@ -0,0 +1,210 @@
+import time
+import click
+from app import db
+from app.services.logger import analytics_logger, export_logger
+from app.services.cache import bump_data_version
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI (`flask <command>`)."""
+
+    @app.cli.command('calibrate-items')
+    @click.option('--min-responses', default=None, type=int,
+                  help='Minimum responses for an item to be calibrated (default 30).')
+    @click.option('--max-iter', default=None, type=int, help='Maximum EM iterations per item group.')
+    @click.option('--workers', default=1, show_default=True, help='Processes used across item groups.')
+    @click.option('--dry-run', is_flag=True, help='Estimate and report without writing to the database.')
+    def calibrate_items(min_responses, max_iter, workers, dry_run):
+        """Re-estimate 2PL item parameters (a, b) from the response history."""
+        from app.core import calibration
+        from app.core.item_bank import invalidate_item_bank_index
+        from app.core.utils import log_audit
+
+        started = time.perf_counter()
+        analytics_logger.event_start('calibrate_items', {'workers': workers, 'dry_run': dry_run})
+
+        data = calibration.load_responses(db.session)
+        results = calibration.calibrate_responses(
+            data,
+            min_responses=min_responses or calibration.MIN_RESPONSES_PER_ITEM,
+            max_iter=max_iter or calibration.MAX_EM_ITERATIONS,
+            workers=workers
+        )
+
+        summary = {
+            'responses': int(data['session_ids'].size),
+            'items_calibrated': len(results),
+            'elapsed_s': round(time.perf_counter() - started, 2)
+        }
+
+        if not dry_run and results:
+            calibration.write_calibration(db.session, results)
+            bump_data_version()
+            invalidate_item_bank_index()
+            db.session.commit()
+            log_audit('system', 'calibrate_items', 'items', summary)
+
+        analytics_logger.event_success('calibrate_items', summary)
+
+        for result in results:
+            click.echo(
+                f"item {result['id']:>6}  a={result['discrimination_a']:.3f}  "
+                f"b={result['difficulty_b']:+.3f}  n={result['n_responses']}"
+            )
+        click.echo(
+            f"{summary['items_calibrated']} items calibrated from {summary['responses']} responses "
+            f"in {summary['elapsed_s']}s" + (' (dry run)' if dry_run else '')
+        )
+
+    @app.cli.command('bootstrap-data')
+    @click.option('--force', is_flag=True, help='Run the backfills even if they are marked as done.')
+    def bootstrap(force):
+        """Run the one-time backfills of derived tables (block scores, frente, rollups, item stats, change log)."""
+        from app.services.bootstrap import bootstrap_data, BOOTSTRAP_VERSION
+
+        started = time.perf_counter()
+        if bootstrap_data(force=force):
+            click.echo(f"Backfills (version {BOOTSTRAP_VERSION}) ran in {round(time.perf_counter() - started, 2)}s")
+        else:
+            click.echo(f"Backfills (version {BOOTSTRAP_VERSION}) already done")
+
+    @app.cli.command('rebuild-analytics')
+    def rebuild_analytics():
+        """Recompute the dashboard rollup tables from all completed snapshots."""
+        from app.services.analytics import rebuild_analytics_rollups
+        from app.core.utils import log_audit
+
+        started = time.perf_counter()
+        analytics_logger.event_start('rebuild_analytics')
+
+        groups = rebuild_analytics_rollups()
+        bump_data_version()
+        db.session.commit()
+        summary = {'groups': groups, 'elapsed_s': round(time.perf_counter() - started, 2)}
+        log_audit('system', 'rebuild_analytics', 'analytics_rollups', summary)
+
+        analytics_logger.event_success('rebuild_analytics', summary)
+        click.echo(f"{groups} rollup groups rebuilt in {summary['elapsed_s']}s")
+
+    @app.cli.command('rebuild-activity')
+    def rebuild_activity():
+        """Recompute the hourly/daily activity rollups from all sessions."""
+        from app.services.activity import rebuild_activity_rollups
+        from app.core.utils import log_audit
+
+        started = time.perf_counter()
+        analytics_logger.event_start('rebuild_activity')
+
+        rows = rebuild_activity_rollups()
+        bump_data_version()
+        db.session.commit()
+        summary = {'buckets': rows, 'elapsed_s': round(time.perf_counter() - started, 2)}
+        log_audit('system', 'rebuild_activity', 'activity_rollups', summary)
+
+        analytics_logger.event_success('rebuild_activity', summary)
+        click.echo(f"{rows} activity buckets rebuilt in {summary['elapsed_s']}s")
+
+    @app.cli.command('sweep-abandoned-sessions')
+    @click.option('--hours', default=None, type=int,
+                  help='Idle hours after which an active session is abandoned (default SESSION_ABANDON_AFTER_HOURS).')
+    def sweep_abandoned(hours):
+        """Mark stale active sessions as abandoned and count them in the activity rollups."""
+        from datetime import timedelta
+        from app.services.activity import sweep_abandoned_sessions
+        from app.core.utils import log_audit
+
+        hours = hours or app.config.get('SESSION_ABANDON_AFTER_HOURS', 24)
+        analytics_logger.event_start('sweep_abandoned_sessions', {'hours': hours})
+
+        swept = sweep_abandoned_sessions(timedelta(hours=hours))
+        if swept:
+            bump_data_version()
+        db.session.commit()
+        if swept:
+            log_audit('system', 'sweep_abandoned_sessions', 'sessions', {'sessions': swept, 'hours': hours})
+
+        analytics_logger.event_success('sweep_abandoned_sessions', {'sessions': swept})
+        click.echo(f"{swept} sessions marked abandoned (idle > {hours}h)")
+
+    @app.cli.command('rebuild-item-stats')
+    def rebuild_item_statistics():
+        """Recompute the per-item response statistics from all responses."""
+        from app.services.item_stats import rebuild_item_stats
+        from app.core.utils import log_audit
+
+        started = time.perf_counter()
+        analytics_logger.event_start('rebuild_item_stats')
+
+        items = rebuild_item_stats()
+        summary = {'items': items, 'elapsed_s': round(time.perf_counter() - started, 2)}
+        log_audit('system', 'rebuild_item_stats', 'item_stats', summary)
+
+        analytics_logger.event_success('rebuild_item_stats', summary)
+        click.echo(f"Stats of {items} items rebuilt in {summary['elapsed_s']}s")
+
+    @app.cli.command('export-data')
+    @click.argument('output', type=click.Path(dir_okay=False, writable=True))
+    @click.option('--dataset', type=click.Choice(['summary', 'responses']), default='summary', show_default=True,
+                  help='One row per completed session, or one row per response.')
+    @click.option('--format', 'export_format', type=click.Choice(['csv', 'parquet']), default='csv', show_default=True)
+    @click.option('--partition-by', type=click.Choice(['id', 'frente', 'department']), default='id', show_default=True,
+                  help='How the export is split across processes (id ranges keep the row order).')
+    @click.option('--workers', default=None, type=int, help='Processes rendering partitions (default: one per CPU).')
+    @click.option('--frente', default=None)
+    @click.option('--department', default=None)
+    @click.option('--role', default=None)
+    def export_data(output, dataset, export_format, partition_by, workers, frente, department, role):
+        """Write a full export to OUTPUT, rendering partitions in parallel processes."""
+        from app.services.parallel_export import parallel_export
+        from app.core.utils import log_audit
+
+        started = time.perf_counter()
+        details = {'dataset': dataset, 'format': export_format, 'partition_by': partition_by, 'workers': workers,
+                   'frente': frente, 'department': department, 'role': role}
+        export_logger.event_start('export_data', details)
+
+        try:
+            with open(output, 'wb') as fileobj:
+                rows = parallel_export(fileobj, export_format, dataset, partition_by, workers,
+                                       frente=frente, department=department, role=role)
+        except ValueError as e:
+            export_logger.event_error('export_data', details={'error': str(e)})
+            raise click.UsageError(str(e))
+
+        summary = {**details, 'rows': rows, 'elapsed_s': round(time.perf_counter() - started, 2)}
+        log_audit('system', 'export_data', 'data', summary)
+
+        export_logger.event_success('export_data', summary)
+        click.echo(f"{rows} rows written to {output} in {summary['elapsed_s']}s")
+
+    @app.cli.command('simulate-sessions')
+    @click.option('--engine', type=click.Choice(['matrix', 'legacy']), default='matrix', show_default=True)
+    @click.option('--sessions', default=200, show_default=True, help='Simulated examinees.')
+    @click.option('--workers', default=1, show_default=True, help='Processes the sessions are spread across.')
+    @click.option('--seed', default=0, show_default=True)
+    @click.option('--strategy', type=click.Choice(['heuristic', 'max_info']), default=None,
+                  help='Legacy item selection strategy (default ITEM_SELECTION_STRATEGY).')
+    @click.option('--estimator', type=click.Choice(['eap', 'map', 'heuristic']), default=None,
+                  help='Legacy ability estimator (default ABILITY_ESTIMATOR).')
+    @click.option('--bank-size', default=0, show_default=True, help='Extra calibrated legacy items to add.')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+    @click.option('--verbose', is_flag=True, help='Keep INFO logging from the engines.')
+    def simulate_sessions(engine, sessions, workers, seed, strategy, estimator, bank_size, as_json, verbose):
+        """Benchmark an assessment engine with simulated examinees (isolated in-memory databases)."""
+        import json
+        from app.services.simulation import simulate, format_report
+
+        options = {
+            'strategy': strategy or app.config.get('ITEM_SELECTION_STRATEGY'),
+            'estimator': estimator or app.config.get('ABILITY_ESTIMATOR'),
+            'bank_size': bank_size,
+            'verbose': verbose
+        }
+        analytics_logger.event_start('simulate_sessions', {'engine': engine, 'sessions': sessions,
+                                                           'workers': workers, **options})
+
+        report = simulate(engine, sessions, workers=workers, seed=seed, **options)
+
+        analytics_logger.event_success('simulate_sessions', {
+            'sessions': report['sessions'], 'wall_s': report['wall_s'], 'rmse': report['rmse']
+        })
+        click.echo(json.dumps(report, indent=2) if as_json else format_report(report))
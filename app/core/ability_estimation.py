@@ -0,0 +1,89 @@
+"""
+Grid-based Bayesian ability estimation for the 2PL model.
+
+Each competency keeps an (unnormalized) log-posterior over the fixed theta
+grid shared with the item information tables (app.core.scoring). A response
+adds its log-likelihood in O(grid), and EAP, MAP and the posterior SD are
+read directly off the grid, so the confidence interval reflects how much
+information the answered items actually carried.
+
+Graded scores are in [0, 1]; partial credit enters as a fractional Bernoulli
+likelihood: x * log P(theta) + (1 - x) * log(1 - P(theta)).
+"""
+from typing import Dict, Tuple
+import numpy as np
+from app.core.scoring import IRTScorer, theta_grid
+
+SCORE_PER_THETA = 16.67  # same linear map as IRTScorer._score_to_theta
+CI_Z = 1.96
+MIN_PRIOR_SD = 0.05  # keeps a collapsed CI from producing a degenerate prior
+
+ESTIMATORS = ('eap', 'map')
+
+def normal_log_prior(mean_theta, sd_theta) -> np.ndarray:
+    """Normal log-density on the grid; broadcastable inputs give shape (..., G)."""
+    mean_theta = np.asarray(mean_theta, dtype=np.float64)[..., None]
+    sd_theta = np.maximum(np.asarray(sd_theta, dtype=np.float64), MIN_PRIOR_SD)[..., None]
+    return -0.5 * ((theta_grid() - mean_theta) / sd_theta) ** 2
+
+def response_log_likelihood(discrimination, difficulty, response_score) -> np.ndarray:
+    """2PL fractional-Bernoulli log-likelihood on the grid, shape (..., G)."""
+    a = np.asarray(discrimination, dtype=np.float64)[..., None]
+    b = np.asarray(difficulty, dtype=np.float64)[..., None]
+    x = np.clip(np.asarray(response_score, dtype=np.float64), 0.0, 1.0)[..., None]
+    z = a * (theta_grid() - b)
+    # log P = -log(1 + e^-z), log(1 - P) = -log(1 + e^z), computed without overflow
+    return -x * np.logaddexp(0.0, -z) - (1.0 - x) * np.logaddexp(0.0, z)
+
+def prior_from_summary(score: float, ci_low: float, ci_high: float) -> np.ndarray:
+    """Log-prior matching a 0-100 score and its 95% interval."""
+    sd_theta = (ci_high - ci_low) / (2 * CI_Z * SCORE_PER_THETA)
+    return normal_log_prior(IRTScorer._score_to_theta(score), sd_theta)
+
+def posterior_moments(log_post: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return (eap, map, sd) on the theta scale for one posterior (G,) or a
+    stack of posteriors (N, G).
+    """
+    grid = theta_grid()
+    weights = np.exp(log_post - log_post.max(axis=-1, keepdims=True))
+    weights /= weights.sum(axis=-1, keepdims=True)
+    eap = weights @ grid
+    variance = weights @ (grid * grid) - eap * eap
+    map_theta = grid[np.argmax(log_post, axis=-1)]
+    return eap, map_theta, np.sqrt(np.maximum(variance, 0.0))
+
+def summarize(log_post: np.ndarray, estimator: str = 'eap') -> Dict[str, float]:
+    """Convert a posterior to the proficiency dict fields (score, ci_low, ci_high)."""
+    eap, map_theta, sd = posterior_moments(log_post)
+    theta = float(map_theta if estimator == 'map' else eap)
+    half_width = CI_Z * float(sd)
+    return {
+        'score': IRTScorer._theta_to_score(theta),
+        'ci_low': IRTScorer._theta_to_score(theta - half_width),
+        'ci_high': IRTScorer._theta_to_score(theta + half_width)
+    }
+
+def update(log_post: np.ndarray, discrimination: float, difficulty: float, response_score: float) -> np.ndarray:
+    """Add one response to a posterior, O(grid)."""
+    log_post = log_post + response_log_likelihood(discrimination, difficulty, response_score)
+    return log_post - log_post.max()
+
+def batch_update(log_posts: np.ndarray, discrimination, difficulty, response_score) -> np.ndarray:
+    """
+    Update N posteriors (N, G) with one response each, e.g. one step for many
+    concurrent sessions. Item parameters and scores are arrays of length N.
+    """
+    log_posts = log_posts + response_log_likelihood(discrimination, difficulty, response_score)
+    return log_posts - log_posts.max(axis=-1, keepdims=True)
+
+def accumulate(log_posts: np.ndarray, rows, discrimination, difficulty, response_score) -> np.ndarray:
+    """
+    Add many responses to a stack of posteriors in one pass; rows[i] is the
+    posterior row of response i. The likelihood factorizes, so order is
+    irrelevant and a full response history replays in a single vectorized step.
+    """
+    log_posts = np.array(log_posts, dtype=np.float64, copy=True)
+    np.add.at(log_posts, np.asarray(rows, dtype=np.intp),
+              response_log_likelihood(discrimination, difficulty, response_score))
+    return log_posts - log_posts.max(axis=-1, keepdims=True)
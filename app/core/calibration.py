@@ -0,0 +1,225 @@
+"""
+Offline 2PL item calibration from the response history.
+
+Marginal maximum likelihood via Bock-Aitkin EM on the shared theta grid:
+
+- E-step: posterior weights of every session over the grid, from the sparse
+  (session, item, score) triplets, reduced per session with np.add.reduceat.
+- M-step: expected correct/total counts per item and grid point (bincount),
+  then a few vectorized Fisher-scoring steps for all items at once in the
+  slope-intercept form z = a*theta + d, with weak priors on log a and d.
+
+Items are calibrated per group (competency for the legacy bank, block for
+matrix items). Each group measures its own trait, as in AgentScorer, so
+groups are independent problems and can run in a process pool.
+Graded scores in [0, 1] enter as fractional Bernoulli outcomes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select, update
+from app.core.scoring import theta_grid
+
+MIN_RESPONSES_PER_ITEM = 30
+MAX_EM_ITERATIONS = 200
+EM_TOLERANCE = 1e-3
+FISHER_STEPS = 3
+E_STEP_CHUNK = 200_000  # responses per E-step chunk, bounds the (R, G) buffers
+
+LOG_A_PRIOR_SD = 0.5  # log a ~ N(0, 0.5^2)
+INTERCEPT_PRIOR_SD = 3.0  # d ~ N(0, 3^2)
+A_BOUNDS = (0.2, 4.0)
+B_BOUNDS = (-4.0, 4.0)
+
+def _log_sigmoid(z: np.ndarray) -> np.ndarray:
+    return -np.logaddexp(0.0, -z)
+
+def calibrate_group(
+    person_idx: np.ndarray,
+    item_idx: np.ndarray,
+    scores: np.ndarray,
+    n_items: int,
+    a_start: Optional[np.ndarray] = None,
+    b_start: Optional[np.ndarray] = None,
+    max_iter: int = MAX_EM_ITERATIONS,
+    tol: float = EM_TOLERANCE
+) -> Dict[str, Any]:
+    """
+    Calibrate one group of items.
+
+    person_idx/item_idx are dense 0-based codes per response and scores the
+    graded values in [0, 1]. Returns a, b (length n_items), the marginal
+    log-likelihood and the number of EM iterations.
+    """
+    grid = theta_grid()
+    log_prior = -0.5 * grid ** 2
+    log_prior -= np.logaddexp.reduce(log_prior)
+
+    order = np.argsort(person_idx, kind='stable')
+    person_idx, item_idx = person_idx[order], item_idx[order]
+    scores = np.clip(scores[order].astype(np.float64), 0.0, 1.0)
+    # first response of every person, for reduceat
+    starts = np.flatnonzero(np.r_[True, person_idx[1:] != person_idx[:-1]])
+    # E-step chunks end on person boundaries
+    bounds = [0]
+    for start in starts[1:]:
+        if start - bounds[-1] >= E_STEP_CHUNK:
+            bounds.append(start)
+    bounds.append(len(person_idx))
+
+    a = np.clip(np.ones(n_items) if a_start is None else np.asarray(a_start, dtype=np.float64), *A_BOUNDS)
+    b = np.clip(np.zeros(n_items) if b_start is None else np.asarray(b_start, dtype=np.float64), *B_BOUNDS)
+    log_a, d = np.log(a), -a * b
+
+    log_likelihood = -np.inf
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        z = np.exp(log_a)[:, None] * grid + d[:, None]  # (J, G)
+        # x*log P + (1-x)*log(1-P) == log(1-P) + x*z
+        log_q = _log_sigmoid(-z)
+
+        expected_total = np.zeros((n_items, grid.size))
+        expected_correct = np.zeros((n_items, grid.size))
+        log_likelihood = 0.0
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            items, x = item_idx[lo:hi], scores[lo:hi, None]
+            chunk_starts = starts[(starts >= lo) & (starts < hi)] - lo
+            log_post = np.add.reduceat(log_q[items] + x * z[items], chunk_starts, axis=0)
+            log_post += log_prior
+            log_marginal = np.logaddexp.reduce(log_post, axis=1, keepdims=True)
+            log_likelihood += float(log_marginal.sum())
+            weights = np.exp(log_post - log_marginal)
+
+            counts = np.diff(np.r_[chunk_starts, hi - lo])
+            response_weights = np.repeat(weights, counts, axis=0)  # (R, G)
+            for g in range(grid.size):
+                expected_total[:, g] += np.bincount(items, weights=response_weights[:, g], minlength=n_items)
+                expected_correct[:, g] += np.bincount(items, weights=response_weights[:, g] * x[:, 0], minlength=n_items)
+
+        previous = np.concatenate([log_a, d])
+        for _ in range(FISHER_STEPS):
+            a = np.exp(log_a)
+            p = 1.0 / (1.0 + np.exp(-(a[:, None] * grid + d[:, None])))
+            residual = expected_correct - expected_total * p
+            w = expected_total * p * (1.0 - p)
+
+            grad_log_a = a * (residual @ grid) - log_a / LOG_A_PRIOR_SD ** 2
+            grad_d = residual.sum(axis=1) - d / INTERCEPT_PRIOR_SD ** 2
+            h_aa = a * a * (w @ (grid * grid)) + 1.0 / LOG_A_PRIOR_SD ** 2
+            h_ad = a * (w @ grid)
+            h_dd = w.sum(axis=1) + 1.0 / INTERCEPT_PRIOR_SD ** 2
+
+            det = h_aa * h_dd - h_ad * h_ad
+            step_log_a = np.clip((h_dd * grad_log_a - h_ad * grad_d) / det, -0.5, 0.5)
+            step_d = np.clip((h_aa * grad_d - h_ad * grad_log_a) / det, -1.0, 1.0)
+            log_a = np.clip(log_a + step_log_a, *np.log(A_BOUNDS))
+            d = d + step_d
+
+        if np.max(np.abs(np.concatenate([log_a, d]) - previous)) < tol:
+            break
+
+    a = np.exp(log_a)
+    return {
+        'a': a,
+        'b': np.clip(-d / a, *B_BOUNDS),
+        'log_likelihood': log_likelihood,
+        'iterations': iteration
+    }
+
+def _calibrate_group_job(args):
+    return calibrate_group(*args)
+
+def load_responses(session) -> Dict[str, Any]:
+    """
+    One projected query over responses joined to items. Returns NumPy
+    columns plus the starting parameters of every answered item.
+    """
+    from app.models import Item, Response
+
+    group_key = func.coalesce(Item.competency, Item.block, '')
+    rows = session.execute(
+        select(
+            Response.session_id,
+            Response.item_id,
+            Response.graded_score_0_1,
+            group_key,
+            Item.discrimination_a,
+            Item.difficulty_b
+        ).join(Item, Response.item_id == Item.id)
+        .where(Response.graded_score_0_1.isnot(None))
+    ).all()
+
+    if not rows:
+        return {'session_ids': np.array([], dtype=np.int64)}
+
+    session_ids, item_ids, scores, groups, a_values, b_values = zip(*rows)
+    return {
+        'session_ids': np.array(session_ids, dtype=np.int64),
+        'item_ids': np.array(item_ids, dtype=np.int64),
+        'scores': np.array(scores, dtype=np.float64),
+        'groups': np.array(groups, dtype=object),
+        'a': np.array([0.5 if v is None else v for v in a_values], dtype=np.float64),
+        'b': np.array([1.0 if v is None else v for v in b_values], dtype=np.float64)
+    }
+
+def calibrate_responses(
+    data: Dict[str, Any],
+    min_responses: int = MIN_RESPONSES_PER_ITEM,
+    max_iter: int = MAX_EM_ITERATIONS,
+    workers: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Calibrate every item group in data (see load_responses). Items with
+    fewer than min_responses responses are left out of the estimation.
+    Returns [{'id', 'difficulty_b', 'discrimination_a', 'n_responses', 'group'}].
+    """
+    if data['session_ids'].size == 0:
+        return []
+
+    item_codes, item_idx = np.unique(data['item_ids'], return_inverse=True)
+    response_counts = np.bincount(item_idx)
+    keep = response_counts[item_idx] >= min_responses
+
+    jobs = []
+    for group in np.unique(data['groups'][keep]):
+        rows = np.flatnonzero(keep & (data['groups'] == group))
+        group_items, first, local_items = np.unique(item_idx[rows], return_index=True, return_inverse=True)
+        _, local_persons = np.unique(data['session_ids'][rows], return_inverse=True)
+        jobs.append((group, group_items, (
+            local_persons,
+            local_items,
+            data['scores'][rows],
+            group_items.size,
+            data['a'][rows][first],
+            data['b'][rows][first],
+            max_iter
+        )))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fits = list(pool.map(_calibrate_group_job, [job[2] for job in jobs]))
+    else:
+        fits = [calibrate_group(*job[2]) for job in jobs]
+
+    results = []
+    for (group, group_items, _), fit in zip(jobs, fits):
+        for local, item in enumerate(group_items):
+            results.append({
+                'id': int(item_codes[item]),
+                'discrimination_a': round(float(fit['a'][local]), 4),
+                'difficulty_b': round(float(fit['b'][local]), 4),
+                'n_responses': int(response_counts[item]),
+                'group': group or None
+            })
+    return results
+
+def write_calibration(session, results: List[Dict[str, Any]]):
+    """Bulk UPDATE of item parameters by primary key (no ORM loads); fitted items become calibrated."""
+    from app.models import Item
+
+    if results:
+        session.execute(update(Item), [
+            {'id': r['id'], 'difficulty_b': r['difficulty_b'], 'discrimination_a': r['discrimination_a'],
+             'calibrated': True}
+            for r in results
+        ])
@@ -0,0 +1,503 @@
+"""
+In-memory item bank index for the legacy adaptive selector.
+
+Keeps the selection-relevant columns of every Item (difficulty_b,
+discrimination_a, competency, type, active, calibrated) as NumPy arrays, so candidate
+scoring is a single vectorized expression and exclusion is a boolean mask.
+One index is held per Flask app (i.e. per worker) and rebuilt lazily when
+the shared 'item_bank' counter in data_versions has moved since it was
+built (bumped by invalidate_item_bank_index on admin item edits and
+calibration, so every worker sees them), or when it is older than
+ITEM_BANK_INDEX_TTL_S (which also picks up other workers' generated items).
+
+For maximum-information (CAT) selection it also holds the 2PL item
+information of every item on the fixed theta grid, plus per competency and
+grid point the calibrated rows ranked by information, so picking the most
+informative available item does not depend on bank size. Uncalibrated
+(generated) items are never CAT candidates.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+
+from app import db
+from app.models import Item
+from app.core.scoring import IRTScorer, theta_grid, theta_grid_index
+from app.services.cache import bump_data_version, current_data_version
+
+_EXTENSION_KEY = 'item_bank_index'
+ITEM_BANK_VERSION = 'item_bank'  # data_versions counter of item edits
+
+# Column defaults from the Item model, used when a row has NULL parameters
+DEFAULT_DIFFICULTY_B = 1.0
+DEFAULT_DISCRIMINATION_A = 0.5
+
+# Rows scored per step by the bounded search in best_item_id
+SELECTION_CHUNK = 512
+
+# Largest session-independent bonus an item can get on top of its quality:
+# +10 for difficulty match and +3 for a type change (see _score_item)
+_MAX_MATCH_BONUS = 13.0 + 1e-9
+
+# Most informative rows kept per (competency, theta grid point)
+INFORMATION_TOP_K = 64
+
+# 0-100 score CI half-width -> theta standard error (95% interval, 16.67 points per theta)
+_CI_TO_THETA_SE = 1.0 / (1.96 * 16.67)
+
+
+class ItemBankIndex:
+    """
+    Columnar snapshot of the item bank.
+
+    Rows are kept sorted by item id (new items always get the highest id),
+    so exclusion by id is a searchsorted instead of a dict lookup.
+    Competency and type are dictionary-encoded into small integer codes.
+    """
+
+    def __init__(self, rows: Iterable[Tuple] = ()):
+        self._lock = threading.Lock()
+        self.competency_codes: Dict[Optional[str], int] = {}
+        self.type_codes: Dict[Optional[str], int] = {}
+        self.competencies: List[Optional[str]] = []
+        self.types: List[Optional[str]] = []
+        self.built_at = time.monotonic()
+        self.data_version: Optional[int] = None
+        # Per competency code: rows sorted by (quality desc, id asc); rebuilt lazily
+        self._selection_orders: Optional[List[np.ndarray]] = None
+        # Item information on the theta grid, shape (grid points, capacity); built lazily
+        self._information: Optional[np.ndarray] = None
+        # Per competency code: (grid points, <= INFORMATION_TOP_K) rows by information desc
+        self._information_ranks: Dict[int, np.ndarray] = {}
+
+        self._size = 0
+        self._allocate(1024)
+
+        for row in rows:
+            self._append(*row)
+
+    @classmethod
+    def load(cls) -> 'ItemBankIndex':
+        """Build the index with one column-projected query (no JSON columns)."""
+        rows = db.session.query(
+            Item.id,
+            Item.difficulty_b,
+            Item.discrimination_a,
+            Item.competency,
+            Item.type,
+            Item.active,
+            Item.calibrated
+        ).order_by(Item.id).all()
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def age_s(self) -> float:
+        return time.monotonic() - self.built_at
+
+    # ===== Storage =====
+
+    def _allocate(self, capacity: int):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.difficulty_b = np.zeros(capacity, dtype=np.float64)
+        self.discrimination_a = np.zeros(capacity, dtype=np.float64)
+        self.competency_code = np.zeros(capacity, dtype=np.int32)
+        self.type_code = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.calibrated = np.zeros(capacity, dtype=bool)
+        # Per-item terms of the selection score that do not depend on the session
+        self.difficulty_score = np.zeros(capacity, dtype=np.float64)
+        self.quality_bonus = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self):
+        old = self._columns()
+        self._allocate(len(self.ids) * 2)
+        for name, values in old.items():
+            getattr(self, name)[:self._size] = values[:self._size]
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        return {
+            'ids': self.ids,
+            'difficulty_b': self.difficulty_b,
+            'discrimination_a': self.discrimination_a,
+            'competency_code': self.competency_code,
+            'type_code': self.type_code,
+            'active': self.active,
+            'calibrated': self.calibrated,
+            'difficulty_score': self.difficulty_score,
+            'quality_bonus': self.quality_bonus,
+        }
+
+    @staticmethod
+    def _encode(vocab: Dict[Optional[str], int], values: List[Optional[str]], value: Optional[str]) -> int:
+        code = vocab.get(value)
+        if code is None:
+            code = len(values)
+            vocab[value] = code
+            values.append(value)
+        return code
+
+    def _write_row(self, row: int, item_id, difficulty_b, discrimination_a, competency, item_type, active,
+                   calibrated=True):
+        b = DEFAULT_DIFFICULTY_B if difficulty_b is None else float(difficulty_b)
+        a = DEFAULT_DISCRIMINATION_A if discrimination_a is None else float(discrimination_a)
+
+        self.ids[row] = item_id
+        self.difficulty_b[row] = b
+        self.discrimination_a[row] = a
+        self.competency_code[row] = self._encode(self.competency_codes, self.competencies, competency)
+        self.type_code[row] = self._encode(self.type_codes, self.types, item_type)
+        self.active[row] = bool(active)
+        self.calibrated[row] = calibrated is not False
+        # Same theta -> 0-100 mapping as AgentSelector._score_item
+        self.difficulty_score[row] = 50 + (b * 16.67)
+        self.quality_bonus[row] = a * 10
+
+    def _append(self, item_id, difficulty_b, discrimination_a, competency, item_type, active, calibrated=True):
+        if self._size == len(self.ids):
+            self._grow()
+        self._write_row(self._size, item_id, difficulty_b, discrimination_a, competency, item_type, active,
+                        calibrated)
+        self._size += 1
+
+    def _row_of(self, item_id: int) -> Optional[int]:
+        ids = self.ids[:self._size]
+        row = int(np.searchsorted(ids, item_id))
+        if row < self._size and ids[row] == item_id:
+            return row
+        return None
+
+    def upsert(self, item: Item):
+        """Insert a new item or refresh an existing row in place."""
+        values = (
+            item.id,
+            item.difficulty_b,
+            item.discrimination_a,
+            item.competency,
+            item.type,
+            item.active if item.active is not None else True,
+            item.calibrated
+        )
+        with self._lock:
+            row = self._row_of(item.id)
+            if row is not None:
+                self._information_ranks.pop(int(self.competency_code[row]), None)
+                self._write_row(row, *values)
+            elif self._size == 0 or item.id > self.ids[self._size - 1]:
+                row = self._size
+                self._append(*values)
+            else:
+                # Out-of-order id: rebuild the sorted layout
+                rows = [tuple(r) for r in self._iter_rows()] + [values]
+                rows.sort(key=lambda r: r[0])
+                self._size = 0
+                for r in rows:
+                    self._append(*r)
+                self._information = None
+                self._information_ranks = {}
+
+            self._selection_orders = None
+            if row is not None:
+                self._information_ranks.pop(int(self.competency_code[row]), None)
+            if self._information is not None and row is not None:
+                if row >= self._information.shape[1]:
+                    grown = np.zeros((self._information.shape[0], len(self.ids)), dtype=np.float32)
+                    grown[:, :self._information.shape[1]] = self._information
+                    self._information = grown
+                self._information[:, row] = IRTScorer.item_information(
+                    theta_grid(), self.discrimination_a[row], self.difficulty_b[row]
+                )
+
+    def _iter_rows(self):
+        for row in range(self._size):
+            yield (
+                int(self.ids[row]),
+                float(self.difficulty_b[row]),
+                float(self.discrimination_a[row]),
+                self.competencies[self.competency_code[row]],
+                self.types[self.type_code[row]],
+                bool(self.active[row]),
+                bool(self.calibrated[row])
+            )
+
+    # ===== Selection =====
+
+    def available_mask(self, exclude_ids: Iterable[int] = ()) -> np.ndarray:
+        """Boolean mask of active items not in exclude_ids."""
+        with self._lock:
+            size = self._size
+            mask = self.active[:size].copy()
+            exclude = np.fromiter(exclude_ids, dtype=np.int64)
+            if exclude.size:
+                ids = self.ids[:size]
+                rows = np.searchsorted(ids, exclude)
+                rows = rows[rows < size]
+                rows = rows[np.isin(ids[rows], exclude)]
+                mask[rows] = False
+        return mask
+
+    def _competency_terms(
+        self,
+        proficiency: Dict[str, Any],
+        last_competency: Optional[str],
+        last_type: Optional[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Session-dependent terms of _score_item, computed once per code:
+        competency score, competency bonus (uncertainty + diversity +
+        coverage) and type-change bonus.
+        """
+        n_codes = len(self.competencies)
+        comp_score = np.empty(n_codes, dtype=np.float64)
+        code_bonus = np.empty(n_codes, dtype=np.float64)
+        for code, competency in enumerate(self.competencies):
+            comp_data = proficiency.get(competency, {})
+            comp_score[code] = comp_data.get('score', 50)
+            ci_width = comp_data.get('ci_high', 80) - comp_data.get('ci_low', 20)
+            items_count = comp_data.get('items_count', 0)
+
+            bonus = 0.0
+            if ci_width > 25:
+                bonus += 8.0
+            elif ci_width > 15:
+                bonus += 4.0
+            if competency != last_competency:
+                bonus += 5.0
+            if items_count == 0:
+                bonus += 12.0
+            elif items_count == 1:
+                bonus += 6.0
+            code_bonus[code] = bonus
+
+        type_bonus = np.array(
+            [3.0 if item_type != last_type else 0.0 for item_type in self.types],
+            dtype=np.float64
+        )
+        return comp_score, code_bonus, type_bonus
+
+    def _score_rows(self, rows, comp_score, code_bonus, type_bonus) -> np.ndarray:
+        """Selection score for the given rows (slice or index array)."""
+        comp_codes = self.competency_code[rows]
+        score_diff = np.abs(comp_score[comp_codes] - self.difficulty_score[rows])
+        # +10 when diff < 20, +5 when diff < 35
+        scores = 5.0 * ((score_diff < 20).astype(np.float64) + (score_diff < 35))
+        scores += self.quality_bonus[rows]
+        scores += code_bonus[comp_codes]
+        scores += type_bonus[self.type_code[rows]]
+        return scores
+
+    def score_candidates(
+        self,
+        proficiency: Dict[str, Any],
+        last_competency: Optional[str],
+        last_type: Optional[str],
+        mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Vectorized equivalent of AgentSelector._score_item for every row.
+        Rows outside mask score -inf.
+        """
+        size = len(mask) if mask is not None else self._size
+        terms = self._competency_terms(proficiency, last_competency, last_type)
+        scores = self._score_rows(slice(0, size), *terms)
+
+        if mask is not None:
+            scores[~mask] = -np.inf
+        return scores
+
+    def _get_selection_orders(self) -> List[np.ndarray]:
+        with self._lock:
+            if self._selection_orders is None:
+                size = self._size
+                codes = self.competency_code[:size]
+                # lexsort: last key is primary -> (code, -quality, id)
+                order = np.lexsort((self.ids[:size], -self.quality_bonus[:size], codes))
+                bounds = np.searchsorted(codes[order], np.arange(len(self.competencies) + 1))
+                self._selection_orders = [
+                    order[bounds[code]:bounds[code + 1]]
+                    for code in range(len(self.competencies))
+                ]
+            return self._selection_orders
+
+    def best_item_id(
+        self,
+        proficiency: Dict[str, Any],
+        last_competency: Optional[str],
+        last_type: Optional[str],
+        mask: np.ndarray
+    ) -> Optional[int]:
+        """
+        Id of the highest scoring available item (lowest id wins ties), i.e.
+        the argmax of score_candidates.
+
+        Instead of scoring the whole bank, walks each competency's rows in
+        descending quality order, a chunk at a time, and stops as soon as no
+        remaining row can reach the best score found. Typical cost is a few
+        chunks regardless of bank size.
+        """
+        if not mask.any():
+            return None
+        if len(mask) < self._size:
+            # Items registered after the mask was taken are active and unanswered
+            mask = np.concatenate([mask, self.active[len(mask):self._size]])
+
+        terms = self._competency_terms(proficiency, last_competency, last_type)
+        code_bonus = terms[1]
+        orders = self._get_selection_orders()
+
+        bounds = sorted(
+            ((code_bonus[code] + _MAX_MATCH_BONUS + self.quality_bonus[order[0]], code)
+             for code, order in enumerate(orders) if len(order)),
+            reverse=True
+        )
+
+        best_score, best_id = -np.inf, None
+        for bound, code in bounds:
+            if bound < best_score:
+                break
+            order = orders[code]
+            for start in range(0, len(order), SELECTION_CHUNK):
+                rows = order[start:start + SELECTION_CHUNK]
+                bound = code_bonus[code] + _MAX_MATCH_BONUS + self.quality_bonus[rows[0]]
+                if bound < best_score:
+                    break
+                rows = rows[mask[rows]]
+                if bound - 2e-9 <= best_score and self.ids[rows].min(initial=best_id) >= best_id:
+                    # Can at most tie, and only a lower id would win a tie
+                    continue
+                if not len(rows):
+                    continue
+                scores = self._score_rows(rows, *terms)
+                top = scores.max()
+                top_id = int(self.ids[rows[scores == top]].min())
+                if top > best_score or (top == best_score and top_id < best_id):
+                    best_score, best_id = top, top_id
+
+        return best_id
+
+
+    # ===== Maximum information (CAT) =====
+
+    def _get_information(self) -> np.ndarray:
+        """Dense (grid points x items) 2PL information matrix, float32."""
+        if self._information is None:
+            size = self._size
+            information = np.zeros((len(theta_grid()), len(self.ids)), dtype=np.float32)
+            information[:, :size] = IRTScorer.item_information(
+                theta_grid()[:, None],
+                self.discrimination_a[:size],
+                self.difficulty_b[:size]
+            )
+            self._information = information
+        return self._information
+
+    def _get_information_ranks(self, code: int) -> np.ndarray:
+        """Calibrated rows of one competency ranked by information at every grid point."""
+        ranks = self._information_ranks.get(code)
+        if ranks is None:
+            information = self._get_information()
+            size = self._size
+            rows = np.flatnonzero((self.competency_code[:size] == code) & self.calibrated[:size])
+            k = min(INFORMATION_TOP_K, len(rows))
+            if k == 0:
+                ranks = np.empty((information.shape[0], 0), dtype=np.int64)
+            else:
+                values = information[:, rows]
+                top = np.argpartition(-values, k - 1, axis=1)[:, :k]
+                top_values = np.take_along_axis(values, top, axis=1)
+                top = np.take_along_axis(top, np.argsort(-top_values, axis=1, kind='stable'), axis=1)
+                ranks = rows[top]
+            self._information_ranks[code] = ranks
+        return ranks
+
+    def _most_informative_row(self, code: int, grid_index: int, mask: np.ndarray) -> Optional[int]:
+        """Available row of this competency with the highest information at grid_index."""
+        for row in self._get_information_ranks(code)[grid_index]:
+            if mask[row]:
+                return int(row)
+
+        # Every top-ranked row is excluded: scan the competency's rows directly
+        rows = np.flatnonzero((self.competency_code[:len(mask)] == code) & mask)
+        if not len(rows):
+            return None
+        return int(rows[np.argmax(self._get_information()[grid_index, rows])])
+
+    def max_information_item_id(self, proficiency: Dict[str, Any], mask: np.ndarray) -> Optional[int]:
+        """
+        Maximum-information CAT selection.
+
+        For each competency in proficiency, looks up the theta grid point of
+        its current estimate and takes the most informative available item.
+        Across competencies, the item with the largest expected reduction of
+        posterior variance, var - 1 / (1 / var + I), wins, so information is
+        spent where the estimate is least certain. Uncalibrated items are
+        excluded on top of mask.
+        """
+        if len(mask) < self._size:
+            mask = np.concatenate([mask, self.active[len(mask):self._size]])
+        mask = mask & self.calibrated[:len(mask)]
+        if not mask.any():
+            return None
+
+        with self._lock:
+            information = self._get_information()
+            best_gain, best_row = -np.inf, None
+            for competency, comp_data in proficiency.items():
+                code = self.competency_codes.get(competency)
+                if code is None:
+                    continue
+
+                theta = IRTScorer._score_to_theta(comp_data.get('score', 50))
+                grid_index = theta_grid_index(theta)
+                row = self._most_informative_row(code, grid_index, mask)
+                if row is None:
+                    continue
+
+                ci_width = comp_data.get('ci_high', 80) - comp_data.get('ci_low', 20)
+                variance = max(ci_width / 2 * _CI_TO_THETA_SE, 1e-6) ** 2
+                info = float(information[grid_index, row])
+                gain = variance - 1.0 / (1.0 / variance + info)
+                if gain > best_gain or (gain == best_gain and self.ids[row] < self.ids[best_row]):
+                    best_gain, best_row = gain, row
+
+        if best_row is None:
+            return None
+        return int(self.ids[best_row])
+
+
+def get_item_bank_index() -> ItemBankIndex:
+    """
+    Return this worker's index, (re)building it when missing, older than the
+    shared item bank version (one primary-key read) or past its TTL.
+    """
+    index = current_app.extensions.get(_EXTENSION_KEY)
+    ttl = current_app.config.get('ITEM_BANK_INDEX_TTL_S', 300)
+    version = current_data_version(ITEM_BANK_VERSION)
+
+    if index is None or index.data_version != version or index.age_s() > ttl:
+        index = ItemBankIndex.load()
+        index.data_version = version
+        current_app.extensions[_EXTENSION_KEY] = index
+
+    return index
+
+
+def invalidate_item_bank_index():
+    """
+    Mark every worker's index stale: bumps the shared item bank version when
+    the caller's transaction commits, and drops this worker's copy now.
+    """
+    bump_data_version(ITEM_BANK_VERSION)
+    current_app.extensions.pop(_EXTENSION_KEY, None)
+
+
+def register_item(item: Item):
+    """Add or refresh one item in the loaded index. No-op if it is not loaded."""
+    index = current_app.extensions.get(_EXTENSION_KEY)
+    if index is not None:
+        index.upsert(item)
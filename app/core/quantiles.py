@@ -0,0 +1,128 @@
+"""
+Mergeable quantile sketch for non-negative measurements (scores, seconds,
+milliseconds).
+
+Values are counted in logarithmic bins of ratio gamma = (1 + a) / (1 - a),
+so every quantile is returned within relative error a of a true sample
+value (DDSketch). Unlike t-digest or KLL, the bins are fixed: two sketches
+merge by adding counts, and a sketch can also be subtracted from another
+exactly, which the rollups need when a user's results are deleted. The
+result does not depend on insertion order, so incremental rollups and a
+rebuild from scratch produce identical sketches.
+
+Sketches serialize to small JSON dicts ({'a': accuracy, 'z': zero count,
+'b': {bin: count}}) for storage in rollup rows.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+class QuantileSketch:
+    """Log-binned counts of non-negative values; see the module docstring."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('relative_accuracy must be in (0, 1)')
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zero_count = 0
+        self.bins: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def __len__(self):
+        return self.count
+
+    def _bin(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _bin_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> 'QuantileSketch':
+        """Add a value count times (a negative count removes it)."""
+        if value is None:
+            return self
+        if value < 0:
+            raise ValueError('QuantileSketch only accepts non-negative values')
+        if value == 0:
+            self.zero_count += count
+        else:
+            index = self._bin(value)
+            total = self.bins.get(index, 0) + count
+            if total:
+                self.bins[index] = total
+            else:
+                self.bins.pop(index, None)
+        return self
+
+    def update(self, values: Iterable[float], sign: int = 1) -> 'QuantileSketch':
+        for value in values:
+            self.add(value, sign)
+        return self
+
+    def merge(self, other: 'QuantileSketch', sign: int = 1) -> 'QuantileSketch':
+        """Add (sign=1) or subtract (sign=-1) another sketch's counts, in place."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('cannot merge sketches with different relative accuracy')
+        self.zero_count += sign * other.zero_count
+        for index, count in other.bins.items():
+            total = self.bins.get(index, 0) + sign * count
+            if total:
+                self.bins[index] = total
+            else:
+                self.bins.pop(index, None)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q in [0, 1] (lower rank), or None when empty."""
+        if not 0 <= q <= 1:
+            raise ValueError('quantile must be in [0, 1]')
+        count = self.count
+        if count <= 0:
+            return None
+
+        rank = q * (count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self._bin_value(index)
+        return self._bin_value(max(self.bins))
+
+    def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES, digits: int = 1) -> Dict[str, Optional[float]]:
+        """{'p10': ..., 'p50': ..., 'p90': ...} rounded for display."""
+        result = {}
+        for q in qs:
+            value = self.quantile(q)
+            result[f'p{round(q * 100):g}'] = round(value, digits) if value is not None else None
+        return result
+
+    def to_dict(self) -> Dict:
+        return {'a': self.relative_accuracy, 'z': self.zero_count, 'b': {str(index): count for index, count in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'QuantileSketch':
+        if not data:
+            return cls()
+        sketch = cls(data.get('a', DEFAULT_RELATIVE_ACCURACY))
+        sketch.zero_count = data.get('z', 0)
+        sketch.bins = {int(index): count for index, count in data.get('b', {}).items()}
+        return sketch
+
+    def __eq__(self, other):
+        return (isinstance(other, QuantileSketch)
+                and self.relative_accuracy == other.relative_accuracy
+                and self.zero_count == other.zero_count
+                and self.bins == other.bins)
+
+    def __repr__(self):
+        return f'<QuantileSketch n={self.count} bins={len(self.bins)}>'
@@ -1,5 +1,21 @@
 import math
 from typing import Dict, Tuple
+import numpy as np
+
+# Fixed theta grid shared by item information tables and ability estimation
+THETA_MIN = -4.0
+THETA_MAX = 4.0
+THETA_GRID_POINTS = 41  # step 0.2
+
+def theta_grid() -> np.ndarray:
+    """Quadrature/lookup points on the theta scale."""
+    return np.linspace(THETA_MIN, THETA_MAX, THETA_GRID_POINTS)
+
+def theta_grid_index(theta: float) -> int:
+    """Index of the grid point nearest to theta (clamped to the grid)."""
+    step = (THETA_MAX - THETA_MIN) / (THETA_GRID_POINTS - 1)
+    index = int(round((theta - THETA_MIN) / step))
+    return max(0, min(THETA_GRID_POINTS - 1, index))
 
 class IRTScorer:
     
@@ -20,6 +36,16 @@ class IRTScorer:
         score = 50 + (theta * 16.67)
         return max(0, min(100, score))
     
+    @staticmethod
+    def item_information(theta, discrimination, difficulty):
+        """
+        Fisher information of a 2PL item: I(theta) = a^2 * P * (1 - P).
+        Accepts scalars or broadcastable NumPy arrays.
+        """
+        a = np.asarray(discrimination, dtype=np.float64)
+        p = 1.0 / (1.0 + np.exp(-a * (np.asarray(theta, dtype=np.float64) - difficulty)))
+        return a * a * p * (1.0 - p)
+    
     @staticmethod
     def update_proficiency(
         current_score: float,
@@ -1,9 +1,12 @@
 from app import db
-from app.models import Item, Audit
+from app.models import Item, Audit, ProficiencySnapshot, SnapshotBlockScore, User
+from app.models.user import frente_for_email
 from config import Config
 import json
 from datetime import datetime
 
+BACKFILL_BATCH = 5000  # snapshots per page in backfill_snapshot_block_scores
+
 def seed_database():
     """Seed database with initial items if not already seeded."""
     if Item.query.count() > 0:
@@ -564,6 +567,50 @@ def seed_database():
     db.session.add(audit)
     db.session.commit()
 
+def backfill_snapshot_block_scores():
+    """
+    Populate snapshot_block_scores from block_scores_json, paging snapshots
+    by id. Runs only while the table is empty (first start after it was
+    introduced); the Alembic migration 003 does the same for migrated
+    databases.
+    """
+    if db.session.query(SnapshotBlockScore.id).first() is not None:
+        return
+    
+    last_id = 0
+    while True:
+        snapshots = db.session.query(ProficiencySnapshot.id, ProficiencySnapshot.block_scores_json)\
+            .filter(ProficiencySnapshot.block_scores_json.isnot(None), ProficiencySnapshot.id > last_id)\
+            .order_by(ProficiencySnapshot.id).limit(BACKFILL_BATCH).all()
+        if not snapshots:
+            break
+        last_id = snapshots[-1][0]
+        
+        rows = [
+            {'snapshot_id': snapshot_id, **values}
+            for snapshot_id, payload in snapshots
+            for values in SnapshotBlockScore.values_for(json.loads(payload))
+        ]
+        if rows:
+            db.session.execute(SnapshotBlockScore.__table__.insert(), rows)
+    db.session.commit()
+
+def backfill_user_frente():
+    """
+    Derive users.frente for rows written before the column existed (or
+    outside the ORM). The Alembic migration 012 does the same for migrated
+    databases.
+    """
+    users = db.session.query(User.id, User.email).filter(User.frente.is_(None), User.email.isnot(None)).all()
+    if not users:
+        return
+    
+    db.session.execute(
+        User.__table__.update().where(User.__table__.c.id == db.bindparam('user_id')).values(frente=db.bindparam('frente')),
+        [{'user_id': user_id, 'frente': frente_for_email(email)} for user_id, email in users]
+    )
+    db.session.commit()
+
 def log_audit(actor: str, action: str, target: str, payload: dict = None):
     """Log an audit entry."""
     audit = Audit(
@@ -3,7 +3,14 @@ from app.models.session import Session
 from app.models.item import Item
 from app.models.response import Response
 from app.models.snapshot import ProficiencySnapshot
+from app.models.snapshot_block_score import SnapshotBlockScore
 from app.models.recommendation import Recommendation
 from app.models.audit import Audit
+from app.models.analytics_rollup import AnalyticsRollup
+from app.models.data_version import DataVersion
+from app.models.activity_rollup import ActivityRollup
+from app.models.item_stat import ItemStat
+from app.models.change_log import ChangeLog
+from app.models.export_job import ExportJob
 
-__all__ = ['User', 'Session', 'Item', 'Response', 'ProficiencySnapshot', 'Recommendation', 'Audit']
+__all__ = ['User', 'Session', 'Item', 'Response', 'ProficiencySnapshot', 'SnapshotBlockScore', 'Recommendation', 'Audit', 'AnalyticsRollup', 'DataVersion', 'ActivityRollup', 'ItemStat', 'ChangeLog', 'ExportJob']
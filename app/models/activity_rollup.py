@@ -0,0 +1,52 @@
+from collections import defaultdict
+from app import db
+from app.core.quantiles import QuantileSketch
+import json
+
+class ActivityRollup(db.Model):
+    """Session activity counters for one time bucket (hour or day, UTC) and dashboard group."""
+    __tablename__ = 'activity_rollups'
+    # Also the index of time-series reads: (granularity, dimension, group_key) + bucket range
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'dimension', 'group_key', 'bucket_start',
+                            name='uq_activity_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    dimension = db.Column(db.String(20), nullable=False)  # global, frente, department
+    group_key = db.Column(db.String(255), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    
+    sessions_started = db.Column(db.Integer, nullable=False, default=0)  # by started_at
+    sessions_completed = db.Column(db.Integer, nullable=False, default=0)  # by ended_at
+    sessions_abandoned = db.Column(db.Integer, nullable=False, default=0)  # by started_at
+    time_spent_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    time_spent_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    level_counts_json = db.Column(db.Text)  # JSON: {maturity_level: count}
+    sketches_json = db.Column(db.Text)  # JSON: {raw_score|time_spent_s: QuantileSketch.to_dict()}
+    
+    @property
+    def level_counts(self):
+        if self.level_counts_json:
+            return json.loads(self.level_counts_json)
+        return {}
+    
+    @level_counts.setter
+    def level_counts(self, value):
+        self.level_counts_json = json.dumps(value, ensure_ascii=False)
+    
+    @property
+    def sketches(self):
+        """{metric: QuantileSketch}; metrics not stored yet start empty."""
+        stored = json.loads(self.sketches_json) if self.sketches_json else {}
+        return defaultdict(QuantileSketch, {metric: QuantileSketch.from_dict(data) for metric, data in stored.items()})
+    
+    @sketches.setter
+    def sketches(self, value):
+        self.sketches_json = json.dumps({metric: sketch.to_dict() for metric, sketch in value.items()}, separators=(',', ':'))
+    
+    def __repr__(self):
+        return f'<ActivityRollup {self.granularity} {self.bucket_start} {self.dimension}={self.group_key}>'
@@ -0,0 +1,60 @@
+from collections import defaultdict
+from datetime import datetime
+from app import db
+from app.core.quantiles import QuantileSketch
+import json
+
+class AnalyticsRollup(db.Model):
+    """Running totals of completed snapshots for one dashboard group (e.g. department=TI)."""
+    __tablename__ = 'analytics_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('dimension', 'group_key', name='uq_analytics_rollups_dimension_group'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(20), nullable=False)  # global, frente, department, role
+    group_key = db.Column(db.String(255), nullable=False)
+
+    snapshot_count = db.Column(db.Integer, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)  # snapshots with a raw_score
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0.0)
+    level_counts_json = db.Column(db.Text)  # JSON: {maturity_level: count}
+    block_sums_json = db.Column(db.Text)  # JSON: {block: [score_sum, count]}
+    sketches_json = db.Column(db.Text)  # JSON: {metric: QuantileSketch.to_dict()}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def totals(self):
+        """All counters as a plain dict (see app.services.analytics.add_to_totals)."""
+        return {
+            'count': self.snapshot_count or 0,
+            'score_count': self.score_count or 0,
+            'score_sum': self.score_sum or 0.0,
+            'score_sq_sum': self.score_sq_sum or 0.0,
+            'levels': json.loads(self.level_counts_json) if self.level_counts_json else {},
+            'blocks': json.loads(self.block_sums_json) if self.block_sums_json else {},
+            'sketches': self.sketches
+        }
+    
+    @property
+    def sketches(self):
+        """{metric: QuantileSketch}; metrics not stored yet start empty."""
+        stored = json.loads(self.sketches_json) if self.sketches_json else {}
+        return defaultdict(QuantileSketch, {metric: QuantileSketch.from_dict(data) for metric, data in stored.items()})
+
+    @totals.setter
+    def totals(self, value):
+        self.snapshot_count = value['count']
+        self.score_count = value['score_count']
+        self.score_sum = value['score_sum']
+        self.score_sq_sum = value['score_sq_sum']
+        self.level_counts_json = json.dumps(value['levels'], ensure_ascii=False)
+        self.block_sums_json = json.dumps(value['blocks'], ensure_ascii=False)
+        self.sketches_json = json.dumps(
+            {metric: sketch.to_dict() for metric, sketch in value['sketches'].items()},
+            separators=(',', ':')
+        )
+
+    def __repr__(self):
+        return f'<AnalyticsRollup {self.dimension}={self.group_key}: {self.snapshot_count}>'
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app import db
+
+class ChangeLog(db.Model):
+    """One insert/update/delete of a synced entity; seq (assigned after commit) is the export watermark."""
+    __tablename__ = 'change_log'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)  # user, session, snapshot, response
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Commit order; NULL until app.services.changes.sequence_changes numbers the row
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), unique=True)
+    
+    def __repr__(self):
+        return f'<ChangeLog {self.id} {self.op} {self.entity}:{self.entity_id}>'
@@ -0,0 +1,13 @@
+from datetime import datetime
+from app import db
+
+class DataVersion(db.Model):
+    """Monotonic counter bumped on every write that can change admin statistics."""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
@@ -0,0 +1,55 @@
+from datetime import datetime
+from app import db
+import json
+
+class ExportJob(db.Model):
+    """A background export and its cached artifact (see app.services.export_jobs)."""
+    __tablename__ = 'export_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    format = db.Column(db.String(10), nullable=False)  # csv, xlsx, parquet
+    filters_json = db.Column(db.Text)  # JSON: {frente, department, role}
+    data_version = db.Column(db.Integer, nullable=False)
+    cache_key = db.Column(db.String(64), nullable=False, index=True)  # sha256(format, filters, data_version)
+    
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    rows_total = db.Column(db.Integer)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    artifact_path = db.Column(db.String(500))
+    artifact_size = db.Column(db.BigInteger)
+    error = db.Column(db.Text)
+    requested_by = db.Column(db.String(255))
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def filters(self):
+        if self.filters_json:
+            return json.loads(self.filters_json)
+        return {}
+    
+    @filters.setter
+    def filters(self, value):
+        self.filters_json = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'format': self.format,
+            'filters': self.filters,
+            'data_version': self.data_version,
+            'status': self.status,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'progress': round(self.rows_done / self.rows_total, 3) if self.rows_total else (1.0 if self.status == 'done' else 0.0),
+            'artifact_size': self.artifact_size,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.format} {self.status}>'
@@ -16,6 +16,8 @@ class Item(db.Model):
     # IRT parameters (only for legacy adaptive questions)
     difficulty_b = db.Column(db.Float, default=1.0)
     discrimination_a = db.Column(db.Float, default=0.5)
+    # False for generated items: their parameters are guesses until calibrate-items fits them
+    calibrated = db.Column(db.Boolean, default=True, nullable=False, server_default=db.true())
     
     # Question content
     choices_json = db.Column(db.Text)
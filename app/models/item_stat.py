@@ -0,0 +1,85 @@
+from datetime import datetime
+from app import db
+import json
+
+class ItemStat(db.Model):
+    """Running response statistics of one item (see app.services.item_stats)."""
+    __tablename__ = 'item_stats'
+    
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), primary_key=True)
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # matrix_points: count, Welford running mean and sum of squared deviations
+    points_count = db.Column(db.Integer, nullable=False, default=0)
+    points_mean = db.Column(db.Float, nullable=False, default=0.0)
+    points_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    
+    latency_count = db.Column(db.Integer, nullable=False, default=0)
+    latency_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    choice_counts_json = db.Column(db.Text)  # JSON: {choice letter: count}, choice items only
+    points_counts_json = db.Column(db.Text)  # JSON: {matrix_points: count}
+    latency_histogram_json = db.Column(db.Text)  # JSON: [count per LATENCY_BUCKETS_MS bucket]
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    item = db.relationship('Item')
+    
+    @property
+    def totals(self):
+        """All counters as a plain dict (see app.services.item_stats.add_response)."""
+        return {
+            'responses': self.response_count or 0,
+            'points_count': self.points_count or 0,
+            'points_mean': self.points_mean or 0.0,
+            'points_m2': self.points_m2 or 0.0,
+            'latency_count': self.latency_count or 0,
+            'latency_sum': self.latency_sum or 0,
+            'choices': self.choice_counts,
+            'points': self.points_counts,
+            'latency_histogram': self.latency_histogram
+        }
+    
+    @totals.setter
+    def totals(self, value):
+        self.response_count = value['responses']
+        self.points_count = value['points_count']
+        self.points_mean = value['points_mean']
+        self.points_m2 = value['points_m2']
+        self.latency_count = value['latency_count']
+        self.latency_sum = value['latency_sum']
+        self.choice_counts = value['choices']
+        self.points_counts = value['points']
+        self.latency_histogram = value['latency_histogram']
+    
+    @property
+    def choice_counts(self):
+        if self.choice_counts_json:
+            return json.loads(self.choice_counts_json)
+        return {}
+    
+    @choice_counts.setter
+    def choice_counts(self, value):
+        self.choice_counts_json = json.dumps(value, ensure_ascii=False)
+    
+    @property
+    def points_counts(self):
+        if self.points_counts_json:
+            return json.loads(self.points_counts_json)
+        return {}
+    
+    @points_counts.setter
+    def points_counts(self, value):
+        self.points_counts_json = json.dumps(value, ensure_ascii=False)
+    
+    @property
+    def latency_histogram(self):
+        if self.latency_histogram_json:
+            return json.loads(self.latency_histogram_json)
+        return []
+    
+    @latency_histogram.setter
+    def latency_histogram(self, value):
+        self.latency_histogram_json = json.dumps(value)
+    
+    def __repr__(self):
+        return f'<ItemStat item={self.item_id}: {self.response_count}>'
@@ -1,8 +1,13 @@
+import json
 from datetime import datetime
 from app import db
 
 class Session(db.Model):
     __tablename__ = 'sessions'
+    # Latest completed session per user (admin users listing)
+    __table_args__ = (
+        db.Index('ix_sessions_status_user_ended', 'status', 'user_id', 'ended_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -11,11 +16,23 @@ class Session(db.Model):
     status = db.Column(db.String(20), default='active')
     time_spent_s = db.Column(db.Integer, default=0)
     initial_response = db.Column(db.Text)
+    # Grid posterior per competency as of the last scored response (AgentScorer)
+    posterior_json = db.Column(db.Text)
     
     user = db.relationship('User', back_populates='sessions')
     responses = db.relationship('Response', back_populates='session', lazy='dynamic')
     snapshots = db.relationship('ProficiencySnapshot', back_populates='session', lazy='dynamic')
     recommendations = db.relationship('Recommendation', back_populates='session', lazy='dynamic')
     
+    @property
+    def posterior(self):
+        if self.posterior_json:
+            return json.loads(self.posterior_json)
+        return {}
+    
+    @posterior.setter
+    def posterior(self, value):
+        self.posterior_json = json.dumps(value) if value else None
+    
     def __repr__(self):
         return f'<Session {self.id} - {self.status}>'
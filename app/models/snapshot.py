@@ -26,6 +26,7 @@ class ProficiencySnapshot(db.Model):
     ci_high = db.Column(db.Float)
     
     session = db.relationship('Session', back_populates='snapshots')
+    block_score_rows = db.relationship('SnapshotBlockScore', back_populates='snapshot', cascade='all, delete-orphan')
     
     @property
     def block_scores(self):
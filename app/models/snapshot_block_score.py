@@ -0,0 +1,40 @@
+from app import db
+
+class SnapshotBlockScore(db.Model):
+    """Per-block result of a matrix snapshot (normalized block_scores_json) for SQL aggregation."""
+    __tablename__ = 'snapshot_block_scores'
+    # The unique (snapshot_id, block) index also serves lookups by snapshot
+    __table_args__ = (
+        db.UniqueConstraint('snapshot_id', 'block', name='uq_snapshot_block_scores_snapshot_block'),
+        db.Index('ix_snapshot_block_scores_block_score', 'block', 'score'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('proficiency_snapshots.id'), nullable=False)
+    block = db.Column(db.String(100), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Integer)
+    
+    snapshot = db.relationship('ProficiencySnapshot', back_populates='block_score_rows')
+    
+    @staticmethod
+    def values_for(block_scores):
+        """Column values for a {block: score} dict; max_score comes from BLOCKS (4 points per question)."""
+        from app.core.blocks_config import BLOCKS
+        
+        return [
+            {
+                'block': block,
+                'score': int(score),
+                'max_score': BLOCKS[block]['question_count'] * 4 if block in BLOCKS else None
+            }
+            for block, score in (block_scores or {}).items()
+        ]
+    
+    @staticmethod
+    def rows_for(block_scores):
+        """Build (unsaved) rows from a {block: score} dict."""
+        return [SnapshotBlockScore(**values) for values in SnapshotBlockScore.values_for(block_scores)]
+    
+    def __repr__(self):
+        return f'<SnapshotBlockScore {self.snapshot_id} {self.block}: {self.score}>'
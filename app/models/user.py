@@ -1,12 +1,27 @@
 from datetime import datetime
+from sqlalchemy.orm import validates
 from app import db
 
+FRENTE_MAPPING = {
+    'oaz.co': 'SOUQ',
+    'thesaint.com.br': 'THESAINT'
+}
+OTHER_FRENTE = 'Outro'
+
+def frente_for_email(email):
+    """Frente (business unit) of an email, from its domain."""
+    if not email:
+        return None
+    domain = email.split('@')[-1].lower()
+    return FRENTE_MAPPING.get(domain, OTHER_FRENTE)
+
 class User(db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255))
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    frente = db.Column(db.String(50), index=True)  # derived from the email domain, see frente_for_email
     department = db.Column(db.String(100))
     role = db.Column(db.String(100))
     consent_ts = db.Column(db.DateTime)
@@ -15,5 +30,10 @@ class User(db.Model):
     sessions = db.relationship('Session', back_populates='user', lazy='dynamic')
     recommendations = db.relationship('Recommendation', back_populates='user', lazy='dynamic')
     
+    @validates('email')
+    def _derive_frente(self, key, email):
+        self.frente = frente_for_email(email)
+        return email
+    
     def __repr__(self):
         return f'<User {self.email}>'
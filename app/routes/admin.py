@@ -1,15 +1,26 @@
-from flask import Blueprint, request, jsonify, render_template, send_file, session as flask_session, redirect, url_for
-from app.models import User, Session, Item, Response, ProficiencySnapshot
+from flask import Blueprint, request, jsonify, render_template, send_file, session as flask_session, redirect, url_for, stream_with_context, current_app
+from app.models import User, Session, Item, ItemStat, ExportJob, Response, ProficiencySnapshot, SnapshotBlockScore
 from app.agents.content_qa import AgentContentQA
-from app.services.exporter import export_to_csv, export_to_xlsx
-from app.services.analytics import get_global_stats, get_frente_stats, get_department_stats, get_role_stats, get_complete_dashboard_data
+from app.services.exporter import PARQUET_AVAILABLE, XLSX_MIMETYPE, export_filename, export_to_parquet, export_to_xlsx, stream_csv, stream_responses_csv, export_responses_to_parquet
+from app.services.analytics import get_global_stats, get_frente_stats, get_department_stats, get_role_stats, get_complete_dashboard_data, get_block_heatmap, apply_snapshots_to_rollups
 from app.services.logger import admin_logger, export_logger
+from app.services.cache import bump_data_version, versioned_json_cache
+from app.services import user_listing
+from app.services.whatif import get_snapshot_frame
+from app.services import activity
+from app.services.activity import remove_user_activity
+from app.services import item_stats
+from app.services import changes
+from app.services import export_jobs
+from app.services.tracing import get_trace_buffer
 from app.core.utils import log_audit
+from app.core.item_bank import invalidate_item_bank_index
 from app.core.scoring import IRTScorer
 from app import db
 from sqlalchemy import func
 import json
 import os
+from datetime import datetime, timedelta
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -88,6 +99,7 @@ def dashboard():
 
 @bp.route('/overview', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def overview():
     """Get overview metrics for dashboard (matrix-based)."""
     admin_logger.event_start('overview_metrics_load')
@@ -128,80 +140,19 @@ def overview():
 
 @bp.route('/heatmap', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def heatmap():
     """Get block heatmap data (matrix-based)."""
     admin_logger.event_start('heatmap_data_load')
-    from app.core.blocks_config import BLOCKS
-    
     group_by = request.args.get('group_by', 'all')
     admin_logger.event_info('heatmap_data_load', {'group_by': group_by})
     
-    if group_by == 'all':
-        # Get average scores per block across all users
-        block_stats = {}
-        
-        for block_name in BLOCKS.keys():
-            # Get all snapshots and calculate average score for this block
-            snapshots = ProficiencySnapshot.query.all()
-            block_scores = []
-            
-            for snapshot in snapshots:
-                if snapshot.block_scores and block_name in snapshot.block_scores:
-                    block_scores.append(snapshot.block_scores[block_name])
-            
-            if block_scores:
-                avg_score = sum(block_scores) / len(block_scores)
-                block_stats[block_name] = {
-                    'avg_score': round(avg_score, 1),
-                    'count': len(block_scores)
-                }
-            else:
-                block_stats[block_name] = {
-                    'avg_score': 0,
-                    'count': 0
-                }
-        
-        admin_logger.event_success('heatmap_data_load', {'group_by': 'all'})
-        admin_logger.event_end('heatmap_data_load')
-        return jsonify(block_stats)
-    
-    elif group_by == 'department':
-        # Get scores grouped by department
-        departments = db.session.query(User.department).distinct().all()
-        department_data = {}
-        
-        for (dept,) in departments:
-            if not dept:
-                continue
-            department_data[dept] = {}
-            
-            user_ids = [u.id for u in User.query.filter_by(department=dept).all()]
-            session_ids = [s.id for s in Session.query.filter(
-                Session.user_id.in_(user_ids),
-                Session.status == 'completed'
-            ).all()]
-            
-            snapshots = ProficiencySnapshot.query.filter(
-                ProficiencySnapshot.session_id.in_(session_ids)
-            ).all()
-            
-            for block_name in BLOCKS.keys():
-                block_scores = []
-                for snapshot in snapshots:
-                    if snapshot.block_scores and block_name in snapshot.block_scores:
-                        block_scores.append(snapshot.block_scores[block_name])
-                
-                if block_scores:
-                    department_data[dept][block_name] = round(sum(block_scores) / len(block_scores), 1)
-                else:
-                    department_data[dept][block_name] = 0
-        
-        admin_logger.event_success('heatmap_data_load', {'group_by': 'department'})
-        admin_logger.event_end('heatmap_data_load')
-        return jsonify(department_data)
+    heatmap_data = get_block_heatmap(group_by)
     
+    if heatmap_data:
+        admin_logger.event_success('heatmap_data_load', {'group_by': group_by})
     admin_logger.event_end('heatmap_data_load')
-    return jsonify({})
+    return jsonify(heatmap_data)
 
 @bp.route('/users', methods=['GET'])
 @require_admin
@@ -215,63 +166,54 @@ def users_list():
 @bp.route('/users/data', methods=['GET'])
 @require_admin
 def users_data():
-    """Get list of all users with their scores (matrix-based)."""
+    """
+    One page of users with their latest completed result (matrix-based).
+    
+    Query args: department, role, frente, level, date_from, date_to
+    (YYYY-MM-DD, date_to inclusive), q, sort (score_desc, score_asc, name,
+    date), limit and cursor (next_cursor of the previous page). The first
+    page also carries summary totals and the filter facets.
+    """
     admin_logger.event_start('users_data_load')
-    users = User.query.all()
-    admin_logger.event_info('users_data_load', {'total_users': len(users)})
-    
-    users_list = []
-    for user in users:
-        # Get the most recent completed session
-        session = Session.query.filter_by(
-            user_id=user.id, 
-            status='completed'
-        ).order_by(Session.ended_at.desc()).first()
-        
-        if session:
-            snapshot = ProficiencySnapshot.query.filter_by(session_id=session.id).first()
-            
-            if snapshot:
-                users_list.append({
-                    'id': user.id,
-                    'name': user.name,
-                    'email': user.email,
-                    'department': user.department or 'N/A',
-                    'role': user.role or 'N/A',
-                    'raw_score': snapshot.raw_score,
-                    'maturity_level': snapshot.maturity_level or 'N/A',
-                    'completed_at': session.ended_at.isoformat() if session.ended_at else None,
-                    'time_spent_s': session.time_spent_s
-                })
-            else:
-                users_list.append({
-                    'id': user.id,
-                    'name': user.name,
-                    'email': user.email,
-                    'department': user.department or 'N/A',
-                    'role': user.role or 'N/A',
-                    'raw_score': None,
-                    'maturity_level': 'Sem dados',
-                    'completed_at': session.ended_at.isoformat() if session.ended_at else None,
-                    'time_spent_s': session.time_spent_s
-                })
-        else:
-            # User registered but hasn't completed assessment
-            users_list.append({
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'department': user.department or 'N/A',
-                'role': user.role or 'N/A',
-                'raw_score': None,
-                'maturity_level': 'Pendente',
-                'completed_at': None,
-                'time_spent_s': None
-            })
     
-    admin_logger.event_success('users_data_load', {'count': len(users_list)})
+    try:
+        filters = {
+            'department': request.args.get('department'),
+            'role': request.args.get('role'),
+            'frente': request.args.get('frente'),
+            'level': request.args.get('level'),
+            'q': request.args.get('q', '').strip(),
+            'date_from': _parse_date_arg('date_from'),
+            'date_to': _parse_date_arg('date_to', end_of_day=True)
+        }
+        sort = request.args.get('sort', 'score_desc')
+        cursor = request.args.get('cursor')
+        page = user_listing.list_users(
+            filters,
+            sort=sort,
+            cursor=cursor,
+            limit=request.args.get('limit', user_listing.DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        admin_logger.event_error('users_data_load', details={'reason': 'invalid_arguments', 'error': str(e)})
+        admin_logger.event_end('users_data_load')
+        return jsonify({'error': 'Parâmetros inválidos', 'details': str(e)}), 400
+    
+    if not cursor:
+        page['summary'] = user_listing.summarize_users(filters)
+        page['facets'] = user_listing.user_facets()
+    
+    admin_logger.event_success('users_data_load', {'count': len(page['users']), 'sort': sort})
     admin_logger.event_end('users_data_load')
-    return jsonify(users_list)
+    return jsonify(page)
+
+def _parse_date_arg(name, end_of_day=False):
+    """YYYY-MM-DD query arg -> datetime; end_of_day gives the next midnight (exclusive bound)."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.strptime(value, '%Y-%m-%d')
+    return parsed + timedelta(days=1) if end_of_day else parsed
 
 @bp.route('/users/<int:user_id>', methods=['DELETE'])
 @require_admin
@@ -285,13 +227,33 @@ def delete_user(user_id):
     
     sessions = Session.query.filter_by(user_id=user_id).all()
     
+    completed_snapshots = ProficiencySnapshot.query.join(Session).filter(
+        Session.user_id == user_id,
+        Session.status == 'completed'
+    ).all()
+    apply_snapshots_to_rollups(user, completed_snapshots, sign=-1)
+    remove_user_activity(user, sessions)
+    item_stats.remove_session_responses([sess.id for sess in sessions])
+    
+    session_ids = [sess.id for sess in sessions]
+    changes.record_deletions('response', [
+        response_id for (response_id,) in db.session.query(Response.id).filter(Response.session_id.in_(session_ids))
+    ])
+    changes.record_deletions('snapshot', [
+        snapshot_id for (snapshot_id,) in db.session.query(ProficiencySnapshot.id).filter(ProficiencySnapshot.session_id.in_(session_ids))
+    ])
+    changes.record_deletions('session', session_ids)
+    
     for sess in sessions:
         Response.query.filter_by(session_id=sess.id).delete()
+        snapshot_ids = db.session.query(ProficiencySnapshot.id).filter_by(session_id=sess.id)
+        SnapshotBlockScore.query.filter(SnapshotBlockScore.snapshot_id.in_(snapshot_ids)).delete(synchronize_session=False)
         ProficiencySnapshot.query.filter_by(session_id=sess.id).delete()
     
     Session.query.filter_by(user_id=user_id).delete()
     
     db.session.delete(user)
+    bump_data_version()
     db.session.commit()
     
     log_audit(
@@ -355,12 +317,12 @@ def user_detail(user_id):
 @bp.route('/items', methods=['GET'])
 @require_admin
 def list_items():
-    """List all assessment items."""
+    """List all assessment items with their running response statistics."""
     admin_logger.event_start('list_items')
-    items = Item.query.all()
+    items = db.session.query(Item, ItemStat).outerjoin(ItemStat, ItemStat.item_id == Item.id).all()
     
     items_data = []
-    for item in items:
+    for item, stat in items:
         items_data.append({
             'id': item.id,
             'stem': item.stem[:100] + '...' if len(item.stem) > 100 else item.stem,
@@ -369,7 +331,8 @@ def list_items():
             'difficulty_b': item.difficulty_b,
             'discrimination_a': item.discrimination_a,
             'active': item.active,
-            'tags': item.tags
+            'tags': item.tags,
+            'stats': item_stats.stats_from_totals(stat.totals if stat else item_stats.empty_totals())
         })
     
     admin_logger.event_success('list_items', {'count': len(items_data)})
@@ -413,6 +376,8 @@ def create_item():
         item.rubric = data['rubric']
     
     db.session.add(item)
+    bump_data_version()
+    invalidate_item_bank_index()
     db.session.commit()
     
     log_audit(
@@ -471,6 +436,8 @@ def update_item(item_id):
     if 'rubric' in data:
         item.rubric = data['rubric']
     
+    bump_data_version()
+    invalidate_item_bank_index()
     db.session.commit()
     
     log_audit(
@@ -494,6 +461,8 @@ def delete_item(item_id):
     item = Item.query.get_or_404(item_id)
     
     item.active = False
+    bump_data_version()
+    invalidate_item_bank_index()
     db.session.commit()
     
     log_audit(
@@ -510,7 +479,7 @@ def delete_item(item_id):
 @bp.route('/export.csv', methods=['GET'])
 @require_admin
 def export_csv():
-    """Export assessment results to CSV with optional filters."""
+    """Stream assessment results as CSV with optional filters."""
     from flask import Response
     
     export_logger.event_start('export_csv')
@@ -520,21 +489,7 @@ def export_csv():
     role = request.args.get('role')
     
     export_logger.event_info('export_csv', {'frente': frente, 'department': department, 'role': role})
-    
-    filepath = export_to_csv(frente=frente, department=department, role=role)
-    
-    filter_parts = []
-    if frente:
-        filter_parts.append(frente.lower())
-    if department:
-        filter_parts.append(department.lower().replace(' ', '_'))
-    if role:
-        filter_parts.append(role.lower().replace(' ', '_'))
-    
-    filename = 'oaz_profiler'
-    if filter_parts:
-        filename += '_' + '_'.join(filter_parts)
-    filename += '.csv'
+    filename = export_filename('csv', frente, department, role)
     
     log_audit(
         actor=flask_session.get('admin_username', 'admin'),
@@ -543,21 +498,20 @@ def export_csv():
         payload={'frente': frente, 'department': department, 'role': role}
     )
     
-    with open(filepath, 'rb') as f:
-        csv_content = f.read()
+    def generate():
+        stats = {}
+        yield from stream_csv(frente=frente, department=department, role=role, stats=stats)
+        export_logger.event_success('export_csv', {'filename': filename, 'rows': stats.get('rows')})
+        export_logger.event_end('export_csv')
     
-    response = Response(
-        csv_content,
+    return Response(
+        stream_with_context(generate()),
         mimetype='text/csv; charset=utf-8',
         headers={
             'Content-Disposition': f'attachment; filename="{filename}"',
-            'Content-Length': str(len(csv_content)),
             'Cache-Control': 'no-cache, no-store, must-revalidate'
         }
     )
-    export_logger.event_success('export_csv', {'filename': filename, 'size': len(csv_content)})
-    export_logger.event_end('export_csv')
-    return response
 
 @bp.route('/export.xlsx', methods=['GET'])
 @require_admin
@@ -571,20 +525,12 @@ def export_xlsx():
     
     export_logger.event_info('export_xlsx', {'frente': frente, 'department': department, 'role': role})
     
-    filepath = export_to_xlsx(frente=frente, department=department, role=role)
-    
-    filter_parts = []
-    if frente:
-        filter_parts.append(frente.lower())
-    if department:
-        filter_parts.append(department.lower().replace(' ', '_'))
-    if role:
-        filter_parts.append(role.lower().replace(' ', '_'))
-    
-    filename = 'oaz_profiler'
-    if filter_parts:
-        filename += '_' + '_'.join(filter_parts)
-    filename += '.xlsx'
+    cached = export_jobs.find_cached_job('xlsx', {'frente': frente, 'department': department, 'role': role})
+    if cached is not None and cached.status == 'done':
+        output = cached.artifact_path
+    else:
+        output = export_to_xlsx(frente=frente, department=department, role=role)
+    filename = export_filename('xlsx', frente, department, role)
     
     log_audit(
         actor=flask_session.get('admin_username', 'admin'),
@@ -595,10 +541,245 @@ def export_xlsx():
     
     export_logger.event_success('export_xlsx', {'filename': filename})
     export_logger.event_end('export_xlsx')
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    return send_file(output, as_attachment=True, download_name=filename, mimetype=XLSX_MIMETYPE)
+
+@bp.route('/export.parquet', methods=['GET'])
+@require_admin
+def export_parquet():
+    """Export assessment results as typed Parquet (for BI loads) with optional filters."""
+    export_logger.event_start('export_parquet')
+    
+    if not PARQUET_AVAILABLE:
+        export_logger.event_error('export_parquet', details={'reason': 'pyarrow_not_installed'})
+        export_logger.event_end('export_parquet')
+        return jsonify({'error': 'Exportação Parquet indisponível', 'details': 'pyarrow não está instalado'}), 501
+    
+    frente = request.args.get('frente')
+    department = request.args.get('department')
+    role = request.args.get('role')
+    
+    export_logger.event_info('export_parquet', {'frente': frente, 'department': department, 'role': role})
+    
+    cached = export_jobs.find_cached_job('parquet', {'frente': frente, 'department': department, 'role': role})
+    if cached is not None and cached.status == 'done':
+        output = cached.artifact_path
+    else:
+        output = export_to_parquet(frente=frente, department=department, role=role)
+    filename = export_filename('parquet', frente, department, role)
+    
+    log_audit(
+        actor=flask_session.get('admin_username', 'admin'),
+        action='export_parquet',
+        target='data',
+        payload={'frente': frente, 'department': department, 'role': role}
+    )
+    
+    export_logger.event_success('export_parquet', {'filename': filename})
+    export_logger.event_end('export_parquet')
+    return send_file(output, as_attachment=True, download_name=filename, mimetype='application/vnd.apache.parquet')
+
+@bp.route('/export/responses.csv', methods=['GET'])
+@require_admin
+def export_responses_csv():
+    """Stream every response (item, chosen letter, points, latency) as CSV with optional filters."""
+    from flask import Response
+    
+    export_logger.event_start('export_responses_csv')
+    
+    frente = request.args.get('frente')
+    department = request.args.get('department')
+    role = request.args.get('role')
+    
+    export_logger.event_info('export_responses_csv', {'frente': frente, 'department': department, 'role': role})
+    filename = export_filename('csv', frente, department, role, prefix='oaz_profiler_respostas')
+    
+    log_audit(
+        actor=flask_session.get('admin_username', 'admin'),
+        action='export_responses_csv',
+        target='data',
+        payload={'frente': frente, 'department': department, 'role': role}
+    )
+    
+    def generate():
+        stats = {}
+        yield from stream_responses_csv(frente=frente, department=department, role=role, stats=stats)
+        export_logger.event_success('export_responses_csv', {'filename': filename, 'rows': stats.get('rows')})
+        export_logger.event_end('export_responses_csv')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv; charset=utf-8',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-cache, no-store, must-revalidate'
+        }
+    )
+
+@bp.route('/export/responses.parquet', methods=['GET'])
+@require_admin
+def export_responses_parquet():
+    """Export every response as typed Parquet with optional filters."""
+    export_logger.event_start('export_responses_parquet')
+    
+    if not PARQUET_AVAILABLE:
+        export_logger.event_error('export_responses_parquet', details={'reason': 'pyarrow_not_installed'})
+        export_logger.event_end('export_responses_parquet')
+        return jsonify({'error': 'Exportação Parquet indisponível', 'details': 'pyarrow não está instalado'}), 501
+    
+    frente = request.args.get('frente')
+    department = request.args.get('department')
+    role = request.args.get('role')
+    
+    export_logger.event_info('export_responses_parquet', {'frente': frente, 'department': department, 'role': role})
+    
+    output = export_responses_to_parquet(frente=frente, department=department, role=role)
+    filename = export_filename('parquet', frente, department, role, prefix='oaz_profiler_respostas')
+    
+    log_audit(
+        actor=flask_session.get('admin_username', 'admin'),
+        action='export_responses_parquet',
+        target='data',
+        payload={'frente': frente, 'department': department, 'role': role}
+    )
+    
+    export_logger.event_success('export_responses_parquet', {'filename': filename})
+    export_logger.event_end('export_responses_parquet')
+    return send_file(output, as_attachment=True, download_name=filename, mimetype='application/vnd.apache.parquet')
+
+@bp.route('/changes', methods=['GET'])
+@require_admin
+def export_changes():
+    """
+    Incremental export: NDJSON of the users, sessions, snapshots and
+    responses changed (or deleted, as tombstones) after the `since` change
+    sequence number. The X-Change-Watermark header is the `since` of the
+    next call.
+    """
+    from flask import Response
+    
+    export_logger.event_start('export_changes')
+    
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        if since < 0 or (limit is not None and limit < 1):
+            raise ValueError('since must be >= 0 and limit >= 1')
+    except ValueError as e:
+        export_logger.event_error('export_changes', details={'reason': 'invalid_arguments', 'error': str(e)})
+        export_logger.event_end('export_changes')
+        return jsonify({'error': 'Parâmetros inválidos', 'details': str(e)}), 400
+    
+    upper = changes.change_watermark(since, limit)
+    export_logger.event_info('export_changes', {'since': since, 'watermark': upper})
+    
+    def generate():
+        count = 0
+        for change in changes.iter_changes(since, upper):
+            count += 1
+            yield json.dumps(change, ensure_ascii=False) + '\n'
+        export_logger.event_success('export_changes', {'since': since, 'watermark': upper, 'changes': count})
+        export_logger.event_end('export_changes')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Change-Watermark': str(upper), 'Cache-Control': 'no-store'}
+    )
+
+@bp.route('/exports', methods=['POST'])
+@require_admin
+def create_export_job():
+    """
+    Start a background export ({format, frente, department, role}). Returns
+    202 with the new job, or 200 with the job that already holds (or is
+    building) the same export for the current data version.
+    """
+    export_logger.event_start('export_job_submit')
+    
+    data = request.get_json(silent=True) or {}
+    export_format = data.get('format', 'csv')
+    filters = {key: data.get(key) for key in export_jobs.FILTER_KEYS}
+    actor = flask_session.get('admin_username', 'admin')
+    
+    try:
+        job, created = export_jobs.submit_export(export_format, filters, requested_by=actor)
+    except ValueError as e:
+        export_logger.event_error('export_job_submit', details={'reason': 'invalid_arguments', 'error': str(e)})
+        export_logger.event_end('export_job_submit')
+        return jsonify({'error': 'Parâmetros inválidos', 'details': str(e)}), 400
+    
+    log_audit(
+        actor=actor,
+        action='export_job',
+        target='data',
+        payload={'job_id': job.id, 'format': export_format, 'filters': job.filters, 'cached': not created}
+    )
+    
+    export_logger.event_success('export_job_submit', {'job_id': job.id, 'created': created})
+    export_logger.event_end('export_job_submit')
+    return jsonify(export_jobs.job_status(job)), 202 if created else 200
+
+@bp.route('/exports/<job_id>', methods=['GET'])
+@require_admin
+def export_job_status(job_id):
+    """Status and progress of a background export."""
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Exportação não encontrada'}), 404
+    return jsonify(export_jobs.job_status(job))
+
+@bp.route('/exports/<job_id>/download', methods=['GET'])
+@require_admin
+def download_export_job(job_id):
+    """Download the artifact of a finished background export."""
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Exportação não encontrada'}), 404
+    if job.status != 'done':
+        return jsonify({'error': 'Exportação não concluída', 'status': job.status}), 409
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        return jsonify({'error': 'Arquivo da exportação expirou'}), 410
+    
+    filename = export_filename(job.format, **job.filters)
+    return send_file(job.artifact_path, as_attachment=True, download_name=filename, mimetype=export_jobs.MIMETYPES[job.format])
+
+@bp.route('/traces', methods=['GET'])
+@require_admin
+def list_traces():
+    """
+    Most recent request traces of this worker, newest first. Query args:
+    min_ms (slowest requests only), path (substring of "METHOD /path"),
+    limit (default 50).
+    """
+    try:
+        min_ms = float(request.args.get('min_ms', 0))
+        limit = max(1, int(request.args.get('limit', 50)))
+    except ValueError as e:
+        return jsonify({'error': 'Parâmetros inválidos', 'details': str(e)}), 400
+    path = request.args.get('path')
+    
+    traces = []
+    for trace in get_trace_buffer().list():
+        summary = trace.summary()
+        if summary['duration_ms'] < min_ms or (path and path not in summary['name']):
+            continue
+        traces.append(summary)
+        if len(traces) >= limit:
+            break
+    return jsonify({'traces': traces})
+
+@bp.route('/traces/<trace_id>', methods=['GET'])
+@require_admin
+def get_trace(trace_id):
+    """Span tree of one recorded request: durations, attributes and DB time per span."""
+    trace = get_trace_buffer().get(trace_id)
+    if trace is None:
+        return jsonify({'error': 'Trace não encontrado'}), 404
+    return jsonify(trace.to_dict())
 
 @bp.route('/stats/global', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def stats_global():
     """Get global OAZ statistics."""
     admin_logger.event_start('stats_global_load')
@@ -609,6 +790,7 @@ def stats_global():
 
 @bp.route('/stats/frentes', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def stats_frentes():
     """Get statistics by frente (SOUQ, THESAINT)."""
     admin_logger.event_start('stats_frentes_load')
@@ -619,6 +801,7 @@ def stats_frentes():
 
 @bp.route('/stats/departments', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def stats_departments():
     """Get statistics by department."""
     admin_logger.event_start('stats_departments_load')
@@ -629,6 +812,7 @@ def stats_departments():
 
 @bp.route('/stats/roles', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def stats_roles():
     """Get statistics by role/cargo."""
     admin_logger.event_start('stats_roles_load')
@@ -639,6 +823,7 @@ def stats_roles():
 
 @bp.route('/stats/all', methods=['GET'])
 @require_admin
+@versioned_json_cache
 def stats_all():
     """Get complete dashboard statistics."""
     admin_logger.event_start('stats_all_load')
@@ -647,6 +832,82 @@ def stats_all():
     admin_logger.event_end('stats_all_load')
     return jsonify(result)
 
+def _default_activity_end():
+    """Cache key part of /activity: without `end` the window moves with the current bucket."""
+    if request.args.get('end'):
+        return None
+    try:
+        return activity.current_bucket_end(request.args.get('granularity', 'day'))
+    except ValueError:
+        return None
+
+@bp.route('/activity', methods=['GET'])
+@require_admin
+@versioned_json_cache(vary=_default_activity_end)
+def activity_series():
+    """
+    Time series of sessions started/completed/abandoned, time spent and
+    score distribution per bucket.
+    
+    Query args: granularity (hour, day), start and end (ISO dates or
+    datetimes, UTC, end exclusive; default: the 30 days up to the end of
+    the current bucket), dimension
+    (global, frente, department) and optional group.
+    """
+    admin_logger.event_start('activity_series_load')
+    granularity = request.args.get('granularity', 'day')
+    dimension = request.args.get('dimension', 'global')
+    
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else activity.current_bucket_end(granularity)
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=30)
+        series = activity.get_activity_series(granularity, start, end, dimension, request.args.get('group'))
+        quantiles = activity.get_activity_quantiles(granularity, start, end, dimension, request.args.get('group'))
+    except ValueError as e:
+        admin_logger.event_error('activity_series_load', details={'reason': 'invalid_arguments', 'error': str(e)})
+        admin_logger.event_end('activity_series_load')
+        return jsonify({'error': 'Parâmetros inválidos', 'details': str(e)}), 400
+    
+    admin_logger.event_success('activity_series_load', {'granularity': granularity, 'dimension': dimension, 'groups': len(series)})
+    admin_logger.event_end('activity_series_load')
+    return jsonify({
+        'granularity': granularity,
+        'dimension': dimension,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': series,
+        'quantiles': quantiles
+    })
+
+@bp.route('/analytics/whatif', methods=['POST'])
+@require_admin
+def analytics_whatif():
+    """
+    Re-classify completed assessments under alternative level thresholds
+    and/or block weights.
+    
+    Body: {"thresholds": {level: min_score}, "weights": {block: weight},
+    "group_by": "department" | "role" | "frente"}; all fields optional.
+    """
+    admin_logger.event_start('analytics_whatif')
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        frame = get_snapshot_frame()
+        result = frame.evaluate(
+            thresholds=data.get('thresholds'),
+            weights=data.get('weights'),
+            group_by=data.get('group_by')
+        )
+    except ValueError as e:
+        admin_logger.event_error('analytics_whatif', details={'reason': 'invalid_scenario', 'error': str(e)})
+        admin_logger.event_end('analytics_whatif')
+        return jsonify({'error': 'Cenário inválido', 'details': str(e)}), 400
+    
+    admin_logger.event_success('analytics_whatif', {'count': result['count'], 'group_by': data.get('group_by')})
+    admin_logger.event_end('analytics_whatif')
+    return jsonify(result)
+
 @bp.route('/frontend-log', methods=['POST'])
 def frontend_log():
     """Receive logs from frontend JavaScript."""
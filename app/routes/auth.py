@@ -5,6 +5,7 @@ from app import db
 from datetime import datetime
 from config import Config
 from app.services.logger import auth_logger
+from app.services.cache import bump_data_version
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -125,6 +126,7 @@ def consent():
         consent_ts=datetime.utcnow()
     )
     db.session.add(user)
+    bump_data_version()
     db.session.commit()
     
     flask_session['user_id'] = user.id
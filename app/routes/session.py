@@ -3,8 +3,9 @@ from app.models import Session, User
 from app.agents.orchestrator_matrix import AgentOrchestratorMatrix
 from app.core.security import sanitize_input
 from app.services.logger import assessment_logger
+from app.services.cache import bump_data_version
+from app.services.activity import record_session_started
 from app import db
-from datetime import datetime
 
 bp = Blueprint('session', __name__, url_prefix='/session')
 
@@ -76,6 +77,9 @@ def start():
     session.status = 'active'
     
     db.session.add(session)
+    db.session.flush()
+    record_session_started(session)
+    bump_data_version()
     db.session.commit()
     
     flask_session['session_id'] = session.id
@@ -117,10 +121,6 @@ def finish():
     
     db.session.refresh(session)
     
-    session.ended_at = datetime.utcnow()
-    session.time_spent_s = int((session.ended_at - session.started_at).total_seconds())
-    db.session.commit()
-    
     flask_session.pop('session_id', None)
     
     assessment_logger.event_success('assessment_finish', {
@@ -0,0 +1,320 @@
+"""
+Time-bucketed session activity rollups (hourly and daily, UTC).
+
+For every bucket and dashboard group (global, frente, department) the
+activity_rollups table keeps sessions started and abandoned (bucketed by
+started_at), sessions completed (bucketed by ended_at), the time spent of
+completed sessions and their raw score / maturity level distribution.
+
+Rows are maintained in the transaction of the event that changes them
+(session start, assessment finish, abandoned-session sweep, user delete),
+locking the touched rows in a fixed order, and can be rebuilt from the
+sessions table with `flask rebuild-activity`. A time series for any range
+is one read over the unique (granularity, dimension, group_key,
+bucket_start) index. Each bucket also keeps quantile sketches of the raw
+score and time spent of the sessions completed in it, which merge into
+percentiles over any range of buckets.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.core.quantiles import QuantileSketch
+from app.models import ActivityRollup, ProficiencySnapshot, Session, User
+from app.services.analytics import LEVEL_NAMES, rollup_keys
+
+GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+ACTIVITY_DIMENSIONS = ('global', 'frente', 'department')
+MAX_SERIES_POINTS = 24 * 93  # about three months of hourly buckets per request
+
+COUNTERS = (
+    'sessions_started', 'sessions_completed', 'sessions_abandoned',
+    'time_spent_sum', 'time_spent_count', 'score_sum', 'score_count'
+)
+# Sketched metric -> (sum counter, count counter) it is derived from
+SKETCHED = {'raw_score': ('score_sum', 'score_count'), 'time_spent_s': ('time_spent_sum', 'time_spent_count')}
+
+def add_to_sketches(sketches, deltas, sign=1):
+    """Add the single-session values in an event's deltas to {metric: QuantileSketch}."""
+    for metric, (sum_counter, count_counter) in SKETCHED.items():
+        if deltas.get(count_counter):
+            sketches[metric].add(deltas[sum_counter], sign)
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def current_bucket_end(granularity: str, now: Optional[datetime] = None) -> datetime:
+    """Exclusive end of the bucket now falls in; the default series end, fixed for the bucket's length."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {tuple(GRANULARITIES)}')
+    return bucket_start(now or datetime.utcnow(), granularity) + GRANULARITIES[granularity]
+
+def activity_keys(frente, department) -> List[tuple]:
+    return [key for key in rollup_keys(frente, department, None) if key[0] in ACTIVITY_DIMENSIONS]
+
+def session_events(session, raw_score=None, maturity_level=None):
+    """
+    (timestamp, counter deltas, maturity level) of everything a session in
+    its current state contributes to the rollups.
+    """
+    events = [(session.started_at, {'sessions_started': 1}, None)]
+    if session.status == 'abandoned':
+        events.append((session.started_at, {'sessions_abandoned': 1}, None))
+    elif session.status == 'completed':
+        deltas = {'sessions_completed': 1}
+        if session.time_spent_s:
+            deltas.update(time_spent_sum=session.time_spent_s, time_spent_count=1)
+        if raw_score is not None:
+            deltas.update(score_sum=raw_score, score_count=1)
+        events.append((session.ended_at or session.started_at, deltas, maturity_level))
+    return events
+
+def _locked_bucket(granularity, start, dimension, group_key):
+    """Fetch a bucket row with SELECT ... FOR UPDATE, creating it if needed."""
+    query = ActivityRollup.query.filter_by(
+        granularity=granularity, bucket_start=start, dimension=dimension, group_key=group_key
+    ).with_for_update().populate_existing()
+    row = query.first()
+    if row is not None:
+        return row
+
+    try:
+        with db.session.begin_nested():
+            row = ActivityRollup(granularity=granularity, bucket_start=start, dimension=dimension, group_key=group_key,
+                                 **{counter: 0 for counter in COUNTERS})
+            db.session.add(row)
+    except IntegrityError:
+        # Created concurrently; lock the existing row instead
+        row = query.one()
+    return row
+
+def _apply(user, events, sign=1):
+    """Apply (timestamp, deltas, level) events of one user's session(s) to every bucket they touch."""
+    changes = defaultdict(lambda: [defaultdict(int), defaultdict(int), defaultdict(QuantileSketch)])
+    for timestamp, deltas, level in events:
+        if timestamp is None:
+            continue
+        for granularity in GRANULARITIES:
+            for dimension, group_key in activity_keys(user.frente, user.department):
+                counters, levels, sketches = changes[(granularity, bucket_start(timestamp, granularity), dimension, group_key)]
+                for counter, value in deltas.items():
+                    counters[counter] += sign * value
+                if level:
+                    levels[level] += sign
+                add_to_sketches(sketches, deltas, sign)
+
+    # Fixed lock order across transactions
+    for key in sorted(changes):
+        counters, levels, sketches = changes[key]
+        row = _locked_bucket(*key)
+        for counter, value in counters.items():
+            setattr(row, counter, (getattr(row, counter) or 0) + value)
+        if levels:
+            level_counts = row.level_counts
+            for level, value in levels.items():
+                level_counts[level] = level_counts.get(level, 0) + value
+                if not level_counts[level]:
+                    del level_counts[level]
+            row.level_counts = level_counts
+        if sketches:
+            merged = row.sketches
+            for metric, sketch in sketches.items():
+                merged[metric].merge(sketch)
+            row.sketches = merged
+
+def record_session_started(session):
+    _apply(session.user, [(session.started_at, {'sessions_started': 1}, None)])
+
+def record_session_completed(session, raw_score=None, maturity_level=None):
+    """Call once status, ended_at and time_spent_s are final, before the commit."""
+    _apply(session.user, session_events(session, raw_score, maturity_level)[1:])
+
+def record_session_abandoned(session):
+    _apply(session.user, [(session.started_at, {'sessions_abandoned': 1}, None)])
+
+def remove_user_activity(user, sessions):
+    """Subtract the contributions of a user's sessions (before deleting them)."""
+    results = {}
+    if sessions:
+        results = {
+            session_id: (raw_score, maturity_level)
+            for session_id, raw_score, maturity_level in db.session.query(
+                ProficiencySnapshot.session_id, ProficiencySnapshot.raw_score, ProficiencySnapshot.maturity_level
+            ).filter(
+                ProficiencySnapshot.session_id.in_([session.id for session in sessions]),
+                ProficiencySnapshot.raw_score.isnot(None)
+            )
+        }
+
+    events = []
+    for session in sessions:
+        events.extend(session_events(session, *results.get(session.id, (None, None))))
+    _apply(user, events, sign=-1)
+
+def sweep_abandoned_sessions(older_than: timedelta, now: Optional[datetime] = None) -> int:
+    """Mark active sessions started before now - older_than as abandoned. Caller commits."""
+    cutoff = (now or datetime.utcnow()) - older_than
+    sessions = Session.query.filter(Session.status == 'active', Session.started_at < cutoff)\
+        .order_by(Session.id).with_for_update().all()
+    for session in sessions:
+        session.status = 'abandoned'
+        record_session_abandoned(session)
+    return len(sessions)
+
+def rebuild_activity_rollups() -> int:
+    """Recompute all buckets from sessions in one streamed pass. Returns the number of rows written."""
+    statement = select(
+        Session.started_at,
+        Session.ended_at,
+        Session.status,
+        Session.time_spent_s,
+        User.frente,
+        User.department,
+        ProficiencySnapshot.raw_score,
+        ProficiencySnapshot.maturity_level
+    ).join(
+        User, Session.user_id == User.id
+    ).outerjoin(
+        ProficiencySnapshot,
+        and_(ProficiencySnapshot.session_id == Session.id, ProficiencySnapshot.raw_score.isnot(None))
+    ).execution_options(yield_per=5000)
+
+    buckets = defaultdict(lambda: ({counter: 0 for counter in COUNTERS}, defaultdict(int), defaultdict(QuantileSketch)))
+    for started_at, ended_at, status, time_spent_s, frente, department, raw_score, maturity_level in db.session.execute(statement):
+        session = SimpleNamespace(started_at=started_at, ended_at=ended_at, status=status, time_spent_s=time_spent_s)
+        keys = activity_keys(frente, department)
+        for timestamp, deltas, level in session_events(session, raw_score, maturity_level):
+            if timestamp is None:
+                continue
+            for granularity in GRANULARITIES:
+                start = bucket_start(timestamp, granularity)
+                for dimension, group_key in keys:
+                    counters, levels, sketches = buckets[(granularity, start, dimension, group_key)]
+                    for counter, value in deltas.items():
+                        counters[counter] += value
+                    if level:
+                        levels[level] += 1
+                    add_to_sketches(sketches, deltas)
+
+    ActivityRollup.query.delete()
+    for (granularity, start, dimension, group_key), (counters, levels, sketches) in buckets.items():
+        row = ActivityRollup(granularity=granularity, bucket_start=start, dimension=dimension,
+                             group_key=group_key, **counters)
+        row.level_counts = dict(levels)
+        if sketches:
+            row.sketches = sketches
+        db.session.add(row)
+    db.session.commit()
+
+    return len(buckets)
+
+def ensure_activity_rollups():
+    """Build the buckets when the table is empty but sessions exist, or when completions predate the sketches."""
+    has_buckets = db.session.query(ActivityRollup.id).first() is not None
+    missing_sketches = db.session.query(ActivityRollup.id).filter(
+        ActivityRollup.sessions_completed > 0, ActivityRollup.sketches_json.is_(None)
+    ).first() is not None
+    if has_buckets and not missing_sketches:
+        return
+    if db.session.query(Session.id).first() is None:
+        return
+    rebuild_activity_rollups()
+
+def _point(start: datetime, row: Optional[ActivityRollup]) -> Dict[str, Any]:
+    if row is None:
+        return {
+            'bucket': start.isoformat(), 'started': 0, 'completed': 0, 'abandoned': 0,
+            'avg_time_spent_s': None, 'avg_score': None,
+            'level_distribution': {level: 0 for level in LEVEL_NAMES}
+        }
+    level_counts = row.level_counts
+    return {
+        'bucket': start.isoformat(),
+        'started': row.sessions_started,
+        'completed': row.sessions_completed,
+        'abandoned': row.sessions_abandoned,
+        'avg_time_spent_s': round(row.time_spent_sum / row.time_spent_count, 1) if row.time_spent_count else None,
+        'avg_score': round(row.score_sum / row.score_count, 1) if row.score_count else None,
+        'level_distribution': {level: level_counts.get(level, 0) for level in LEVEL_NAMES}
+    }
+
+def _bucket_range(granularity, start, end, dimension, group_key):
+    """(first bucket start, number of buckets, query of stored rows) for [start, end)."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {tuple(GRANULARITIES)}')
+    if dimension not in ACTIVITY_DIMENSIONS:
+        raise ValueError(f'dimension must be one of {ACTIVITY_DIMENSIONS}')
+
+    step = GRANULARITIES[granularity]
+    first = bucket_start(start, granularity)
+    if first < start:
+        first += step
+    points = math.ceil((end - first) / step) if end > first else 0
+    if points > MAX_SERIES_POINTS:
+        raise ValueError(f'range too large: {points} buckets (max {MAX_SERIES_POINTS})')
+
+    query = ActivityRollup.query.filter(
+        ActivityRollup.granularity == granularity,
+        ActivityRollup.dimension == dimension,
+        ActivityRollup.bucket_start >= first,
+        ActivityRollup.bucket_start < end
+    )
+    if group_key is not None:
+        query = query.filter(ActivityRollup.group_key == group_key)
+    return first, points, query
+
+def get_activity_series(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    dimension: str = 'global',
+    group_key: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Zero-filled series per group for buckets in [start, end). One indexed
+    range read; group_key restricts the result to one group.
+    """
+    first, points, query = _bucket_range(granularity, start, end, dimension, group_key)
+    step = GRANULARITIES[granularity]
+
+    rows = defaultdict(dict)
+    for row in query.order_by(ActivityRollup.group_key, ActivityRollup.bucket_start):
+        rows[row.group_key][row.bucket_start] = row
+    if group_key is not None:
+        rows.setdefault(group_key, {})
+
+    starts = [first + i * step for i in range(points)]
+    return {
+        key: [_point(bucket, by_start.get(bucket)) for bucket in starts]
+        for key, by_start in rows.items()
+    }
+
+def get_activity_quantiles(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    dimension: str = 'global',
+    group_key: Optional[str] = None
+) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+    """
+    p10/p50/p90 of raw score and time spent per group over the sessions
+    completed in [start, end), merged from the bucket sketches.
+    """
+    _, _, query = _bucket_range(granularity, start, end, dimension, group_key)
+    merged = defaultdict(lambda: defaultdict(QuantileSketch))
+    for row in query.filter(ActivityRollup.sketches_json.isnot(None)):
+        for metric, sketch in row.sketches.items():
+            merged[row.group_key][metric].merge(sketch)
+    if group_key is not None:
+        merged.setdefault(group_key, defaultdict(QuantileSketch))
+
+    return {
+        key: {metric: sketches[metric].quantiles() for metric in SKETCHED}
+        for key, sketches in merged.items()
+    }
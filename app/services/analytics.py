@@ -1,18 +1,74 @@
-from app.models import User, Session, ProficiencySnapshot
+from app.models import User, Session, Response, ProficiencySnapshot, SnapshotBlockScore, AnalyticsRollup
+from app.core.quantiles import QuantileSketch
 from app import db
-from sqlalchemy import func
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
 from collections import defaultdict
+import json
+import math
 
-FRENTE_MAPPING = {
-    'oaz.co': 'SOUQ',
-    'thesaint.com.br': 'THESAINT'
+ROLLUP_REBUILD_BATCH = 5000
+
+HEATMAP_GROUPS = {
+    'all': None,
+    'department': lambda: User.department,
+    'role': lambda: User.role,
+    'frente': lambda: User.frente
 }
 
-def get_frente_from_email(email):
-    if not email:
-        return None
-    domain = email.split('@')[-1].lower()
-    return FRENTE_MAPPING.get(domain, 'Outro')
+def get_block_heatmap(group_by='all'):
+    """
+    Average block score over completed snapshots, overall or per user
+    dimension (department, role, frente).
+    
+    A single GROUP BY over snapshot_block_scores joined to completed sessions
+    and users; no snapshot JSON is decoded.
+    
+    Shapes: 'all' -> {block: {'avg_score', 'count'}};
+    other dimensions -> {group: {block: avg_score}}.
+    """
+    from app.core.blocks_config import BLOCKS
+    
+    if group_by not in HEATMAP_GROUPS:
+        return {}
+    
+    group_columns = [HEATMAP_GROUPS[group_by]()] if HEATMAP_GROUPS[group_by] else []
+    
+    statement = select(
+        *group_columns,
+        SnapshotBlockScore.block,
+        func.avg(SnapshotBlockScore.score),
+        func.count()
+    ).join(
+        ProficiencySnapshot, SnapshotBlockScore.snapshot_id == ProficiencySnapshot.id
+    ).join(
+        Session, ProficiencySnapshot.session_id == Session.id
+    ).where(
+        Session.status == 'completed'
+    ).group_by(*group_columns, SnapshotBlockScore.block)
+    if group_columns:
+        statement = statement.join(User, Session.user_id == User.id)
+    
+    averages = defaultdict(dict)
+    for row in db.session.execute(statement):
+        group = row[0] if group_columns else 'all'
+        averages[group][row[-3]] = (round(float(row[-2]), 1), row[-1])
+    
+    if not group_columns:
+        return {
+            block_name: {
+                'avg_score': averages['all'].get(block_name, (0, 0))[0],
+                'count': averages['all'].get(block_name, (0, 0))[1]
+            }
+            for block_name in BLOCKS
+        }
+    
+    # Every group present among users is listed, including ones without results yet
+    groups = [value for (value,) in db.session.query(group_columns[0]).distinct().all() if value]
+    return {
+        group: {block_name: averages[group].get(block_name, (0, 0))[0] for block_name in BLOCKS}
+        for group in groups
+    }
 
 def get_user_latest_snapshot(user_id):
     session = Session.query.filter_by(
@@ -25,129 +81,273 @@ def get_user_latest_snapshot(user_id):
     
     return ProficiencySnapshot.query.filter_by(session_id=session.id).first()
 
-def get_all_completed_snapshots():
-    completed_sessions = Session.query.filter_by(status='completed').subquery()
-    
-    snapshots = db.session.query(
-        ProficiencySnapshot,
-        User
-    ).join(
-        completed_sessions,
-        ProficiencySnapshot.session_id == completed_sessions.c.id
-    ).join(
-        User,
-        completed_sessions.c.user_id == User.id
-    ).all()
-    
-    return snapshots
+# --- Dashboard rollups -------------------------------------------------------
+#
+# analytics_rollups keeps running totals of completed snapshots per dashboard
+# group, so the stats endpoints read one row per group instead of scanning
+# every snapshot. Rows are updated in the same transaction that completes a
+# session (finalize_assessment) or deletes a user, and can be rebuilt from
+# scratch with `flask rebuild-analytics`.
 
-def compute_aggregated_stats(snapshots_with_users):
-    if not snapshots_with_users:
-        return {
-            'count': 0,
-            'avg_score': 0,
-            'level_distribution': {
-                'Iniciante': 0,
-                'Explorador': 0,
-                'Praticante': 0,
-                'Líder Digital': 0
-            },
-            'block_averages': {}
-        }
-    
-    scores = []
-    level_distribution = defaultdict(int)
-    block_scores_sum = defaultdict(list)
+GLOBAL_GROUP = 'OAZ Global'
+NOT_INFORMED = 'Não informado'
+LEVEL_NAMES = ('Iniciante', 'Explorador', 'Praticante', 'Líder Digital')
+ROLLUP_DIMENSIONS = ('global', 'frente', 'department', 'role')
+# Distributions kept as quantile sketches per rollup: the snapshot's raw
+# score, and the time spent and per-response latencies of its session
+SKETCH_METRICS = ('raw_score', 'time_spent_s', 'latency_ms')
+
+def rollup_keys(frente, department, role):
+    """(dimension, group_key) of every rollup a user's snapshots count towards, in lock order."""
+    return [
+        ('global', GLOBAL_GROUP),
+        ('frente', frente),
+        ('department', department or NOT_INFORMED),
+        ('role', role or NOT_INFORMED)
+    ]
+
+def empty_totals():
+    return {
+        'count': 0, 'score_count': 0, 'score_sum': 0.0, 'score_sq_sum': 0.0, 'levels': {}, 'blocks': {},
+        'sketches': {metric: QuantileSketch() for metric in SKETCH_METRICS}
+    }
+
+def add_to_totals(totals, raw_score, maturity_level, block_scores, sign=1):
+    """Add (sign=1) or remove (sign=-1) one snapshot from a totals dict, in place."""
+    totals['count'] += sign
     
-    for snapshot, user in snapshots_with_users:
-        if snapshot.raw_score is not None:
-            scores.append(snapshot.raw_score)
-        
-        if snapshot.maturity_level:
-            level_distribution[snapshot.maturity_level] += 1
-        
-        if snapshot.block_scores:
-            for block, score in snapshot.block_scores.items():
-                block_scores_sum[block].append(score)
+    if raw_score is not None:
+        totals['score_count'] += sign
+        totals['score_sum'] += sign * raw_score
+        totals['score_sq_sum'] += sign * raw_score * raw_score
+        totals['sketches']['raw_score'].add(raw_score, sign)
     
-    avg_score = sum(scores) / len(scores) if scores else 0
+    if maturity_level:
+        level_count = totals['levels'].get(maturity_level, 0) + sign
+        if level_count:
+            totals['levels'][maturity_level] = level_count
+        else:
+            totals['levels'].pop(maturity_level, None)
     
-    block_averages = {}
-    for block, scores_list in block_scores_sum.items():
-        block_averages[block] = round(sum(scores_list) / len(scores_list), 1) if scores_list else 0
+    for block, score in (block_scores or {}).items():
+        block_sum, block_count = totals['blocks'].get(block, (0, 0))
+        if block_count + sign:
+            totals['blocks'][block] = [block_sum + sign * score, block_count + sign]
+        else:
+            totals['blocks'].pop(block, None)
     
-    level_dist = {
-        'Iniciante': level_distribution.get('Iniciante', 0),
-        'Explorador': level_distribution.get('Explorador', 0),
-        'Praticante': level_distribution.get('Praticante', 0),
-        'Líder Digital': level_distribution.get('Líder Digital', 0)
-    }
+    return totals
+
+def add_session_to_totals(totals, time_spent_s, latencies, sign=1):
+    """Add (sign=1) or remove (sign=-1) the timings of a completed session, in place."""
+    totals['sketches']['time_spent_s'].add(time_spent_s, sign)
+    totals['sketches']['latency_ms'].update(latencies, sign)
+    return totals
+
+def session_latencies(session_ids):
+    """{session_id: [latency_ms, ...]} of the given sessions' responses."""
+    latencies = defaultdict(list)
+    if session_ids:
+        for session_id, latency_ms in db.session.query(Response.session_id, Response.latency_ms).filter(
+            Response.session_id.in_(session_ids),
+            Response.latency_ms.isnot(None)
+        ):
+            latencies[session_id].append(latency_ms)
+    return latencies
+
+def stats_from_totals(totals, label):
+    """Dashboard stats dict (count, averages, level distribution) from rollup totals."""
+    score_count = totals['score_count']
+    avg_score = totals['score_sum'] / score_count if score_count else 0
+    variance = totals['score_sq_sum'] / score_count - avg_score ** 2 if score_count else 0
     
     return {
-        'count': len(snapshots_with_users),
+        'count': totals['count'],
         'avg_score': round(avg_score, 1),
-        'level_distribution': level_dist,
-        'block_averages': block_averages
+        'std_score': round(math.sqrt(max(variance, 0)), 1),
+        'level_distribution': {level: totals['levels'].get(level, 0) for level in LEVEL_NAMES},
+        'block_averages': {
+            block: round(block_sum / block_count, 1) if block_count else 0
+            for block, (block_sum, block_count) in totals['blocks'].items()
+        },
+        'quantiles': {metric: totals['sketches'][metric].quantiles() for metric in SKETCH_METRICS},
+        'label': label
     }
 
-def get_global_stats():
-    snapshots = get_all_completed_snapshots()
-    stats = compute_aggregated_stats(snapshots)
-    stats['label'] = 'OAZ Global'
-    return stats
+def _locked_rollup(dimension, group_key):
+    """Fetch a rollup row with SELECT ... FOR UPDATE, creating it if needed."""
+    query = AnalyticsRollup.query.filter_by(dimension=dimension, group_key=group_key)\
+        .with_for_update().populate_existing()
+    rollup = query.first()
+    if rollup is not None:
+        return rollup
+    
+    try:
+        with db.session.begin_nested():
+            rollup = AnalyticsRollup(dimension=dimension, group_key=group_key)
+            rollup.totals = empty_totals()
+            db.session.add(rollup)
+    except IntegrityError:
+        # Another transaction created the group first; lock its row instead
+        rollup = query.one()
+    return rollup
 
-def get_frente_stats():
-    snapshots = get_all_completed_snapshots()
+def apply_snapshots_to_rollups(user, snapshots, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) completed snapshots of one user from the
+    rollups of the user's groups, together with the time spent and response
+    latencies of their sessions (which must be final, see finalize_assessment).
     
-    frentes = defaultdict(list)
-    for snapshot, user in snapshots:
-        frente = get_frente_from_email(user.email)
-        frentes[frente].append((snapshot, user))
+    Runs in the caller's transaction: the rows are locked in a fixed order
+    (see rollup_keys) and the change is committed together with the snapshot
+    write or delete that caused it.
+    """
+    snapshots = list(snapshots)
+    if not snapshots:
+        return
     
-    result = {}
-    for frente, frente_snapshots in frentes.items():
-        stats = compute_aggregated_stats(frente_snapshots)
-        stats['label'] = frente
-        result[frente] = stats
+    sessions = {session_id: db.session.get(Session, session_id) for session_id in {snapshot.session_id for snapshot in snapshots}}
+    latencies = session_latencies(list(sessions))
     
-    return result
+    for dimension, group_key in rollup_keys(user.frente, user.department, user.role):
+        rollup = _locked_rollup(dimension, group_key)
+        totals = rollup.totals
+        for snapshot in snapshots:
+            add_to_totals(totals, snapshot.raw_score, snapshot.maturity_level, snapshot.block_scores, sign)
+        for session_id, session in sessions.items():
+            add_session_to_totals(totals, session.time_spent_s, latencies.get(session_id, ()), sign)
+        
+        if totals['count'] > 0:
+            rollup.totals = totals
+        else:
+            db.session.delete(rollup)
 
-def get_department_stats():
-    snapshots = get_all_completed_snapshots()
+def aggregate_completed_snapshots():
+    """
+    Dashboard aggregation engine: one column-projected, streamed pass over
+    completed snapshots. Each row is decoded once and added to the
+    accumulator of every group it belongs to.
     
-    departments = defaultdict(list)
-    for snapshot, user in snapshots:
-        dept = user.department if user.department else 'Não informado'
-        departments[dept].append((snapshot, user))
+    Returns {(dimension, group_key): totals} for all ROLLUP_DIMENSIONS.
+    """
+    statement = select(
+        User.frente,
+        User.department,
+        User.role,
+        ProficiencySnapshot.raw_score,
+        ProficiencySnapshot.maturity_level,
+        ProficiencySnapshot.block_scores_json
+    ).join(
+        Session, ProficiencySnapshot.session_id == Session.id
+    ).join(
+        User, Session.user_id == User.id
+    ).where(
+        Session.status == 'completed'
+    ).execution_options(yield_per=ROLLUP_REBUILD_BATCH)
     
-    result = {}
-    for dept, dept_snapshots in departments.items():
-        stats = compute_aggregated_stats(dept_snapshots)
-        stats['label'] = dept
-        result[dept] = stats
+    groups = defaultdict(empty_totals)
+    user_keys = {}
+    for frente, department, role, raw_score, maturity_level, block_scores_json in db.session.execute(statement):
+        keys = user_keys.get((frente, department, role))
+        if keys is None:
+            keys = user_keys[(frente, department, role)] = [groups[key] for key in rollup_keys(frente, department, role)]
+        block_scores = json.loads(block_scores_json) if block_scores_json else {}
+        for totals in keys:
+            add_to_totals(totals, raw_score, maturity_level, block_scores)
     
-    return result
-
-def get_role_stats():
-    snapshots = get_all_completed_snapshots()
+    # Session timings: one streamed pass over the responses of completed
+    # sessions that have a snapshot (the sessions counted above)
+    timings = select(
+        User.frente,
+        User.department,
+        User.role,
+        Session.id,
+        Session.time_spent_s,
+        Response.latency_ms
+    ).join(
+        User, Session.user_id == User.id
+    ).outerjoin(
+        Response, (Response.session_id == Session.id) & Response.latency_ms.isnot(None)
+    ).where(
+        Session.status == 'completed',
+        exists().where(ProficiencySnapshot.session_id == Session.id)
+    ).order_by(Session.id).execution_options(yield_per=ROLLUP_REBUILD_BATCH)
+    
+    current_session = None
+    for frente, department, role, session_id, time_spent_s, latency_ms in db.session.execute(timings):
+        keys = user_keys[(frente, department, role)]
+        for totals in keys:
+            if session_id != current_session:
+                add_session_to_totals(totals, time_spent_s, ())
+            totals['sketches']['latency_ms'].add(latency_ms)
+        current_session = session_id
     
-    roles = defaultdict(list)
-    for snapshot, user in snapshots:
-        role = user.role if user.role else 'Não informado'
-        roles[role].append((snapshot, user))
+    return groups
+
+def rebuild_analytics_rollups():
+    """
+    Recompute every rollup with aggregate_completed_snapshots and replace
+    the table contents. Returns the number of groups written.
+    """
+    groups = aggregate_completed_snapshots()
     
-    result = {}
-    for role, role_snapshots in roles.items():
-        stats = compute_aggregated_stats(role_snapshots)
-        stats['label'] = role
-        result[role] = stats
+    AnalyticsRollup.query.delete()
+    for (dimension, group_key), totals in groups.items():
+        rollup = AnalyticsRollup(dimension=dimension, group_key=group_key)
+        rollup.totals = totals
+        db.session.add(rollup)
+    db.session.commit()
     
-    return result
+    return len(groups)
 
-def get_complete_dashboard_data():
+def ensure_analytics_rollups():
+    """
+    Build the rollups when the table is empty but completed sessions exist,
+    or when rows predate the quantile sketches.
+    """
+    has_rollups = db.session.query(AnalyticsRollup.id).first() is not None
+    missing_sketches = db.session.query(AnalyticsRollup.id).filter(AnalyticsRollup.sketches_json.is_(None)).first() is not None
+    if has_rollups and not missing_sketches:
+        return
+    if db.session.query(Session.id).filter_by(status='completed').first() is None:
+        return
+    rebuild_analytics_rollups()
+
+DASHBOARD_SECTIONS = {'frente': 'frentes', 'department': 'departments', 'role': 'roles'}
+
+def dashboard_payload(groups):
+    """Complete dashboard dict from {(dimension, group_key): totals}."""
+    payload = {
+        'global': stats_from_totals(groups.get(('global', GLOBAL_GROUP)) or empty_totals(), GLOBAL_GROUP),
+        **{section: {} for section in DASHBOARD_SECTIONS.values()}
+    }
+    for (dimension, group_key), totals in groups.items():
+        if dimension in DASHBOARD_SECTIONS:
+            payload[DASHBOARD_SECTIONS[dimension]][group_key] = stats_from_totals(totals, group_key)
+    return payload
+
+def _dimension_stats(dimension):
     return {
-        'global': get_global_stats(),
-        'frentes': get_frente_stats(),
-        'departments': get_department_stats(),
-        'roles': get_role_stats()
+        rollup.group_key: stats_from_totals(rollup.totals, rollup.group_key)
+        for rollup in AnalyticsRollup.query.filter_by(dimension=dimension).all()
     }
+
+def get_global_stats():
+    rollup = AnalyticsRollup.query.filter_by(dimension='global', group_key=GLOBAL_GROUP).first()
+    return stats_from_totals(rollup.totals if rollup else empty_totals(), GLOBAL_GROUP)
+
+def get_frente_stats():
+    return _dimension_stats('frente')
+
+def get_department_stats():
+    return _dimension_stats('department')
+
+def get_role_stats():
+    return _dimension_stats('role')
+
+def get_complete_dashboard_data():
+    """All four dashboard sections from a single read of the rollup table."""
+    return dashboard_payload({
+        (rollup.dimension, rollup.group_key): rollup.totals
+        for rollup in AnalyticsRollup.query.all()
+    })
@@ -0,0 +1,150 @@
+"""
+One-time data backfills that used to run in every worker's create_app.
+
+Derived tables introduced after data already existed are filled from the
+source tables once:
+
+- snapshot block scores (snapshot_block_scores)
+- users.frente
+- dashboard and activity rollups
+- item stats
+- change log
+- the stats data version row
+
+Run concurrently by N gunicorn workers, the check-then-fill steps raced
+(duplicate block scores, double-counted rollups), and each boot paid their
+emptiness checks.
+
+A marker row in data_versions ('bootstrap') serializes them:
+
+- version = BOOTSTRAP_VERSION: done; later boots cost one primary-key read.
+- version = -BOOTSTRAP_VERSION: a run is in progress. The runner refreshes
+  updated_at after every step, and the other workers wait for it to finish
+  before they serve anything, so no request updates a table while it is
+  being rebuilt. A marker silent for BOOTSTRAP_STALE_S (runner killed) is
+  taken over.
+- anything else (absent, 0 after a failed run, an older version): the next
+  process claims it.
+
+Claims are a compare-and-set on (version, updated_at), so exactly one
+process runs the steps. Bump BOOTSTRAP_VERSION when a new backfill is
+added. With BOOTSTRAP_ON_START off, `flask bootstrap-data` runs them from
+the release step, before the web workers start.
+"""
+import time
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import DataVersion
+from app.services.logger import analytics_logger
+
+BOOTSTRAP_MARKER = 'bootstrap'
+BOOTSTRAP_VERSION = 1
+BOOTSTRAP_STALE_S = 900  # longer than any single step; the marker is refreshed between steps
+BOOTSTRAP_POLL_S = 1.0
+
+def _steps():
+    from app.core.utils import backfill_snapshot_block_scores, backfill_user_frente
+    from app.services.analytics import ensure_analytics_rollups
+    from app.services.activity import ensure_activity_rollups
+    from app.services.item_stats import ensure_item_stats
+    from app.services.changes import ensure_change_log
+    from app.services.cache import ensure_data_version
+
+    return [
+        backfill_snapshot_block_scores,
+        backfill_user_frente,
+        ensure_analytics_rollups,
+        ensure_activity_rollups,
+        ensure_item_stats,
+        ensure_change_log,
+        ensure_data_version,
+    ]
+
+def _read_marker():
+    """(version, updated_at) of the marker, or None; ends the read transaction so polls see new commits."""
+    marker = db.session.query(DataVersion.version, DataVersion.updated_at)\
+        .filter(DataVersion.name == BOOTSTRAP_MARKER).first()
+    db.session.rollback()
+    return marker
+
+def _in_progress(marker) -> bool:
+    return marker is not None and marker.version < 0
+
+def _is_stale(marker) -> bool:
+    return marker.updated_at is None or (datetime.utcnow() - marker.updated_at).total_seconds() > BOOTSTRAP_STALE_S
+
+def _set_marker(version: int, expected) -> bool:
+    """Move the marker from the expected (version, updated_at) state; False if another process changed it first."""
+    now = datetime.utcnow()
+    try:
+        if expected is None:
+            db.session.add(DataVersion(name=BOOTSTRAP_MARKER, version=version, updated_at=now))
+            db.session.commit()
+            return True
+        updated_at = DataVersion.updated_at
+        result = db.session.execute(
+            update(DataVersion)
+            .where(
+                DataVersion.name == BOOTSTRAP_MARKER,
+                DataVersion.version == expected.version,
+                updated_at.is_(None) if expected.updated_at is None else updated_at == expected.updated_at
+            )
+            .values(version=version, updated_at=now)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def _heartbeat():
+    db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.name == BOOTSTRAP_MARKER, DataVersion.version == -BOOTSTRAP_VERSION)
+        .values(updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+def _finish(version: int):
+    db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.name == BOOTSTRAP_MARKER)
+        .values(version=version, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+def bootstrap_data(force: bool = False, wait: bool = True) -> bool:
+    """
+    Run the backfills unless they are done (or force). While another process
+    runs them, waits for it (or returns at once if not wait). Returns whether
+    they ran here.
+    """
+    while True:
+        marker = _read_marker()
+        if _in_progress(marker) and not _is_stale(marker):
+            if not wait:
+                return False
+            time.sleep(BOOTSTRAP_POLL_S)
+            continue
+        if not force and marker is not None and marker.version >= BOOTSTRAP_VERSION:
+            return False
+        if _set_marker(-BOOTSTRAP_VERSION, marker):
+            break
+
+    analytics_logger.event_start('bootstrap_data', {
+        'from_version': marker.version if marker is not None else None, 'force': force
+    })
+    try:
+        for step in _steps():
+            step()
+            _heartbeat()
+    except Exception as e:
+        analytics_logger.event_error('bootstrap_data', error=e)
+        db.session.rollback()
+        _finish(0)  # not done: the next boot claims it again
+        raise
+    _finish(BOOTSTRAP_VERSION)
+    analytics_logger.event_success('bootstrap_data', {'version': BOOTSTRAP_VERSION})
+    return True
@@ -0,0 +1,132 @@
+"""
+Versioned response cache for the admin statistics endpoints.
+
+A single counter in data_versions is bumped by every change that can alter
+the dashboards (completed snapshots, new users and sessions, user deletes,
+item changes). Writers only mark the bump; it is applied right after their
+commit in a separate short transaction, so the counter row is never locked
+for the length of a writing transaction and writers do not serialize on it.
+Cached JSON bodies are valid only for the version they were computed at, so
+every gunicorn worker sees an invalidation as soon as the bump commits; the
+only per-request cost on a hit is reading the counter by primary key.
+
+Responses carry an ETag derived from the version and the request, and a
+matching If-None-Match is answered with 304 before the view runs.
+"""
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+from flask import Response, current_app, make_response, request
+from sqlalchemy import event, insert, update
+from app import db
+from app.models import DataVersion
+
+STATS_VERSION = 'stats'
+CACHE_MAX_ENTRIES = 256  # per worker; group_by and similar args are user input
+
+_PENDING_BUMPS = 'pending_data_version_bumps'  # key in Session.info
+
+def bump_data_version(name: str = STATS_VERSION):
+    """Increment the counter once the caller's transaction commits (dropped if it rolls back)."""
+    db.session.info.setdefault(_PENDING_BUMPS, set()).add(name)
+
+def _apply_bumps(session):
+    names = session.info.pop(_PENDING_BUMPS, None)
+    if not names:
+        return
+    with db.engine.begin() as connection:
+        for name in sorted(names):
+            result = connection.execute(
+                update(DataVersion)
+                .where(DataVersion.name == name)
+                .values(version=DataVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(DataVersion).values(name=name, version=1))
+
+def _discard_bumps(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_PENDING_BUMPS, None)
+
+event.listen(db.session, 'after_commit', _apply_bumps)
+event.listen(db.session, 'after_transaction_end', _discard_bumps)
+
+def current_data_version(name: str = STATS_VERSION) -> int:
+    version = db.session.query(DataVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+def ensure_data_version(name: str = STATS_VERSION):
+    """Create the counter row if missing (first start after the table was added)."""
+    if db.session.get(DataVersion, name) is None:
+        db.session.add(DataVersion(name=name, version=0))
+        db.session.commit()
+
+def _store():
+    """Per-app (and so per-worker) LRU of {(endpoint, args): (version, body)}."""
+    return current_app.extensions.setdefault(
+        'versioned_json_cache', {'entries': OrderedDict(), 'lock': threading.Lock()}
+    )
+
+def clear_response_cache():
+    store = _store()
+    with store['lock']:
+        store['entries'].clear()
+
+def _request_key(vary=None):
+    key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+    return key + (vary(),) if vary is not None else key
+
+def _etag(version: int, key) -> str:
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]
+    return f'{version}-{digest}'
+
+def _respond(body: bytes, etag: str) -> Response:
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    # Let browsers keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def versioned_json_cache(view=None, *, vary=None):
+    """
+    Cache a JSON view per (endpoint, query args) for the current data
+    version. Only 200 responses are stored. vary() adds to the key whatever
+    else the body depends on, such as a default that moves with the clock.
+    """
+    if view is None:
+        return lambda view: versioned_json_cache(view, vary=vary)
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = current_data_version()
+        key = _request_key(vary)
+        etag = _etag(version, key)
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        store = _store()
+        entries = store['entries']
+        with store['lock']:
+            entry = entries.get(key)
+            if entry is not None and entry[0] == version:
+                entries.move_to_end(key)
+                return _respond(entry[1], etag)
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        
+        body = response.get_data()
+        with store['lock']:
+            entries[key] = (version, body)
+            entries.move_to_end(key)
+            while len(entries) > CACHE_MAX_ENTRIES:
+                entries.popitem(last=False)
+        return _respond(body, etag)
+    
+    return wrapper
@@ -0,0 +1,212 @@
+"""
+Change log and incremental (watermark-based) export of users, sessions,
+snapshots and responses.
+
+Every ORM flush that inserts, updates or deletes one of those entities
+appends (entity, id, op) rows to change_log in the same transaction, via an
+after_flush listener; bulk deletes (Query.delete) are recorded explicitly
+with record_deletions.
+
+The watermark is change_log.seq, not the id. Ids are taken at flush time,
+so a transaction that commits late (for instance waiting on a row lock)
+can make a lower id visible after higher ones were already exported. seq
+is assigned after commit instead: sequence_changes numbers the committed
+rows that have none, in a short transaction that locks the 'change_log'
+counter in data_versions. Every seq is higher than all the seqs already
+visible, so an export for `since` returns, once per entity, the latest
+change with seq in (since, upper] and never skips a late commit. Rows
+left unsequenced (a process died between commit and sequencing) are
+picked up by the next sequencing, which every export runs first.
+Upserts carry the entity's current row, deletes are tombstones. The cost
+is O(changes in the window), not O(history).
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from sqlalchemy import event, func, insert, literal, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import ChangeLog, DataVersion, ProficiencySnapshot, Response, Session, User
+
+logger = logging.getLogger(__name__)
+
+CHANGE_EXPORT_BATCH = 1000
+CHANGE_SEQUENCE = 'change_log'  # data_versions counter: highest assigned change_log.seq
+_PENDING_CHANGES = 'change_log_pending'  # key in Session.info
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+# entity name -> (model, serializer of the current row)
+ENTITIES = {
+    'user': (User, lambda user: {
+        'id': user.id, 'name': user.name, 'email': user.email, 'department': user.department,
+        'role': user.role, 'frente': user.frente, 'consent_ts': _iso(user.consent_ts), 'created_at': _iso(user.created_at)
+    }),
+    'session': (Session, lambda session: {
+        'id': session.id, 'user_id': session.user_id, 'status': session.status,
+        'started_at': _iso(session.started_at), 'ended_at': _iso(session.ended_at),
+        'time_spent_s': session.time_spent_s
+    }),
+    'snapshot': (ProficiencySnapshot, lambda snapshot: {
+        'id': snapshot.id, 'session_id': snapshot.session_id, 'raw_score': snapshot.raw_score,
+        'maturity_level': snapshot.maturity_level, 'block_scores': snapshot.block_scores,
+        'competency': snapshot.competency, 'score_0_100': snapshot.score_0_100
+    }),
+    'response': (Response, lambda response: {
+        'id': response.id, 'session_id': response.session_id, 'item_id': response.item_id,
+        'raw_answer': response.raw_answer, 'matrix_points': response.matrix_points,
+        'graded_score_0_1': response.graded_score_0_1, 'latency_ms': response.latency_ms,
+        'created_at': _iso(response.created_at)
+    }),
+}
+ENTITY_NAMES = {model: name for name, (model, _) in ENTITIES.items()}
+
+def _record_flush_changes(session, flush_context):
+    now = datetime.utcnow()
+    rows = []
+    for objects, op in ((session.new, 'upsert'), (session.dirty, 'upsert'), (session.deleted, 'delete')):
+        for obj in objects:
+            entity = ENTITY_NAMES.get(type(obj))
+            if entity is None or obj.id is None:
+                continue
+            if objects is session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            rows.append({'entity': entity, 'entity_id': obj.id, 'op': op, 'changed_at': now})
+    if rows:
+        rows.sort(key=lambda row: (row['op'], row['entity'], row['entity_id']))
+        session.connection().execute(insert(ChangeLog), rows)
+        session.info[_PENDING_CHANGES] = True
+
+def sequence_changes(connection) -> int:
+    """
+    Assign seq to the committed change rows that have none, in id order,
+    after every seq assigned so far. Runs in the caller's transaction on
+    connection (a Connection or the Session), which must commit right away:
+    the counter row stays locked until then. Returns the rows sequenced.
+    """
+    counter = connection.execute(
+        select(DataVersion.version).where(DataVersion.name == CHANGE_SEQUENCE).with_for_update()
+    ).scalar()
+    if counter is None:
+        counter = 0
+        connection.execute(insert(DataVersion).values(name=CHANGE_SEQUENCE, version=0))
+    
+    low, high = connection.execute(
+        select(func.min(ChangeLog.id), func.max(ChangeLog.id)).where(ChangeLog.seq.is_(None))
+    ).one()
+    if low is None:
+        return 0
+    
+    # Rows committed meanwhile outside [low, high] are left for the next call,
+    # so the seqs given here, counter + 1 .. counter + span, are all unused
+    result = connection.execute(
+        update(ChangeLog)
+        .where(ChangeLog.seq.is_(None), ChangeLog.id.between(low, high))
+        .values(seq=ChangeLog.id - low + counter + 1)
+    )
+    connection.execute(
+        update(DataVersion)
+        .where(DataVersion.name == CHANGE_SEQUENCE)
+        .values(version=counter + high - low + 1)
+    )
+    return result.rowcount
+
+def _sequence_after_commit(session):
+    if not session.info.pop(_PENDING_CHANGES, None):
+        return
+    try:
+        with db.engine.begin() as connection:
+            sequence_changes(connection)
+    except SQLAlchemyError as e:
+        # Left unsequenced; the next commit with changes or the next export numbers them
+        logger.warning(f"Change log sequencing deferred: {e}")
+
+def _discard_pending(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_PENDING_CHANGES, None)
+
+def register_change_tracking():
+    """Install the flush and commit listeners once per process."""
+    if not event.contains(db.session, 'after_flush', _record_flush_changes):
+        event.listen(db.session, 'after_flush', _record_flush_changes)
+        event.listen(db.session, 'after_commit', _sequence_after_commit)
+        event.listen(db.session, 'after_transaction_end', _discard_pending)
+
+def record_deletions(entity: str, ids):
+    """Tombstones for rows removed with a bulk delete (which skips flush events)."""
+    now = datetime.utcnow()
+    rows = [{'entity': entity, 'entity_id': entity_id, 'op': 'delete', 'changed_at': now} for entity_id in ids]
+    if rows:
+        db.session.execute(insert(ChangeLog), rows)
+        db.session.info[_PENDING_CHANGES] = True
+
+def change_watermark(since: int, limit: Optional[int] = None) -> int:
+    """Upper seq of the next export window (== since when nothing new was committed)."""
+    sequence_changes(db.session)
+    db.session.commit()
+    
+    latest = db.session.query(func.max(ChangeLog.seq)).filter(ChangeLog.seq > since).scalar()
+    if latest is None:
+        return since
+    if limit:
+        limited = db.session.query(ChangeLog.seq).filter(
+            ChangeLog.seq > since, ChangeLog.seq <= latest
+        ).order_by(ChangeLog.seq).offset(limit - 1).limit(1).scalar()
+        if limited is not None:
+            return limited
+    return latest
+
+def iter_changes(since: int, upper: int) -> Iterator[Dict[str, Any]]:
+    """
+    Latest change per entity with seq in (since, upper], in seq order, as
+    {'change_id', 'entity', 'op', 'id', 'data'} dicts (change_id is the
+    seq). Upserts of rows that no longer exist are skipped: their tombstone
+    is in a later window.
+    """
+    latest = select(func.max(ChangeLog.seq)).where(
+        ChangeLog.seq > since, ChangeLog.seq <= upper
+    ).group_by(ChangeLog.entity, ChangeLog.entity_id)
+    statement = select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op).where(
+        ChangeLog.seq.in_(latest)
+    ).order_by(ChangeLog.seq).execution_options(stream_results=True, yield_per=CHANGE_EXPORT_BATCH)
+    
+    for batch in db.session.execute(statement).partitions(CHANGE_EXPORT_BATCH):
+        current = {}
+        for entity, (model, _) in ENTITIES.items():
+            ids = [entity_id for _, name, entity_id, op in batch if name == entity and op == 'upsert']
+            if ids:
+                current[entity] = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+        
+        for change_id, entity, entity_id, op in batch:
+            if op == 'delete':
+                yield {'change_id': change_id, 'entity': entity, 'op': 'delete', 'id': entity_id, 'data': None}
+                continue
+            row = current.get(entity, {}).get(entity_id)
+            if row is not None:
+                yield {'change_id': change_id, 'entity': entity, 'op': 'upsert', 'id': entity_id,
+                       'data': ENTITIES[entity][1](row)}
+
+def backfill_change_log() -> int:
+    """Record every existing row as an upsert (parents first). Returns the number of changes."""
+    total = 0
+    now = datetime.utcnow()
+    for entity, (model, _) in ENTITIES.items():
+        result = db.session.execute(
+            insert(ChangeLog).from_select(
+                ['entity', 'entity_id', 'op', 'changed_at'],
+                select(literal(entity), model.id, literal('upsert'), literal(now, db.DateTime)).order_by(model.id)
+            )
+        )
+        total += result.rowcount
+    db.session.info[_PENDING_CHANGES] = True
+    db.session.commit()
+    return total
+
+def ensure_change_log():
+    """Backfill once when the log is empty but data exists (first start with change tracking)."""
+    if db.session.query(ChangeLog.id).first() is not None:
+        return
+    if db.session.query(User.id).first() is None:
+        return
+    backfill_change_log()
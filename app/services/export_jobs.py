@@ -0,0 +1,228 @@
+"""
+Background export jobs with artifacts cached by (format, filters, data version).
+
+POST /admin/exports creates an export_jobs row and runs it on a per-worker
+thread pool, so the request returns immediately with the job id. The job
+writes to EXPORT_ARTIFACT_DIR (a temporary name, renamed when complete).
+State changes are stored in the job row; row progress goes to a small
+<job>.progress file next to the artifact instead, because the export holds
+a streaming cursor on its session for the whole build. With a directory
+shared by all workers, any worker can report progress and serve the
+download.
+
+The data version (app.services.cache) changes on every write that can alter
+an export, so a finished artifact with the same cache key is still exact:
+repeat requests reuse it (or the job already building it) without touching
+the data. Artifacts of superseded versions and old jobs are removed after
+EXPORT_ARTIFACT_RETENTION_HOURS.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional
+from flask import current_app
+from app import db
+from app.models import ExportJob
+from app.services import exporter
+from app.services.cache import current_data_version
+from app.services.logger import export_logger
+
+_EXTENSION_KEY = 'export_job_executor'
+
+EXPORT_FORMATS = ('csv', 'xlsx', 'parquet')
+MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': exporter.XLSX_MIMETYPE,
+    'parquet': 'application/vnd.apache.parquet'
+}
+FILTER_KEYS = ('frente', 'department', 'role')
+STALE_AFTER = timedelta(minutes=10)  # running jobs without a progress heartbeat for this long are retried
+SUPERSEDED_GRACE = timedelta(minutes=10)  # keep artifacts of older data versions this long for downloads in flight
+
+def normalize_filters(filters: Dict[str, Any]) -> Dict[str, str]:
+    return {key: filters[key] for key in FILTER_KEYS if filters.get(key)}
+
+def cache_key(export_format: str, filters: Dict[str, str], data_version: int) -> str:
+    payload = json.dumps([export_format, filters, data_version], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _executor(app) -> ThreadPoolExecutor:
+    executor = app.extensions.get(_EXTENSION_KEY)
+    if executor is None:
+        executor = app.extensions.setdefault(_EXTENSION_KEY, ThreadPoolExecutor(
+            max_workers=app.config.get('EXPORT_JOB_WORKERS', 2), thread_name_prefix='export-job'
+        ))
+    return executor
+
+def _progress_path(job: ExportJob) -> str:
+    return os.path.join(current_app.config.get('EXPORT_ARTIFACT_DIR'), f'{job.id}.progress')
+
+def _write_progress(path: str, rows: int):
+    with open(f'{path}.tmp', 'w') as handle:
+        json.dump({'rows_done': rows}, handle)
+    os.replace(f'{path}.tmp', path)
+
+def _heartbeat(job: ExportJob) -> Optional[datetime]:
+    """Last sign of life of a queued/running job: its progress file or its row."""
+    path = _progress_path(job)
+    if os.path.exists(path):
+        return datetime.utcfromtimestamp(os.path.getmtime(path))
+    return job.started_at or job.created_at
+
+def _reusable(job: ExportJob) -> bool:
+    if job.status == 'done':
+        return bool(job.artifact_path) and os.path.exists(job.artifact_path)
+    if job.status in ('queued', 'running'):
+        heartbeat = _heartbeat(job)
+        return heartbeat is None or datetime.utcnow() - heartbeat < STALE_AFTER
+    return False
+
+def job_status(job: ExportJob) -> Dict[str, Any]:
+    """Job dict with live progress while it runs."""
+    status = job.to_dict()
+    if job.status == 'running':
+        try:
+            with open(_progress_path(job)) as handle:
+                status['rows_done'] = json.load(handle)['rows_done']
+        except (OSError, ValueError, KeyError):
+            pass
+        if job.rows_total:
+            status['progress'] = round(min(status['rows_done'] / job.rows_total, 1.0), 3)
+    return status
+
+def find_cached_job(export_format: str, filters: Dict[str, Any]) -> Optional[ExportJob]:
+    """A finished or in-progress job for the current data version, if any."""
+    filters = normalize_filters(filters)
+    key = cache_key(export_format, filters, current_data_version())
+    for job in ExportJob.query.filter_by(cache_key=key).order_by(ExportJob.created_at.desc()):
+        if _reusable(job):
+            return job
+    return None
+
+def submit_export(export_format: str, filters: Dict[str, Any], requested_by: Optional[str] = None):
+    """
+    Return (job, created): an existing job for the same cache key when one
+    is done or still running, otherwise a new queued job started in the
+    background.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'format must be one of {EXPORT_FORMATS}')
+    if export_format == 'parquet' and not exporter.PARQUET_AVAILABLE:
+        raise ValueError('parquet export requires pyarrow')
+    
+    job = find_cached_job(export_format, filters)
+    if job is not None:
+        return job, False
+    
+    filters = normalize_filters(filters)
+    version = current_data_version()
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        format=export_format,
+        data_version=version,
+        cache_key=cache_key(export_format, filters, version),
+        status='queued',
+        requested_by=requested_by
+    )
+    job.filters = filters
+    db.session.add(job)
+    db.session.commit()
+    
+    app = current_app._get_current_object()
+    _executor(app).submit(run_export_job, app, job.id)
+    return job, True
+
+def _write_artifact(job: ExportJob, path: str, progress):
+    filters = job.filters
+    with open(path, 'wb') as output:
+        if job.format == 'csv':
+            stats = {}
+            for chunk in exporter.stream_csv(progress=progress, stats=stats, **filters):
+                output.write(chunk)
+            return stats.get('rows', 0)
+        if job.format == 'xlsx':
+            return exporter.write_xlsx(output, progress=progress, **filters)
+        return exporter.write_parquet(output, progress=progress, **filters)
+
+def run_export_job(app, job_id: str):
+    """Build a job's artifact (runs on the export thread pool, in its own app context)."""
+    with app.app_context():
+        job = db.session.get(ExportJob, job_id)
+        if job is None or job.status != 'queued':
+            return
+        export_logger.event_start('export_job', {'job_id': job_id, 'format': job.format})
+        
+        directory = app.config.get('EXPORT_ARTIFACT_DIR')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{job.id}.{job.format}')
+        partial = f'{path}.part'
+        progress_path = _progress_path(job)
+        
+        try:
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            job.rows_total = exporter.count_export_rows(**job.filters)
+            db.session.commit()
+            
+            def progress(rows):
+                _write_progress(progress_path, rows)
+            
+            rows = _write_artifact(job, partial, progress)
+            os.replace(partial, path)
+            
+            job.status = 'done'
+            job.rows_done = rows
+            job.artifact_path = path
+            job.artifact_size = os.path.getsize(path)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            export_logger.event_success('export_job', {'job_id': job_id, 'rows': rows, 'size': job.artifact_size})
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(partial):
+                os.remove(partial)
+            job = db.session.get(ExportJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            export_logger.event_error('export_job', details={'job_id': job_id, 'error': str(e)})
+        finally:
+            if os.path.exists(progress_path):
+                os.remove(progress_path)
+            prune_export_artifacts()
+            export_logger.event_end('export_job')
+            db.session.remove()
+
+def prune_export_artifacts(now: Optional[datetime] = None) -> int:
+    """
+    Delete artifacts and rows of jobs older than the retention period, and
+    artifacts built for an older data version. Returns the jobs removed.
+    """
+    now = now or datetime.utcnow()
+    retention = timedelta(hours=current_app.config.get('EXPORT_ARTIFACT_RETENTION_HOURS', 24))
+    version = current_data_version()
+    removed = 0
+    
+    finished = ExportJob.query.filter(ExportJob.status.in_(('done', 'failed')))
+    for job in finished:
+        expired = job.created_at and now - job.created_at > retention
+        superseded = (job.status == 'done' and job.data_version < version
+                      and job.finished_at and now - job.finished_at > SUPERSEDED_GRACE)
+        if not (expired or superseded):
+            continue
+        if job.artifact_path and os.path.exists(job.artifact_path):
+            os.remove(job.artifact_path)
+        db.session.delete(job)
+        removed += 1
+    db.session.commit()
+    return removed
+
+def wait_for_jobs(app):
+    """Block until every submitted job has finished (CLI and tests)."""
+    executor = app.extensions.pop(_EXTENSION_KEY, None)
+    if executor is not None:
+        executor.shutdown(wait=True)
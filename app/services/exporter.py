@@ -1,69 +1,30 @@
 import csv
-import pandas as pd
-from app.models import User, Session, ProficiencySnapshot
-from datetime import datetime
-import os
-
-def get_frente_from_email(email):
-    """Determine frente from email domain."""
-    if not email:
-        return 'N/A'
-    if '@oaz.co' in email.lower():
-        return 'SOUQ'
-    elif '@thesaint.com.br' in email.lower():
-        return 'THESAINT'
-    return 'Outro'
-
-def get_export_data(frente=None, department=None, role=None):
-    """Get export data with optional filters."""
-    rows = []
-    
-    query = User.query
-    users = query.all()
-    
-    for user in users:
-        user_frente = get_frente_from_email(user.email)
-        
-        if frente and user_frente != frente:
-            continue
-        if department and user.department != department:
-            continue
-        if role and user.role != role:
-            continue
-        
-        sessions = Session.query.filter_by(user_id=user.id, status='completed').all()
-        
-        for session in sessions:
-            snapshot = ProficiencySnapshot.query.filter_by(session_id=session.id).first()
-            
-            if not snapshot:
-                continue
-            
-            row = {
-                'ID': user.id,
-                'Nome': user.name,
-                'Email': user.email,
-                'Frente': user_frente,
-                'Departamento': user.department or 'N/A',
-                'Cargo': user.role or 'N/A',
-                'Data Avaliação': session.ended_at.strftime('%d/%m/%Y %H:%M') if session.ended_at else '',
-                'Tempo (min)': round(session.time_spent_s / 60, 1) if session.time_spent_s else 0,
-                'Pontuação Total': snapshot.raw_score or 0,
-                'Nível de Maturidade': snapshot.maturity_level or 'N/A'
-            }
-            
-            if snapshot.block_scores:
-                for block_name, score in snapshot.block_scores.items():
-                    row[block_name] = score
-            
-            rows.append(row)
-    
-    return rows
+import io
+import json
+import tempfile
+from openpyxl import Workbook
+from sqlalchemy import case, func, select
+from app import db
+from app.models import User, Session, ProficiencySnapshot, Response, Item
+from app.core.blocks_config import BLOCKS
 
-def export_to_csv(frente=None, department=None, role=None) -> str:
-    """Export assessment results to CSV file."""
-    rows = get_export_data(frente=frente, department=department, role=role)
-    
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    pa = pq = None
+
+EXPORT_BATCH = 1000
+EXPORT_COLUMNS = [
+    'ID', 'Nome', 'Email', 'Frente', 'Departamento', 'Cargo',
+    'Data Avaliação', 'Tempo (min)', 'Pontuação Total', 'Nível de Maturidade'
+] + list(BLOCKS)
+NO_DATA = 'Nenhum dado disponível'
+
+def export_filename(extension, frente=None, department=None, role=None, prefix='oaz_profiler'):
+    """<prefix>[_filters].<extension>"""
     filter_parts = []
     if frente:
         filter_parts.append(frente.lower())
@@ -72,50 +33,408 @@ def export_to_csv(frente=None, department=None, role=None) -> str:
     if role:
         filter_parts.append(role.lower().replace(' ', '_'))
     
-    filename = 'oaz_profiler'
+    filename = prefix
     if filter_parts:
         filename += '_' + '_'.join(filter_parts)
-    filename += '.csv'
+    return f'{filename}.{extension}'
+
+PARTITION_DIMENSIONS = {'frente': lambda: User.frente, 'department': lambda: User.department}
+
+def apply_partition(statement, id_column, partition=None):
+    """
+    Restrict an export query to one partition (see app.services.parallel_export):
+    ('id', first, end) keeps first <= id < end (either bound may be None),
+    ('frente' | 'department', value) keeps one group (None matches NULL).
+    """
+    if partition is None:
+        return statement
+    if partition[0] == 'id':
+        _, first, end = partition
+        if first is not None:
+            statement = statement.where(id_column >= first)
+        if end is not None:
+            statement = statement.where(id_column < end)
+        return statement
+    dimension, value = partition
+    column = PARTITION_DIMENSIONS[dimension]()
+    return statement.where(column.is_(None) if value is None else column == value)
+
+def export_query(frente=None, department=None, role=None, partition=None):
+    """
+    One row per completed session with its first snapshot, joined with the
+    user, filtered and ordered in SQL.
+    """
+    first_snapshot_id = select(func.min(ProficiencySnapshot.id)).where(
+        ProficiencySnapshot.session_id == Session.id
+    ).correlate(Session).scalar_subquery()
+    
+    statement = select(
+        User.id,
+        User.name,
+        User.email,
+        User.frente,
+        User.department,
+        User.role,
+        Session.ended_at,
+        Session.time_spent_s,
+        ProficiencySnapshot.raw_score,
+        ProficiencySnapshot.maturity_level,
+        ProficiencySnapshot.block_scores_json
+    ).join(
+        Session, Session.user_id == User.id
+    ).join(
+        ProficiencySnapshot, ProficiencySnapshot.id == first_snapshot_id
+    ).where(
+        Session.status == 'completed'
+    )
+    
+    if frente:
+        statement = statement.where(User.frente == frente)
+    if department:
+        statement = statement.where(User.department == department)
+    if role:
+        statement = statement.where(User.role == role)
+    
+    return apply_partition(statement, User.id, partition).order_by(User.id, Session.id)
+
+def count_export_rows(frente=None, department=None, role=None) -> int:
+    subquery = export_query(frente, department, role).order_by(None).subquery()
+    return db.session.execute(select(func.count()).select_from(subquery)).scalar()
+
+def iter_export_rows(frente=None, department=None, role=None, partition=None):
+    """
+    Yield export rows (lists in EXPORT_COLUMNS order) from a single query
+    read through a server-side cursor, EXPORT_BATCH rows at a time.
+    """
+    statement = export_query(frente, department, role, partition).execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH
+    )
+    for row in db.session.execute(statement):
+        block_scores = json.loads(row.block_scores_json) if row.block_scores_json else {}
+        yield [
+            row.id,
+            row.name,
+            row.email,
+            row.frente,
+            row.department or 'N/A',
+            row.role or 'N/A',
+            row.ended_at.strftime('%d/%m/%Y %H:%M') if row.ended_at else '',
+            round(row.time_spent_s / 60, 1) if row.time_spent_s else 0,
+            row.raw_score or 0,
+            row.maturity_level or 'N/A'
+        ] + [block_scores.get(block, '') for block in BLOCKS]
+
+def stream_csv(frente=None, department=None, role=None, stats=None, progress=None):
+    """
+    Generate the CSV export (UTF-8 with BOM, ';' delimited) as encoded
+    chunks of about EXPORT_BATCH rows. Memory use does not depend on the
+    number of rows. `stats`, if given, receives the row count at the end;
+    `progress`, if given, is called with the rows written so far per chunk.
+    """
+    yield from _stream_csv(EXPORT_COLUMNS, iter_export_rows(frente, department, role), stats, progress)
+
+def _stream_csv(columns, rows_iter, stats=None, progress=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    rows = 0
     
-    filepath = f'/tmp/{filename}'
+    buffer.write('\ufeff')
+    for row in rows_iter:
+        if not rows:
+            writer.writerow(columns)
+        writer.writerow(row)
+        rows += 1
+        if rows % EXPORT_BATCH == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            if progress:
+                progress(rows)
     
-    if rows:
-        fieldnames = list(rows[0].keys())
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=';')
-            writer.writeheader()
-            writer.writerows(rows)
-    else:
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.writer(csvfile, delimiter=';')
-            writer.writerow(['Nenhum dado disponível'])
+    if not rows:
+        writer.writerow([NO_DATA])
+    yield buffer.getvalue().encode('utf-8')
     
-    return filepath
+    if stats is not None:
+        stats['rows'] = rows
 
-def export_to_xlsx(frente=None, department=None, role=None) -> str:
-    """Export assessment results to Excel file."""
-    rows = get_export_data(frente=frente, department=department, role=role)
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def write_xlsx(fileobj, frente=None, department=None, role=None, progress=None) -> int:
+    """
+    Write the export to a binary file object with openpyxl's write-only
+    workbook, rows fed straight from iter_export_rows (memory stays bounded:
+    openpyxl spools the sheet to disk). Returns the number of data rows.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    rows = 0
+    
+    for row in iter_export_rows(frente, department, role):
+        if not rows:
+            sheet.append(EXPORT_COLUMNS)
+        sheet.append(row)
+        rows += 1
+        if progress and rows % EXPORT_BATCH == 0:
+            progress(rows)
+    
+    if not rows:
+        sheet.append(['Mensagem'])
+        sheet.append([NO_DATA])
+    
+    workbook.save(fileobj)
+    return rows
+
+def export_to_xlsx(frente=None, department=None, role=None):
+    """
+    Export assessment results to a private temporary XLSX file, returned
+    open and rewound. The file is deleted when closed, so concurrent
+    exports never share a path.
+    """
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    write_xlsx(output, frente=frente, department=department, role=role)
+    output.seek(0)
+    return output
+
+# Typed columnar export for BI loads: one row group per PARQUET_ROW_GROUP rows
+PARQUET_ROW_GROUP = 50000
+PARQUET_BLOCK_COLUMNS = {block: f"block_{config['id']}" for block, config in BLOCKS.items()}
+
+def parquet_schema():
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ('user_id', pa.int64()),
+            ('name', pa.string()),
+            ('email', pa.string()),
+            ('frente', category),
+            ('department', category),
+            ('role', category),
+            ('completed_at', pa.timestamp('us', tz='UTC')),
+            ('time_spent_s', pa.int32()),
+            ('raw_score', pa.int32()),
+            ('maturity_level', category)
+        ] + [(column, pa.int32()) for column in PARQUET_BLOCK_COLUMNS.values()]
+    )
+
+def _arrow_arrays(columns, schema):
+    arrays = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[field.name], type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(columns[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def _parquet_table(rows, schema):
+    """Arrow table for one batch of export_query rows."""
+    block_scores = [json.loads(row.block_scores_json) if row.block_scores_json else {} for row in rows]
+    columns = {
+        'user_id': [row.id for row in rows],
+        'name': [row.name for row in rows],
+        'email': [row.email for row in rows],
+        'frente': [row.frente for row in rows],
+        'department': [row.department for row in rows],
+        'role': [row.role for row in rows],
+        'completed_at': [row.ended_at for row in rows],
+        'time_spent_s': [row.time_spent_s for row in rows],
+        'raw_score': [row.raw_score for row in rows],
+        'maturity_level': [row.maturity_level for row in rows],
+        **{
+            column: [scores.get(block) for scores in block_scores]
+            for block, column in PARQUET_BLOCK_COLUMNS.items()
+        }
+    }
+    return _arrow_arrays(columns, schema)
+
+def write_parquet(fileobj, frente=None, department=None, role=None, progress=None, partition=None) -> int:
+    """
+    Write the export as Parquet with typed columns (UTC timestamps,
+    integers, one column per block, dictionary-encoded categories). Rows
+    are streamed from the database and written one row group at a time.
+    Returns the number of rows.
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError('pyarrow is not installed')
+    
+    return _write_parquet_batches(fileobj, parquet_schema(), export_query(frente, department, role, partition),
+                                  _parquet_table, progress)
+
+def _write_parquet_batches(fileobj, schema, statement, to_table, progress=None) -> int:
+    statement = statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH)
+    rows = 0
+    with pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        for batch in db.session.execute(statement).partitions(PARQUET_ROW_GROUP):
+            writer.write_table(to_table(batch, schema))
+            rows += len(batch)
+            if progress:
+                progress(rows)
+        if not rows:
+            writer.write_table(schema.empty_table())
+    return rows
+
+def export_to_parquet(frente=None, department=None, role=None):
+    """Export to a private temporary Parquet file, returned open and rewound (see export_to_xlsx)."""
+    output = tempfile.TemporaryFile(suffix='.parquet')
+    write_parquet(output, frente=frente, department=department, role=role)
+    output.seek(0)
+    return output
+
+# Item-level export: one row per Response, for psychometric analysis
+RESPONSE_EXPORT_COLUMNS = [
+    'ID Resposta', 'ID Sessão', 'Status Sessão', 'ID Usuário', 'Email', 'Frente', 'Departamento', 'Cargo',
+    'ID Item', 'Bloco', 'Enunciado', 'Alternativa', 'Pontos', 'Latência (ms)', 'Data Resposta'
+]
+ANSWER_LETTERS = ('A', 'B', 'C', 'D')
+
+def answer_letter(raw_answer):
+    """Chosen letter as the matrix grader reads it ('option_b' -> 'B'), or None."""
+    if not raw_answer:
+        return None
+    answer = str(raw_answer).strip().upper()
+    if answer in ANSWER_LETTERS:
+        return answer
+    return next((letter for letter in ANSWER_LETTERS if letter in answer), None)
+
+def _mapped_points(metadata_json, raw_answer):
+    """Points of an answer under the item's points_mapping (keys are choice positions, 0 = A)."""
+    letter = answer_letter(raw_answer)
+    if letter is None or not metadata_json:
+        return None
+    mapping = json.loads(metadata_json).get('points_mapping') or {}
+    return mapping.get(str(ANSWER_LETTERS.index(letter)))
+
+def response_export_query(frente=None, department=None, role=None, partition=None):
+    """
+    One row per response joined with its session, user and item, filtered
+    like export_query and ordered by response id. The item's metadata (for
+    its points_mapping) is only selected for responses without stored
+    points, so the common row carries no metadata JSON.
+    """
+    statement = select(
+        Response.id,
+        Response.session_id,
+        Session.status,
+        User.id.label('user_id'),
+        User.email,
+        User.frente,
+        User.department,
+        User.role,
+        Response.item_id,
+        func.coalesce(Item.block, Item.competency).label('block'),
+        Item.stem,
+        Response.raw_answer,
+        Response.matrix_points,
+        case((Response.matrix_points.is_(None), Item.metadata_json)).label('metadata_json'),
+        Response.latency_ms,
+        Response.created_at
+    ).join(
+        Session, Response.session_id == Session.id
+    ).join(
+        User, Session.user_id == User.id
+    ).outerjoin(
+        Item, Response.item_id == Item.id
+    )
     
-    filter_parts = []
     if frente:
-        filter_parts.append(frente.lower())
+        statement = statement.where(User.frente == frente)
     if department:
-        filter_parts.append(department.lower().replace(' ', '_'))
+        statement = statement.where(User.department == department)
     if role:
-        filter_parts.append(role.lower().replace(' ', '_'))
-    
-    filename = 'oaz_profiler'
-    if filter_parts:
-        filename += '_' + '_'.join(filter_parts)
-    filename += '.xlsx'
+        statement = statement.where(User.role == role)
     
-    filepath = f'/tmp/{filename}'
+    return apply_partition(statement, Response.id, partition).order_by(Response.id)
+
+def _response_points(row):
+    """Stored points, or the item's points_mapping for responses graded before they were stored."""
+    if row.matrix_points is not None:
+        return row.matrix_points
+    return _mapped_points(row.metadata_json, row.raw_answer)
+
+def iter_response_rows(frente=None, department=None, role=None, partition=None):
+    """Yield item-level rows (RESPONSE_EXPORT_COLUMNS order) through a server-side cursor."""
+    statement = response_export_query(frente, department, role, partition).execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH
+    )
+    for row in db.session.execute(statement):
+        score = _response_points(row)
+        yield [
+            row.id,
+            row.session_id,
+            row.status,
+            row.user_id,
+            row.email,
+            row.frente,
+            row.department or 'N/A',
+            row.role or 'N/A',
+            row.item_id,
+            row.block or '',
+            row.stem or '',
+            answer_letter(row.raw_answer) or '',
+            score if score is not None else '',
+            row.latency_ms if row.latency_ms is not None else '',
+            row.created_at.strftime('%d/%m/%Y %H:%M:%S') if row.created_at else ''
+        ]
+
+def stream_responses_csv(frente=None, department=None, role=None, stats=None, progress=None):
+    """Generate the item-level CSV export in chunks (see stream_csv)."""
+    yield from _stream_csv(RESPONSE_EXPORT_COLUMNS, iter_response_rows(frente, department, role), stats, progress)
+
+def response_parquet_schema():
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('response_id', pa.int64()),
+        ('session_id', pa.int64()),
+        ('session_status', category),
+        ('user_id', pa.int64()),
+        ('email', category),
+        ('frente', category),
+        ('department', category),
+        ('role', category),
+        ('item_id', pa.int32()),
+        ('block', category),
+        ('stem', category),
+        ('answer', category),
+        ('points', pa.int8()),
+        ('latency_ms', pa.int32()),
+        ('answered_at', pa.timestamp('us', tz='UTC'))
+    ])
+
+def write_responses_parquet(fileobj, frente=None, department=None, role=None, progress=None, partition=None) -> int:
+    """
+    Write the item-level export as Parquet, one row group per
+    PARQUET_ROW_GROUP responses. Repeated strings (stems, blocks, emails,
+    answers) are dictionary-encoded. Returns the number of rows.
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError('pyarrow is not installed')
     
-    if rows:
-        df = pd.DataFrame(rows)
-        df.to_excel(filepath, index=False, engine='openpyxl')
-    else:
-        df = pd.DataFrame({'Mensagem': ['Nenhum dado disponível']})
-        df.to_excel(filepath, index=False, engine='openpyxl')
+    def to_table(rows, schema):
+        columns = {
+            'response_id': [row.id for row in rows],
+            'session_id': [row.session_id for row in rows],
+            'session_status': [row.status for row in rows],
+            'user_id': [row.user_id for row in rows],
+            'email': [row.email for row in rows],
+            'frente': [row.frente for row in rows],
+            'department': [row.department for row in rows],
+            'role': [row.role for row in rows],
+            'item_id': [row.item_id for row in rows],
+            'block': [row.block for row in rows],
+            'stem': [row.stem for row in rows],
+            'answer': [answer_letter(row.raw_answer) for row in rows],
+            'points': [_response_points(row) for row in rows],
+            'latency_ms': [row.latency_ms for row in rows],
+            'answered_at': [row.created_at for row in rows]
+        }
+        return _arrow_arrays(columns, schema)
     
-    return filepath
+    return _write_parquet_batches(fileobj, response_parquet_schema(), response_export_query(frente, department, role, partition),
+                                  to_table, progress)
+
+def export_responses_to_parquet(frente=None, department=None, role=None):
+    """Item-level Parquet export in a private temporary file, returned open and rewound."""
+    output = tempfile.TemporaryFile(suffix='.parquet')
+    write_responses_parquet(output, frente=frente, department=department, role=role)
+    output.seek(0)
+    return output
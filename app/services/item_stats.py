@@ -0,0 +1,179 @@
+"""
+Per-item response statistics, maintained incrementally.
+
+One item_stats row per item holds the response count, counts per chosen
+answer and per matrix_points value, a Welford running mean/variance of
+matrix_points and a fixed-bucket latency histogram. process_response adds
+each answer in its own transaction with constant work (one locked row), user
+deletes subtract their responses, and `flask rebuild-item-stats` recomputes
+everything from the responses table in one streamed pass.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+import math
+from typing import Any, Dict
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Item, ItemStat, Response
+from app.services.exporter import answer_letter
+
+ITEM_STATS_REBUILD_BATCH = 5000
+
+# Item types answered by picking a choice; other types (open_ended,
+# prompt_writing) take free text, which is not counted per answer
+CHOICE_ITEM_TYPES = ('mcq', 'scenario', 'matrix')
+
+# Upper bounds of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (2000, 5000, 10000, 20000, 30000, 60000, 120000)
+LATENCY_BUCKET_LABELS = (
+    ['< 2s'] +
+    [f'{low // 1000}-{high // 1000}s' for low, high in zip(LATENCY_BUCKETS_MS, LATENCY_BUCKETS_MS[1:])] +
+    [f'>= {LATENCY_BUCKETS_MS[-1] // 1000}s']
+)
+
+def empty_totals():
+    return {
+        'responses': 0, 'points_count': 0, 'points_mean': 0.0, 'points_m2': 0.0,
+        'latency_count': 0, 'latency_sum': 0, 'choices': {}, 'points': {},
+        'latency_histogram': [0] * len(LATENCY_BUCKET_LABELS)
+    }
+
+def choice_key(item_type, raw_answer):
+    """Letter counted in the choice distribution, or None for free-text items and unreadable answers."""
+    if item_type not in CHOICE_ITEM_TYPES:
+        return None
+    return answer_letter(raw_answer)
+
+def _add_count(counts, key, sign):
+    if sign < 0 and key not in counts:
+        return
+    value = counts.get(key, 0) + sign
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+def add_response(totals, choice, matrix_points, latency_ms, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one response from an item's totals, in
+    place. choice is the answer's choice_key (None for free text).
+    """
+    totals['responses'] += sign
+    if choice:
+        _add_count(totals['choices'], choice, sign)
+    
+    if matrix_points is not None:
+        _add_count(totals['points'], str(matrix_points), sign)
+        n = totals['points_count']
+        mean = totals['points_mean']
+        if sign > 0:
+            n += 1
+            delta = matrix_points - mean
+            totals['points_mean'] = mean + delta / n
+            totals['points_m2'] += delta * (matrix_points - totals['points_mean'])
+        elif n <= 1:
+            n, totals['points_mean'], totals['points_m2'] = 0, 0.0, 0.0
+        else:
+            # Welford update run backwards
+            n -= 1
+            totals['points_mean'] = (mean * (n + 1) - matrix_points) / n
+            totals['points_m2'] = max(totals['points_m2'] - (matrix_points - totals['points_mean']) * (matrix_points - mean), 0.0)
+        totals['points_count'] = n
+    
+    if latency_ms is not None:
+        totals['latency_count'] += sign
+        totals['latency_sum'] += sign * latency_ms
+        histogram = totals['latency_histogram'] or [0] * len(LATENCY_BUCKET_LABELS)
+        histogram[bisect_right(LATENCY_BUCKETS_MS, latency_ms)] += sign
+        totals['latency_histogram'] = histogram
+    
+    return totals
+
+def stats_from_totals(totals) -> Dict[str, Any]:
+    """Admin payload for one item."""
+    points_count = totals['points_count']
+    histogram = totals['latency_histogram'] or [0] * len(LATENCY_BUCKET_LABELS)
+    return {
+        'response_count': totals['responses'],
+        'points_mean': round(totals['points_mean'], 2) if points_count else None,
+        'points_std': round(math.sqrt(totals['points_m2'] / points_count), 2) if points_count else None,
+        'points_distribution': dict(sorted(totals['points'].items())),
+        'choice_counts': dict(sorted(totals['choices'].items())),
+        'avg_latency_ms': round(totals['latency_sum'] / totals['latency_count']) if totals['latency_count'] else None,
+        'latency_histogram': dict(zip(LATENCY_BUCKET_LABELS, histogram))
+    }
+
+def _locked_stat(item_id):
+    """Fetch an item's stats row with SELECT ... FOR UPDATE, creating it if needed."""
+    query = ItemStat.query.filter_by(item_id=item_id).with_for_update().populate_existing()
+    stat = query.first()
+    if stat is not None:
+        return stat
+    
+    try:
+        with db.session.begin_nested():
+            stat = ItemStat(item_id=item_id)
+            stat.totals = empty_totals()
+            db.session.add(stat)
+    except IntegrityError:
+        # Created concurrently; lock the existing row instead
+        stat = query.one()
+    return stat
+
+def record_response(response):
+    """Add a new response to its item's stats in the caller's transaction."""
+    item = db.session.get(Item, response.item_id)
+    choice = choice_key(item.type if item else None, response.raw_answer)
+    stat = _locked_stat(response.item_id)
+    stat.totals = add_response(stat.totals, choice, response.matrix_points, response.latency_ms)
+
+def remove_session_responses(session_ids):
+    """Subtract the responses of the given sessions (before deleting them)."""
+    if not session_ids:
+        return
+    by_item = defaultdict(list)
+    for item_id, item_type, raw_answer, matrix_points, latency_ms in db.session.query(
+        Response.item_id, Item.type, Response.raw_answer, Response.matrix_points, Response.latency_ms
+    ).outerjoin(Item, Response.item_id == Item.id).filter(Response.session_id.in_(session_ids)):
+        by_item[item_id].append((choice_key(item_type, raw_answer), matrix_points, latency_ms))
+    
+    # Fixed lock order across transactions
+    for item_id in sorted(by_item):
+        stat = _locked_stat(item_id)
+        totals = stat.totals
+        for choice, matrix_points, latency_ms in by_item[item_id]:
+            add_response(totals, choice, matrix_points, latency_ms, sign=-1)
+        if totals['responses'] > 0:
+            stat.totals = totals
+        else:
+            db.session.delete(stat)
+
+def rebuild_item_stats() -> int:
+    """Recompute every item's stats in one streamed pass. Returns the number of items written."""
+    statement = select(
+        Response.item_id, Item.type, Response.raw_answer, Response.matrix_points, Response.latency_ms
+    ).outerjoin(Item, Response.item_id == Item.id).order_by(Response.id).execution_options(
+        yield_per=ITEM_STATS_REBUILD_BATCH
+    )
+    
+    items = defaultdict(empty_totals)
+    for item_id, item_type, raw_answer, matrix_points, latency_ms in db.session.execute(statement):
+        add_response(items[item_id], choice_key(item_type, raw_answer), matrix_points, latency_ms)
+    
+    ItemStat.query.delete()
+    for item_id, totals in items.items():
+        stat = ItemStat(item_id=item_id)
+        stat.totals = totals
+        db.session.add(stat)
+    db.session.commit()
+    
+    return len(items)
+
+def ensure_item_stats():
+    """Build the stats when the table is empty but responses exist."""
+    if db.session.query(ItemStat.item_id).first() is not None:
+        return
+    if db.session.query(Response.id).first() is None:
+        return
+    rebuild_item_stats()
@@ -2,13 +2,26 @@
 Centralized logging service for RPA monitoring.
 Provides structured logging with event tracking for all system operations.
 Integrates with rpa_monitor_client for remote monitoring.
+
+Events for the remote monitor are not sent on the request path: they are
+put on a bounded in-memory queue (RPAShipper) and shipped in batches by a
+background thread. When the monitor is slower than the event rate the
+oldest queued events are dropped and counted; the queue is flushed on
+interpreter shutdown.
 """
+import atexit
 import logging
+import os
 import sys
+import threading
 import time
 import traceback
+from collections import deque
+from contextlib import contextmanager
 from functools import wraps
-from typing import Optional
+from typing import Dict, Optional
+
+from app.services import tracing
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +40,110 @@ except ImportError:
     rpa_log = None
 
 
+RPA_QUEUE_SIZE = int(os.environ.get('RPA_QUEUE_SIZE', '10000'))
+RPA_BATCH_SIZE = int(os.environ.get('RPA_BATCH_SIZE', '200'))
+RPA_FLUSH_TIMEOUT_S = float(os.environ.get('RPA_FLUSH_TIMEOUT_S', '5'))
+
+
+class RPAShipper:
+    """
+    Bounded queue of (level, msg, exc, region, module) events drained by a
+    daemon thread. enqueue() never blocks: when the queue is full the
+    oldest event is dropped. The thread is started on first use, and the
+    shipper starts over in a forked child (which inherits neither the
+    thread nor a usable lock).
+    """
+    
+    def __init__(self, max_size: int = RPA_QUEUE_SIZE, batch_size: int = RPA_BATCH_SIZE):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self._reset()
+    
+    def _reset(self):
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._in_flight = 0
+        self.counters = {'enqueued': 0, 'shipped': 0, 'dropped': 0, 'failed': 0}
+    
+    def enqueue(self, event: tuple):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='rpa-shipper', daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.max_size:
+                self._queue.popleft()
+                self.counters['dropped'] += 1
+            self._queue.append(event)
+            self.counters['enqueued'] += 1
+            self._condition.notify()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+            
+            shipped = failed = 0
+            for event in batch:
+                if _ship(*event):
+                    shipped += 1
+                else:
+                    failed += 1
+            
+            with self._condition:
+                self._in_flight = 0
+                self.counters['shipped'] += shipped
+                self.counters['failed'] += failed
+                self._condition.notify_all()
+    
+    def flush(self, timeout: float = RPA_FLUSH_TIMEOUT_S) -> bool:
+        """Wait until every queued event has been shipped. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {**self.counters, 'queued': len(self._queue)}
+
+
+def _ship(level: str, msg: str, exc: Optional[Exception], region: str, module: str) -> bool:
+    """Send one event to the RPA Monitor (runs on the shipper thread)."""
+    try:
+        if level == 'INFO':
+            rpa_log.info(msg, regiao=region)
+        elif level == 'WARN':
+            rpa_log.warn(msg, regiao=region)
+        elif level == 'ERROR':
+            rpa_log.error(msg, exc=exc, regiao=region)
+            try:
+                rpa_log.screenshot(
+                    filename=f"error_{module}_{int(time.time())}.png",
+                    regiao=region,
+                    nivel="ERROR"
+                )
+            except Exception:
+                pass
+        return True
+    except Exception as e:
+        logging.getLogger(module).debug(f"RPA log failed: {e}")
+        return False
+
+
+rpa_shipper = RPAShipper()
+atexit.register(rpa_shipper.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=rpa_shipper._reset)
+
+
 class RPALogger:
     """Structured logger for RPA monitoring system."""
     
@@ -43,46 +160,43 @@ class RPALogger:
         return msg
     
     def _send_to_rpa(self, level: str, msg: str, exc: Exception = None, regiao: str = None):
-        """Send log to RPA Monitor if available."""
+        """Queue a log for the RPA Monitor, if available (shipped by rpa_shipper)."""
         if not RPA_AVAILABLE or not rpa_log:
             return
-        
-        try:
-            region = regiao or self.module
-            if level == 'INFO':
-                rpa_log.info(msg, regiao=region)
-            elif level == 'WARN':
-                rpa_log.warn(msg, regiao=region)
-            elif level == 'ERROR':
-                rpa_log.error(msg, exc=exc, regiao=region)
-                try:
-                    rpa_log.screenshot(
-                        filename=f"error_{self.module}_{int(time.time())}.png",
-                        regiao=region,
-                        nivel="ERROR"
-                    )
-                except Exception:
-                    pass
-        except Exception as e:
-            self.logger.debug(f"RPA log failed: {e}")
+        rpa_shipper.enqueue((level, msg, exc, regiao or self.module, self.module))
     
     def event_start(self, action: str, details: dict = None):
-        """Log the start of an event/action."""
+        """Log the start of an event/action (opens a trace span)."""
         msg = self._format_message("START", action, details)
         self.logger.info(msg)
         self._send_to_rpa('INFO', msg)
+        tracing.start_span(action, self.module, details)
     
     def event_end(self, action: str, details: dict = None):
-        """Log the end of an event/action."""
+        """Log the end of an event/action (closes its trace span)."""
         msg = self._format_message("END", action, details)
         self.logger.info(msg)
         self._send_to_rpa('INFO', msg)
+        tracing.end_span(action, self.module, details)
     
     def event_success(self, action: str, details: dict = None):
         """Log successful completion of an action."""
         msg = self._format_message("SUCCESS", action, details)
         self.logger.info(msg)
         self._send_to_rpa('INFO', msg)
+        tracing.annotate_span(action, self.module, details)
+    
+    @contextmanager
+    def span(self, action: str, details: dict = None):
+        """event_start/event_end around a block; an exception is logged with event_error."""
+        self.event_start(action, details)
+        try:
+            yield
+        except Exception as e:
+            self.event_error(action, error=e)
+            raise
+        finally:
+            self.event_end(action)
     
     def event_error(self, action: str, error: Exception = None, details: dict = None):
         """Log an error during an action."""
@@ -93,6 +207,7 @@ class RPALogger:
         msg = self._format_message("ERROR", action, error_details)
         self.logger.error(msg)
         self._send_to_rpa('ERROR', msg, exc=error, regiao=self.module)
+        tracing.annotate_span(action, self.module, error_details, status='error')
         if error:
             self.logger.error(f"[TRACEBACK] {traceback.format_exc()}")
     
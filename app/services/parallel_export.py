@@ -0,0 +1,176 @@
+"""
+Partitioned export rendered concurrently in a process pool.
+
+The export is split into partitions: contiguous id ranges (the default,
+which keeps the row order of the serial export) or one partition per frente
+or department. Each partition is rendered into a part file by a worker
+process with its own database connection. The parent concatenates the parts
+in partition order as they complete: CSV parts are appended byte for byte
+after the BOM and header, Parquet parts are copied row group by row group
+into one file. Workers are started with 'spawn', so they never inherit the
+parent's connections or threads.
+
+With one worker (or an in-memory SQLite database, which other processes
+cannot open) the partitions are rendered one after another in-process.
+"""
+import csv
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from flask import Flask, current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import Response, User
+from app.services import exporter
+
+# dataset: (CSV columns, row iterator, Parquet writer, Parquet schema, partition id column)
+DATASETS = {
+    'summary': (exporter.EXPORT_COLUMNS, exporter.iter_export_rows, exporter.write_parquet,
+                exporter.parquet_schema, lambda: User.id),
+    'responses': (exporter.RESPONSE_EXPORT_COLUMNS, exporter.iter_response_rows, exporter.write_responses_parquet,
+                  exporter.response_parquet_schema, lambda: Response.id)
+}
+FORMATS = ('csv', 'parquet')
+PARTITION_BY = ('id',) + tuple(exporter.PARTITION_DIMENSIONS)
+PARTITIONS_PER_WORKER = 4  # id ranges per worker, so uneven ranges still balance
+
+def plan_partitions(dataset: str, partition_by: str, parts: int, frente=None, department=None, role=None) -> List[tuple]:
+    """Partitions (see exporter.apply_partition) covering every row of the export, in output order."""
+    if partition_by == 'id':
+        column = DATASETS[dataset][4]()
+        total = db.session.execute(select(func.count(column))).scalar()
+        step = total // parts if parts > 1 else 0
+        bounds = []
+        for k in range(1, parts if step else 0):
+            value = db.session.execute(select(column).order_by(column).offset(k * step).limit(1)).scalar()
+            if value is not None and (not bounds or value > bounds[-1]):
+                bounds.append(value)
+        edges = [None] + bounds + [None]
+        return [('id', first, end) for first, end in zip(edges, edges[1:])]
+    
+    column = exporter.PARTITION_DIMENSIONS[partition_by]()
+    statement = select(column).distinct().order_by(column)
+    for key, value in (('frente', frente), ('department', department), ('role', role)):
+        if value:
+            statement = statement.where(getattr(User, key) == value)
+    return [(partition_by, value) for value in db.session.execute(statement).scalars()]
+
+def _init_worker(config):
+    app = Flask(__name__)
+    app.config.update(config)
+    db.init_app(app)
+    app.app_context().push()
+
+def _render_partition(job):
+    """Render one partition to a part file; returns (path, rows)."""
+    dataset, export_format, filters, partition, path = job
+    _, iter_rows, write_parquet, _, _ = DATASETS[dataset]
+    if export_format == 'csv':
+        rows = 0
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.writer(output, delimiter=';')
+            for row in iter_rows(partition=partition, **filters):
+                writer.writerow(row)
+                rows += 1
+    else:
+        with open(path, 'wb') as output:
+            rows = write_parquet(output, partition=partition, **filters)
+    return path, rows
+
+def _concatenate_csv(fileobj, columns, parts) -> int:
+    header = io.StringIO()
+    csv.writer(header, delimiter=';').writerow(columns)
+    fileobj.write('\ufeff'.encode('utf-8'))
+    total = 0
+    for path, rows in parts:
+        if rows:
+            if not total:
+                fileobj.write(header.getvalue().encode('utf-8'))
+            with open(path, 'rb') as part:
+                shutil.copyfileobj(part, fileobj)
+            total += rows
+        os.remove(path)
+    if not total:
+        empty = io.StringIO()
+        csv.writer(empty, delimiter=';').writerow([exporter.NO_DATA])
+        fileobj.write(empty.getvalue().encode('utf-8'))
+    return total
+
+def _concatenate_parquet(fileobj, schema, parts) -> int:
+    total = 0
+    with exporter.pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        for path, rows in parts:
+            if rows:
+                part = exporter.pq.ParquetFile(path)
+                for index in range(part.num_row_groups):
+                    writer.write_table(part.read_row_group(index))
+                part.close()
+                total += rows
+            os.remove(path)
+        if not total:
+            writer.write_table(schema.empty_table())
+    return total
+
+def _worker_config():
+    return {
+        key: current_app.config[key]
+        for key in ('SQLALCHEMY_DATABASE_URI', 'SQLALCHEMY_ENGINE_OPTIONS')
+        if key in current_app.config
+    }
+
+def parallel_export(
+    fileobj,
+    export_format: str = 'csv',
+    dataset: str = 'summary',
+    partition_by: str = 'id',
+    workers: Optional[int] = None,
+    frente=None,
+    department=None,
+    role=None
+) -> int:
+    """
+    Write a CSV or Parquet export of a dataset ('summary' or 'responses') to
+    a binary file object, rendering partitions in `workers` processes
+    (EXPORT_PARALLEL_WORKERS, or one per CPU, by default). Returns the
+    number of rows.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f'dataset must be one of {tuple(DATASETS)}')
+    if export_format not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}')
+    if partition_by not in PARTITION_BY:
+        raise ValueError(f'partition_by must be one of {PARTITION_BY}')
+    if export_format == 'parquet' and not exporter.PARQUET_AVAILABLE:
+        raise ValueError('parquet export requires pyarrow')
+    
+    workers = workers or current_app.config.get('EXPORT_PARALLEL_WORKERS') or os.cpu_count() or 1
+    filters = {'frente': frente, 'department': department, 'role': role}
+    partitions = plan_partitions(dataset, partition_by, workers * PARTITIONS_PER_WORKER, **filters)
+    columns, _, _, schema, _ = DATASETS[dataset]
+    
+    with tempfile.TemporaryDirectory(prefix='oaz_export_') as directory:
+        jobs = [
+            (dataset, export_format, filters, partition, os.path.join(directory, f'part-{index:05d}'))
+            for index, partition in enumerate(partitions)
+        ]
+        
+        def concatenate(parts):
+            if export_format == 'csv':
+                return _concatenate_csv(fileobj, columns, parts)
+            return _concatenate_parquet(fileobj, schema(), parts)
+        
+        in_memory = db.engine.url.get_backend_name() == 'sqlite' and db.engine.url.database in (None, '', ':memory:')
+        if workers > 1 and len(jobs) > 1 and not in_memory:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(_worker_config(),)
+            ) as pool:
+                # map() yields in submission order, so parts are appended in order as they finish
+                return concatenate(pool.map(_render_partition, jobs))
+        return concatenate(map(_render_partition, jobs))
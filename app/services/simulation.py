@@ -0,0 +1,307 @@
+"""
+Headless simulated-examinee harness for both assessment engines.
+
+    flask simulate-sessions --engine matrix --sessions 2000 --workers 4
+    flask simulate-sessions --engine legacy --sessions 500 --strategy max_info --bank-size 900
+
+Every worker process builds its own app on an in-memory SQLite database with
+the stub LLM and drives the orchestrators the way the routes do (a fresh
+orchestrator per request). Pool workers are started with 'spawn', so they
+never inherit the parent's connections, threads or app. Examinees have a known true ability, so the
+report covers accuracy (bias, RMSE of final scores, items to stop) as well
+as speed (sessions/s, wall time and DB queries per step).
+"""
+import logging
+import math
+import multiprocessing
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List
+import numpy as np
+from sqlalchemy import event
+from config import Config
+
+ENGINES = ('matrix', 'legacy')
+STEPS = ('start', 'next', 'respond', 'finish')
+
+class SimulationConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = True
+    LLM_PROVIDER = 'stub'
+
+class StepMeter:
+    """Wall time and DB round trips per simulated request."""
+
+    def __init__(self, engine):
+        self.queries = 0
+        self.time_s = defaultdict(float)
+        self.query_counts = defaultdict(int)
+        self.calls = defaultdict(int)
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    @contextmanager
+    def measure(self, step: str):
+        queries, started = self.queries, time.perf_counter()
+        try:
+            yield
+        finally:
+            self.time_s[step] += time.perf_counter() - started
+            self.query_counts[step] += self.queries - queries
+            self.calls[step] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            step: {'calls': self.calls[step], 'time_s': self.time_s[step], 'queries': self.query_counts[step]}
+            for step in self.calls
+        }
+
+def _create_user(db, index: int):
+    from app.models import User
+    user = User(email=f'sim{index}@oaz.co', name=f'Sim {index}', consent_ts=db.func.current_timestamp())
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def _start_session(db, user_id: int) -> int:
+    from app.models import Session
+    session = Session(user_id=user_id, initial_response='Simulação de avaliação', status='active')
+    db.session.add(session)
+    db.session.commit()
+    return session.id
+
+def _add_calibrated_items(db, rng, count: int):
+    """Extra 2PL items spread over the legacy competencies (for CAT runs)."""
+    from app.models import Item
+    db.session.add_all([
+        Item(
+            stem=f'Item simulado {i}',
+            type='mcq',
+            competency=Config.COMPETENCIES[i % len(Config.COMPETENCIES)],
+            difficulty_b=float(rng.normal(0, 1.2)),
+            discrimination_a=float(rng.uniform(0.5, 2.0)),
+            choices=['A', 'B', 'C', 'D'],
+            answer_key='A',
+            tags='simulated'
+        )
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def _legacy_answer(item, theta: float, rng) -> str:
+    """2PL examinee: correct with probability sigmoid(a * (theta - b))."""
+    a = item.discrimination_a if item.discrimination_a is not None else 0.5
+    b = item.difficulty_b if item.difficulty_b is not None else 1.0
+    correct = rng.random() < 1.0 / (1.0 + math.exp(-a * (theta - b)))
+    if item.type in ('open_ended', 'prompt_writing'):
+        if correct:
+            return ('Uso IA com modelo LLM, prompt estruturado, dados de contexto e automação, '
+                    'sempre avaliando ética e segurança antes de aplicar no trabalho. ') * 2
+        return 'Não sei bem.'
+    key = (item.answer_key or 'A').upper()
+    return key if correct else next(letter for letter in 'ABCD' if letter != key)
+
+def _matrix_answer(item, maturity: float, rng) -> str:
+    """Ordinal examinee: picks the option worth round(maturity + noise) points."""
+    points = int(min(4, max(1, round(maturity + rng.normal(0, 0.6)))))
+    mapping = {int(k): v for k, v in item.get_metadata().get('points_mapping', {}).items()}
+    position = next((pos for pos, value in mapping.items() if value == points), points - 1)
+    return 'ABCD'[position]
+
+def _run_matrix_session(db, meter, user_id, rng) -> Dict[str, Any]:
+    from app.agents.orchestrator_matrix import AgentOrchestratorMatrix
+
+    maturity = float(rng.uniform(1.0, 4.0))
+    with meter.measure('start'):
+        session_id = _start_session(db, user_id)
+
+    stop = {'reason': 'continue'}
+    while True:
+        with meter.measure('next'):
+            orchestrator = AgentOrchestratorMatrix(session_id)
+            if orchestrator.should_stop()['should_stop']:
+                break
+            item = orchestrator.get_next_item()
+        if item is None:
+            raise RuntimeError(f'No item for session {session_id}')
+        answer = _matrix_answer(item, maturity, rng)
+        with meter.measure('respond'):
+            orchestrator = AgentOrchestratorMatrix(session_id)
+            orchestrator.process_response(item.id, answer, latency_ms=int(rng.integers(2000, 20000)))
+            stop = orchestrator.should_stop()
+
+    with meter.measure('finish'):
+        orchestrator = AgentOrchestratorMatrix(session_id)
+        result = orchestrator.finalize_assessment()
+
+    true_score = 10 * maturity
+    return {
+        'true': true_score,
+        'estimate': float(result['total_score']),
+        'items': orchestrator.state['items_answered'],
+        'reason': stop['reason'],
+        'level_match': orchestrator._classify_maturity_level(int(round(true_score)))['name'] == result['maturity_level']['name']
+    }
+
+def _run_legacy_session(db, meter, user_id, rng) -> Dict[str, Any]:
+    from app.agents.orchestrator import AgentOrchestrator
+    from app.core.scoring import IRTScorer
+    from app.models import Session
+
+    thetas = {competency: float(rng.normal()) for competency in Config.COMPETENCIES}
+    with meter.measure('start'):
+        session_id = _start_session(db, user_id)
+
+    stop = {'reason': 'continue'}
+    while True:
+        with meter.measure('next'):
+            orchestrator = AgentOrchestrator(session_id)
+            item = orchestrator.get_next_item()
+        if item is None:
+            stop = {'reason': 'bank_exhausted'}
+            break
+        answer = _legacy_answer(item, thetas.get(item.competency, 0.0), rng)
+        with meter.measure('respond'):
+            orchestrator = AgentOrchestrator(session_id)
+            orchestrator.process_response(item.id, answer, latency_ms=int(rng.integers(2000, 20000)))
+            stop = orchestrator.should_stop()
+        if stop['should_stop']:
+            break
+
+    with meter.measure('finish'):
+        orchestrator = AgentOrchestrator(session_id)
+        proficiency = orchestrator.state['proficiency']
+        orchestrator.scorer.save_snapshot(session_id, proficiency)
+        session = db.session.get(Session, session_id)
+        session.status = 'completed'
+        db.session.commit()
+
+    measured = [c for c, data in proficiency.items() if data.get('items_count') and c in thetas]
+    return {
+        'true': [IRTScorer._theta_to_score(thetas[c]) for c in measured],
+        'estimate': [proficiency[c]['score'] for c in measured],
+        'items': orchestrator.state['items_answered'],
+        'reason': stop['reason']
+    }
+
+def run_worker(engine: str, sessions: int, seed: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Simulate `sessions` examinees in this process with an isolated app and database."""
+    # Runs in the CLI process when workers=1: restore its logging afterwards
+    disabled = logging.root.manager.disable
+    if not options.get('verbose'):
+        logging.disable(logging.INFO)
+    try:
+        return _simulate_sessions(engine, sessions, seed, options)
+    finally:
+        logging.disable(disabled)
+
+def _simulate_sessions(engine: str, sessions: int, seed: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    from app import create_app, db
+
+    config = type('WorkerConfig', (SimulationConfig,), {
+        'ITEM_SELECTION_STRATEGY': options.get('strategy') or SimulationConfig.ITEM_SELECTION_STRATEGY,
+        'ABILITY_ESTIMATOR': options.get('estimator') or SimulationConfig.ABILITY_ESTIMATOR
+    })
+    app = create_app(config)
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+
+    outcomes: List[Dict[str, Any]] = []
+    with app.app_context():
+        if options.get('bank_size'):
+            _add_calibrated_items(db, rng, options['bank_size'])
+        meter = StepMeter(db.engine)
+        run_session = _run_matrix_session if engine == 'matrix' else _run_legacy_session
+
+        started = time.perf_counter()
+        for index in range(sessions):
+            user = _create_user(db, seed * 1_000_000 + index)
+            outcomes.append(run_session(db, meter, user.id, rng))
+            db.session.remove()
+        elapsed = time.perf_counter() - started
+
+    return {'elapsed_s': elapsed, 'steps': meter.to_dict(), 'outcomes': outcomes}
+
+def _run_worker_job(args):
+    return run_worker(*args)
+
+def simulate(engine: str, sessions: int, workers: int = 1, seed: int = 0, **options) -> Dict[str, Any]:
+    """Run the simulation (optionally across a process pool) and build the report."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    workers = max(1, min(workers, sessions))
+    shares = [sessions // workers + (1 if i < sessions % workers else 0) for i in range(workers)]
+    jobs = [(engine, share, seed + i, options) for i, share in enumerate(shares)]
+
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_run_worker_job, jobs))
+    else:
+        results = [run_worker(*jobs[0])]
+    wall_s = time.perf_counter() - started
+
+    return build_report(engine, results, wall_s, workers)
+
+def build_report(engine: str, results: List[Dict[str, Any]], wall_s: float, workers: int) -> Dict[str, Any]:
+    outcomes = [o for r in results for o in r['outcomes']]
+    true = np.array([t for o in outcomes for t in np.atleast_1d(o['true'])], dtype=float)
+    estimate = np.array([e for o in outcomes for e in np.atleast_1d(o['estimate'])], dtype=float)
+    items = np.array([o['items'] for o in outcomes], dtype=float)
+
+    steps = {}
+    for step in STEPS:
+        calls = sum(r['steps'].get(step, {}).get('calls', 0) for r in results)
+        if not calls:
+            continue
+        steps[step] = {
+            'calls': calls,
+            'mean_ms': 1000 * sum(r['steps'][step]['time_s'] for r in results if step in r['steps']) / calls,
+            'mean_queries': sum(r['steps'][step]['queries'] for r in results if step in r['steps']) / calls
+        }
+
+    error = estimate - true
+    report = {
+        'engine': engine,
+        'sessions': len(outcomes),
+        'workers': workers,
+        'wall_s': round(wall_s, 3),
+        'sessions_per_s': round(len(outcomes) / wall_s, 2) if wall_s else None,
+        'steps': steps,
+        'items_to_stop': {
+            'mean': float(items.mean()) if items.size else 0.0,
+            'p50': float(np.median(items)) if items.size else 0.0,
+            'max': float(items.max()) if items.size else 0.0
+        },
+        'stop_reasons': dict(Counter(o['reason'] for o in outcomes)),
+        'bias': float(error.mean()) if error.size else None,
+        'rmse': float(np.sqrt(np.mean(error ** 2))) if error.size else None
+    }
+    if engine == 'matrix':
+        report['level_agreement'] = float(np.mean([o['level_match'] for o in outcomes])) if outcomes else None
+    return report
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"engine={report['engine']} sessions={report['sessions']} workers={report['workers']} "
+        f"wall={report['wall_s']}s throughput={report['sessions_per_s']} sessions/s",
+        f"{'step':<10}{'calls':>8}{'mean ms':>10}{'queries':>10}"
+    ]
+    for step, data in report['steps'].items():
+        lines.append(f"{step:<10}{data['calls']:>8}{data['mean_ms']:>10.2f}{data['mean_queries']:>10.1f}")
+    lines.append(
+        f"items to stop: mean={report['items_to_stop']['mean']:.1f} p50={report['items_to_stop']['p50']:.0f} "
+        f"max={report['items_to_stop']['max']:.0f} reasons={report['stop_reasons']}"
+    )
+    if report['bias'] is not None:
+        lines.append(f"score bias={report['bias']:+.2f} rmse={report['rmse']:.2f}")
+    if 'level_agreement' in report:
+        lines.append(f"maturity level agreement={report['level_agreement']:.1%}")
+    return '\n'.join(lines)
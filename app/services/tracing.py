@@ -0,0 +1,278 @@
+"""
+Request tracing built on RPALogger events.
+
+Every event_start opens a span and the matching event_end closes it, so the
+start/end pairs that already bracket routes and agent steps form a tree per
+request: monotonic start and duration, nesting through a contextvar, the
+event details as attributes, and status 'error' when an event_error was
+logged for the span. Database time is attributed to the innermost open span
+through SQLAlchemy cursor events, so a trace shows how a request splits
+across queries, LLM generation and validation.
+
+A root span is opened per request (before_request) and closed in
+teardown_request, which also records the finished trace in a ring buffer of
+the TRACE_BUFFER_SIZE most recent requests per worker
+(app.extensions['request_traces']). Events logged outside a traced request
+(CLI commands, background threads) create no spans.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_EXTENSION_KEY = 'request_traces'
+
+MAX_SPANS_PER_TRACE = 500  # further spans of a runaway request are counted, not kept
+MAX_ATTRIBUTE_LENGTH = 200
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed step of a request; children are the steps it started."""
+
+    __slots__ = ('name', 'module', 'parent', 'trace', 'start', 'end', 'attributes', 'status',
+                 'db_ms', 'db_queries', 'children')
+
+    def __init__(self, name: str, module: str, parent: Optional['Span'] = None, trace: Optional['Trace'] = None):
+        self.name = name
+        self.module = module
+        self.parent = parent
+        self.trace = trace
+        self.start = time.perf_counter()
+        self.end = None
+        self.attributes: Dict[str, Any] = {}
+        self.status = 'ok'
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.children: List['Span'] = []
+
+    def set_attributes(self, details: Optional[Dict[str, Any]]):
+        for key, value in (details or {}).items():
+            if not isinstance(value, (int, float, bool, type(None))):
+                value = str(value)[:MAX_ATTRIBUTE_LENGTH]
+            self.attributes[str(key)] = value
+
+    def finish(self, status: Optional[str] = None):
+        if self.end is None:
+            self.end = time.perf_counter()
+        if status and self.status == 'ok':
+            self.status = status
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        children = [child.to_dict(origin) for child in self.children]
+        return {
+            'name': self.name,
+            'module': self.module,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round((end - self.start) * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+            'db_ms': round(self.db_ms, 3),
+            'db_queries': self.db_queries,
+            'db_ms_total': round(_db_total(self), 3),
+            'children': children
+        }
+
+
+class Trace:
+    """The span tree of one request."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.started_at = datetime.utcnow()
+        self.span_count = 0
+        self.dropped_spans = 0
+        self.root = Span(name, 'request', trace=self)
+
+    def summary(self) -> Dict[str, Any]:
+        root = self.root
+        end = root.end if root.end is not None else time.perf_counter()
+        return {
+            'id': self.id,
+            'name': root.name,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round((end - root.start) * 1000, 3),
+            'status': root.status,
+            'status_code': root.attributes.get('status_code'),
+            'spans': self.span_count,
+            'dropped_spans': self.dropped_spans,
+            'db_ms': round(_db_total(root), 3),
+            'db_queries': _db_queries(root)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), 'root': self.root.to_dict(self.root.start)}
+
+
+def _db_total(span: Span) -> float:
+    return span.db_ms + sum(_db_total(child) for child in span.children)
+
+def _db_queries(span: Span) -> int:
+    return span.db_queries + sum(_db_queries(child) for child in span.children)
+
+
+# --- Spans from logger events --------------------------------------------------
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, module: str, details: Optional[Dict[str, Any]] = None):
+    """Open a child of the current span (no-op outside a traced request)."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    trace = parent.trace
+    if trace.span_count >= MAX_SPANS_PER_TRACE:
+        trace.dropped_spans += 1
+        return
+    span = Span(name, module, parent, trace)
+    span.set_attributes(details)
+    trace.span_count += 1
+    parent.children.append(span)
+    _current_span.set(span)
+
+def _find_open(name: str, module: str) -> Optional[Span]:
+    span = _current_span.get()
+    while span is not None and span.parent is not None:
+        if span.name == name and span.module == module:
+            return span
+        span = span.parent
+    return None
+
+def end_span(name: str, module: str, details: Optional[Dict[str, Any]] = None):
+    """
+    Close the innermost open span with this name. Spans opened inside it and
+    never ended are closed with it (status 'unclosed').
+    """
+    span = _find_open(name, module)
+    if span is None:
+        return
+    inner = _current_span.get()
+    while inner is not span:
+        inner.finish('unclosed')
+        inner = inner.parent
+    span.set_attributes(details)
+    span.finish()
+    _current_span.set(span.parent)
+
+def annotate_span(name: str, module: str, details: Optional[Dict[str, Any]] = None, status: Optional[str] = None):
+    """Add attributes (and optionally a status) to the open span of an event, or to the current span."""
+    span = _find_open(name, module) or _current_span.get()
+    if span is None:
+        return
+    span.set_attributes(details)
+    if status:
+        span.status = status
+
+
+# --- Database time -------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('trace_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('trace_query_start')
+    if not starts:
+        return
+    started = starts.pop()
+    span = _current_span.get()
+    if span is not None:
+        span.db_ms += (time.perf_counter() - started) * 1000
+        span.db_queries += 1
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get('trace_query_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+def _install_db_listeners():
+    global _listeners_installed
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_installed = True
+
+
+# --- Request traces ------------------------------------------------------------
+
+class TraceBuffer:
+    """Ring buffer of the most recent finished traces of this worker."""
+
+    def __init__(self, size: int):
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def list(self) -> List[Trace]:
+        with self._lock:
+            return list(reversed(self._traces))
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((trace for trace in self._traces if trace.id == trace_id), None)
+
+def get_trace_buffer(app=None) -> TraceBuffer:
+    app = app or current_app
+    buffer = app.extensions.get(_EXTENSION_KEY)
+    if buffer is None:
+        buffer = app.extensions.setdefault(_EXTENSION_KEY, TraceBuffer(app.config.get('TRACE_BUFFER_SIZE', 200)))
+    return buffer
+
+def _start_request_trace():
+    if request.endpoint in ('static', 'admin.list_traces', 'admin.get_trace'):
+        return
+    trace = Trace(f'{request.method} {request.path}')
+    g.trace = trace
+    g.trace_token = _current_span.set(trace.root)
+
+def _record_status(response):
+    trace = g.get('trace')
+    if trace is not None:
+        trace.root.set_attributes({'status_code': response.status_code})
+        if response.status_code >= 500:
+            trace.root.status = 'error'
+    return response
+
+def _finish_request_trace(exception=None):
+    trace = g.pop('trace', None)
+    token = g.pop('trace_token', None)
+    if trace is None:
+        return
+    span = _current_span.get()
+    while span is not None and span is not trace.root:
+        span.finish('unclosed')
+        span = span.parent
+    trace.root.finish('error' if exception is not None else None)
+    try:
+        _current_span.reset(token)
+    except (ValueError, TypeError):
+        # Torn down in another context (e.g. after a streamed response)
+        _current_span.set(None)
+    get_trace_buffer().add(trace)
+
+def init_tracing(app):
+    """Trace every request of the app (unless TRACING_ENABLED is false)."""
+    if not app.config.get('TRACING_ENABLED', True):
+        return
+    _install_db_listeners()
+    get_trace_buffer(app)
+    app.before_request(_start_request_trace)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request_trace)
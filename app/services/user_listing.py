@@ -0,0 +1,194 @@
+"""
+Admin users listing: latest completed result per user, filtered, sorted and
+keyset-paginated in the database.
+
+Each user's latest completed session (and its first snapshot) is joined with
+a correlated LIMIT 1 lookup, i.e. a lateral join served by the
+(status, user_id, ended_at) index on sessions, so a page is a single query
+regardless of the number of users. A ROW_NUMBER() derived table would be
+equivalent on PostgreSQL, but SQLite joins it without an index. Cursors
+encode the (sort value, user id) of the last row and continue with a
+row-value comparison, so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import and_, func, literal, or_, select, tuple_
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import User, Session, ProficiencySnapshot
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NO_DATE = datetime(1970, 1, 1)  # sort value of users without a completed session
+SORTS = ('score_desc', 'score_asc', 'name', 'date')
+
+class InvalidCursor(ValueError):
+    pass
+
+def _with_latest_result(statement):
+    """Outer-join each user's latest completed Session and its first ProficiencySnapshot."""
+    candidate = aliased(Session)
+    latest_session_id = select(candidate.id).where(
+        candidate.user_id == User.id,
+        candidate.status == 'completed'
+    ).order_by(
+        candidate.ended_at.desc().nulls_last(), candidate.id.desc()
+    ).limit(1).correlate(User).scalar_subquery()
+
+    snapshot = aliased(ProficiencySnapshot)
+    first_snapshot_id = select(func.min(snapshot.id)).where(
+        snapshot.session_id == Session.id
+    ).correlate(Session).scalar_subquery()
+
+    return statement.select_from(User).outerjoin(
+        Session, Session.id == latest_session_id
+    ).outerjoin(
+        ProficiencySnapshot, ProficiencySnapshot.id == first_snapshot_id
+    )
+
+SORT_KEYS = {
+    'score_desc': (lambda: func.coalesce(ProficiencySnapshot.raw_score, 0), True),
+    'score_asc': (lambda: func.coalesce(ProficiencySnapshot.raw_score, 0), False),
+    'name': (lambda: func.coalesce(User.name, ''), False),
+    'date': (lambda: func.coalesce(Session.ended_at, literal(NO_DATE, db.DateTime)), True),
+}
+
+def encode_cursor(sort: str, value, user_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, user_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(cursor: str, sort: str):
+    """Return (sort value, user id); the cursor must come from the same sort."""
+    try:
+        cursor_sort, value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if cursor_sort != sort or not isinstance(user_id, int):
+            raise ValueError('cursor belongs to another sort')
+        if sort == 'date':
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+    return value, user_id
+
+def _filter_conditions(filters: Dict[str, Any]):
+    conditions = []
+    if filters.get('department'):
+        conditions.append(User.department == filters['department'])
+    if filters.get('role'):
+        conditions.append(User.role == filters['role'])
+    if filters.get('frente'):
+        conditions.append(User.frente == filters['frente'])
+    if filters.get('level'):
+        if filters['level'] == 'Pendente':
+            conditions.append(Session.id.is_(None))
+        elif filters['level'] == 'Sem dados':
+            conditions.append(and_(Session.id.isnot(None), ProficiencySnapshot.id.is_(None)))
+        else:
+            conditions.append(ProficiencySnapshot.maturity_level == filters['level'])
+    if filters.get('date_from'):
+        conditions.append(Session.ended_at >= filters['date_from'])
+    if filters.get('date_to'):
+        conditions.append(Session.ended_at < filters['date_to'])
+    if filters.get('q'):
+        pattern = f"%{filters['q'].lower()}%"
+        conditions.append(or_(func.lower(User.name).like(pattern), func.lower(User.email).like(pattern)))
+    return conditions
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    if row.session_id is None:
+        maturity_level = 'Pendente'
+    elif row.snapshot_id is None:
+        maturity_level = 'Sem dados'
+    else:
+        maturity_level = row.maturity_level or 'N/A'
+
+    return {
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'department': row.department or 'N/A',
+        'role': row.role or 'N/A',
+        'raw_score': row.raw_score,
+        'maturity_level': maturity_level,
+        'completed_at': row.ended_at.isoformat() if row.ended_at else None,
+        'time_spent_s': row.time_spent_s
+    }
+
+def list_users(
+    filters: Optional[Dict[str, Any]] = None,
+    sort: str = 'score_desc',
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    One page of users with their latest completed result.
+
+    filters: department, role, frente, level (maturity level, 'Pendente' or
+    'Sem dados'), date_from/date_to (datetimes on the session end), q (name
+    or email substring). Returns {'users': [...], 'next_cursor': str | None}.
+    """
+    if sort not in SORTS:
+        raise ValueError(f'unknown sort: {sort}')
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    sort_key, descending = SORT_KEYS[sort]
+    sort_key = sort_key()
+
+    statement = _with_latest_result(select(
+        User.id, User.name, User.email, User.department, User.role,
+        Session.id.label('session_id'), ProficiencySnapshot.id.label('snapshot_id'),
+        Session.ended_at, Session.time_spent_s,
+        ProficiencySnapshot.raw_score, ProficiencySnapshot.maturity_level,
+        sort_key.label('sort_value')
+    ))
+
+    conditions = _filter_conditions(filters or {})
+    if cursor:
+        value, user_id = decode_cursor(cursor, sort)
+        position = tuple_(sort_key, User.id)
+        conditions.append(position < tuple_(value, user_id) if descending else position > tuple_(value, user_id))
+    if conditions:
+        statement = statement.where(*conditions)
+
+    if descending:
+        statement = statement.order_by(sort_key.desc(), User.id.desc())
+    else:
+        statement = statement.order_by(sort_key.asc(), User.id.asc())
+
+    rows = db.session.execute(statement.limit(limit + 1)).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(sort, last.sort_value, last.id)
+
+    return {'users': [_row_to_dict(row) for row in page], 'next_cursor': next_cursor}
+
+def summarize_users(filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Totals for the stats cards over the whole filtered set (not just one page)."""
+    statement = _with_latest_result(select(
+        func.count(User.id),
+        func.count(ProficiencySnapshot.raw_score),
+        func.avg(ProficiencySnapshot.raw_score)
+    ))
+
+    conditions = _filter_conditions(filters or {})
+    if conditions:
+        statement = statement.where(*conditions)
+
+    total, completed, average = db.session.execute(statement).one()
+    return {
+        'total': total,
+        'completed': completed,
+        'avg_score': round(float(average), 1) if average is not None else 0
+    }
+
+def user_facets() -> Dict[str, Any]:
+    """Distinct departments and roles for the filter dropdowns."""
+    return {
+        'departments': [value for (value,) in db.session.query(User.department).distinct().order_by(User.department) if value],
+        'roles': [value for (value,) in db.session.query(User.role).distinct().order_by(User.role) if value]
+    }
@@ -0,0 +1,246 @@
+"""
+Columnar in-memory engine for what-if scoring of completed assessments.
+
+Completed matrix snapshots are held as NumPy columns: raw score, a
+(snapshots x blocks) score matrix in BLOCKS order, and dictionary-encoded
+department, role and frente codes. Re-classifying everyone under other
+MATURITY_LEVELS boundaries or block weights is then a few vectorized
+operations (weighted sum, searchsorted, bincount) instead of a database
+recomputation.
+
+One frame is held per Flask app (i.e. per worker). It refreshes
+incrementally: when the stats data version changes, snapshots with a higher
+id are appended; if rows below the loaded high-water mark appeared or
+disappeared (user deletes, out-of-order commits), it reloads in full.
+"""
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+
+from app import db
+from app.models import User, Session, ProficiencySnapshot
+from app.core.blocks_config import BLOCKS, MATURITY_LEVELS
+from app.services.analytics import NOT_INFORMED
+from app.services.cache import current_data_version
+
+_EXTENSION_KEY = 'whatif_snapshot_frame'
+
+BLOCK_NAMES = list(BLOCKS)
+LEVEL_NAMES = list(MATURITY_LEVELS)
+BLOCK_MAX_SCORES = np.array([BLOCKS[block]['question_count'] * 4 for block in BLOCK_NAMES], dtype=np.float64)
+DEFAULT_THRESHOLDS = {level: MATURITY_LEVELS[level]['min_score'] for level in LEVEL_NAMES}
+GROUP_DIMENSIONS = ('department', 'role', 'frente')
+
+
+class SnapshotFrame:
+    """Columns of every completed snapshot with a raw score, sorted by snapshot id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.version: Optional[int] = None
+        self.snapshot_ids = np.empty(0, dtype=np.int64)
+        self.raw_scores = np.empty(0, dtype=np.float64)
+        self.block_scores = np.empty((0, len(BLOCK_NAMES)), dtype=np.float64)
+        self.codes = {dimension: np.empty(0, dtype=np.int32) for dimension in GROUP_DIMENSIONS}
+        self.labels: Dict[str, List[str]] = {dimension: [] for dimension in GROUP_DIMENSIONS}
+        self._label_codes: Dict[str, Dict[str, int]] = {dimension: {} for dimension in GROUP_DIMENSIONS}
+
+    def __len__(self):
+        return int(self.snapshot_ids.size)
+
+    @staticmethod
+    def _completed_snapshots():
+        return select(
+            ProficiencySnapshot.id,
+            ProficiencySnapshot.raw_score,
+            ProficiencySnapshot.block_scores_json,
+            User.frente,
+            User.department,
+            User.role
+        ).join(
+            Session, ProficiencySnapshot.session_id == Session.id
+        ).join(
+            User, Session.user_id == User.id
+        ).where(
+            Session.status == 'completed',
+            ProficiencySnapshot.raw_score.isnot(None)
+        )
+
+    def _code(self, dimension: str, label: str) -> int:
+        codes = self._label_codes[dimension]
+        if label not in codes:
+            codes[label] = len(self.labels[dimension])
+            self.labels[dimension].append(label)
+        return codes[label]
+
+    def _append(self, rows):
+        if not rows:
+            return
+        block_index = {block: i for i, block in enumerate(BLOCK_NAMES)}
+        blocks = np.zeros((len(rows), len(BLOCK_NAMES)), dtype=np.float64)
+        codes = {dimension: np.empty(len(rows), dtype=np.int32) for dimension in GROUP_DIMENSIONS}
+
+        for i, (_, _, block_scores_json, frente, department, role) in enumerate(rows):
+            for block, score in (json.loads(block_scores_json) if block_scores_json else {}).items():
+                if block in block_index:
+                    blocks[i, block_index[block]] = score
+            codes['department'][i] = self._code('department', department or NOT_INFORMED)
+            codes['role'][i] = self._code('role', role or NOT_INFORMED)
+            codes['frente'][i] = self._code('frente', frente or NOT_INFORMED)
+
+        self.snapshot_ids = np.concatenate([self.snapshot_ids, np.array([row[0] for row in rows], dtype=np.int64)])
+        self.raw_scores = np.concatenate([self.raw_scores, np.array([row[1] for row in rows], dtype=np.float64)])
+        self.block_scores = np.vstack([self.block_scores, blocks])
+        for dimension in GROUP_DIMENSIONS:
+            self.codes[dimension] = np.concatenate([self.codes[dimension], codes[dimension]])
+
+    def refresh(self, version: int) -> str:
+        """
+        Bring the frame up to date for a data version. Returns 'current',
+        'incremental' or 'full' (which kind of load was needed).
+        """
+        with self._lock:
+            if self.version == version:
+                return 'current'
+
+            statement = self._completed_snapshots()
+            high_water = int(self.snapshot_ids[-1]) if len(self) else None
+            kind = 'full'
+            if high_water is not None:
+                loaded_range = statement.with_only_columns(func.count()).where(ProficiencySnapshot.id <= high_water)
+                if db.session.execute(loaded_range).scalar() == len(self):
+                    kind = 'incremental'
+                    statement = statement.where(ProficiencySnapshot.id > high_water)
+
+            if kind == 'full':
+                self._reset()
+            self._append(db.session.execute(statement.order_by(ProficiencySnapshot.id)).all())
+            self.version = version
+            return kind
+
+    def evaluate(
+        self,
+        thresholds: Optional[Dict[str, float]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        group_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-classify all snapshots under alternative level boundaries and/or
+        block weights. Weighted totals are rescaled to the original 10-40
+        scale (sum(w*s) * sum(max) / sum(w*max)), so the default weights
+        reproduce raw_score and thresholds stay comparable.
+        """
+        mins, weight_vector = _validate(thresholds, weights, group_by)
+        with self._lock:
+            return self._evaluate(mins, weight_vector, weights is not None, group_by)
+
+    def _evaluate(self, mins, weight_vector, weighted, group_by):
+        baseline_levels = _classify(self.raw_scores, _threshold_array(DEFAULT_THRESHOLDS))
+        scores = _weighted_scores(self.block_scores, weight_vector) if weighted else self.raw_scores
+        levels = _classify(scores, mins)
+
+        n_levels = len(LEVEL_NAMES)
+        transitions = np.bincount(baseline_levels * n_levels + levels, minlength=n_levels * n_levels)\
+            .reshape(n_levels, n_levels)
+
+        result = {
+            'count': len(self),
+            'avg_score': round(float(scores.mean()), 2) if len(self) else 0,
+            'thresholds': dict(zip(LEVEL_NAMES, mins.tolist())),
+            'weights': dict(zip(BLOCK_NAMES, weight_vector.tolist())),
+            'baseline': _distribution(np.bincount(baseline_levels, minlength=n_levels)),
+            'scenario': _distribution(np.bincount(levels, minlength=n_levels)),
+            'transitions': {
+                level: _distribution(row) for level, row in zip(LEVEL_NAMES, transitions)
+            }
+        }
+
+        if group_by:
+            codes = self.codes[group_by]
+            n_groups = len(self.labels[group_by])
+            counts = np.bincount(codes * n_levels + levels, minlength=n_groups * n_levels).reshape(n_groups, n_levels)
+            sums = np.bincount(codes, weights=scores, minlength=n_groups)
+            sizes = counts.sum(axis=1)
+            result['groups'] = {
+                label: {
+                    'count': int(sizes[code]),
+                    'avg_score': round(float(sums[code] / sizes[code]), 2),
+                    'scenario': _distribution(counts[code])
+                }
+                for code, label in enumerate(self.labels[group_by]) if sizes[code]
+            }
+
+        return result
+
+
+def _threshold_array(thresholds: Dict[str, float]) -> np.ndarray:
+    return np.array([float(thresholds[level]) for level in LEVEL_NAMES], dtype=np.float64)
+
+def _validate(thresholds, weights, group_by) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (level minimums, block weights); raises ValueError on bad input."""
+    if group_by is not None and group_by not in GROUP_DIMENSIONS:
+        raise ValueError(f'group_by must be one of {GROUP_DIMENSIONS}')
+
+    if not isinstance(thresholds or {}, dict) or not isinstance(weights or {}, dict):
+        raise ValueError('thresholds and weights must be objects')
+
+    merged = dict(DEFAULT_THRESHOLDS)
+    for level, value in (thresholds or {}).items():
+        if level not in merged:
+            raise ValueError(f'unknown level: {level}')
+        merged[level] = value
+    try:
+        mins = _threshold_array(merged)
+    except (TypeError, ValueError):
+        raise ValueError('thresholds must be numbers')
+    if not np.all(np.isfinite(mins)):
+        raise ValueError('thresholds must be finite')
+    if not np.all(np.diff(mins) > 0):
+        raise ValueError('level thresholds must be strictly increasing in level order')
+
+    weight_vector = np.ones(len(BLOCK_NAMES), dtype=np.float64)
+    for block, value in (weights or {}).items():
+        if block not in BLOCKS:
+            raise ValueError(f'unknown block: {block}')
+        try:
+            weight_vector[BLOCK_NAMES.index(block)] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError('weights must be numbers')
+    # float() accepts 'nan' and 'inf', which would turn every weighted score into NaN
+    if not np.all(np.isfinite(weight_vector)):
+        raise ValueError('weights must be finite')
+    if np.any(weight_vector < 0) or not np.any(weight_vector > 0):
+        raise ValueError('weights must be non-negative and not all zero')
+
+    return mins, weight_vector
+
+def _weighted_scores(block_scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    scale = BLOCK_MAX_SCORES.sum() / float(weights @ BLOCK_MAX_SCORES)
+    return (block_scores @ weights) * scale
+
+def _classify(scores: np.ndarray, mins: np.ndarray) -> np.ndarray:
+    """Level index per score; scores below the first minimum count as the first level."""
+    return np.maximum(np.searchsorted(mins, scores, side='right') - 1, 0)
+
+def _distribution(counts) -> Dict[str, int]:
+    return {level: int(count) for level, count in zip(LEVEL_NAMES, counts)}
+
+
+def get_snapshot_frame() -> SnapshotFrame:
+    """
+    Return this worker's frame, refreshed to the current data version. Reading
+    the version is one primary-key query per call; when it is unchanged the
+    snapshots are not queried.
+    """
+    frame = current_app.extensions.get(_EXTENSION_KEY)
+    if frame is None:
+        frame = current_app.extensions.setdefault(_EXTENSION_KEY, SnapshotFrame())
+    frame.refresh(current_data_version())
+    return frame
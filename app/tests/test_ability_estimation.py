@@ -0,0 +1,136 @@
+import pytest
+import numpy as np
+from app import create_app, db
+from app.agents.scorer import AgentScorer
+from app.core import ability_estimation
+from app.models import Item, Response, Session, User
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_batch_update_matches_sequential_updates():
+    """Test batch and order-free accumulation agree with one-at-a-time updates."""
+    rng = np.random.default_rng(3)
+    a = rng.uniform(0.5, 2.0, 20)
+    b = rng.normal(size=20)
+    x = rng.random(20)
+    prior = ability_estimation.prior_from_summary(50.0, 20.0, 80.0)
+
+    sequential = prior
+    for i in range(20):
+        sequential = ability_estimation.update(sequential, a[i], b[i], x[i])
+
+    accumulated = ability_estimation.accumulate([prior], np.zeros(20), a, b, x)[0]
+    assert np.allclose(sequential, accumulated)
+
+    batched = ability_estimation.batch_update(np.tile(prior, (20, 1)), a, b, x)
+    for i in range(20):
+        assert np.allclose(batched[i], ability_estimation.update(prior, a[i], b[i], x[i]))
+
+def test_eap_recovers_ability_and_ci_shrinks_with_information():
+    """Test the EAP converges to the true theta and informative items narrow the CI more."""
+    rng = np.random.default_rng(5)
+    true_theta = 0.8
+    b = rng.normal(size=400)
+    prior = ability_estimation.prior_from_summary(50.0, 20.0, 80.0)
+
+    def simulate(a):
+        p = 1.0 / (1.0 + np.exp(-a * (true_theta - b)))
+        x = (rng.random(400) < p).astype(float)
+        return ability_estimation.accumulate([prior], np.zeros(400), np.full(400, a), b, x)[0]
+
+    eap, _, sd_sharp = ability_estimation.posterior_moments(simulate(2.0))
+    _, _, sd_flat = ability_estimation.posterior_moments(simulate(0.5))
+
+    assert eap == pytest.approx(true_theta, abs=0.25)
+    assert sd_sharp < sd_flat
+
+def test_replay_matches_incremental_updates(app):
+    """Test get_current_proficiency reproduces the incremental posterior state."""
+    with app.app_context():
+        user = User(email='test@oaz.co', consent_ts=db.func.current_timestamp())
+        db.session.add(user)
+        db.session.commit()
+        session = Session(user_id=user.id, initial_response='', status='active')
+        db.session.add(session)
+        db.session.commit()
+
+        competencies = Config.COMPETENCIES[:3]
+        items = [
+            Item(stem=f'Q{i}', type='mcq', competency=competencies[i % 3],
+                 difficulty_b=-1.0 + 0.4 * i, discrimination_a=0.6 + 0.1 * i, answer_key='A')
+            for i in range(6)
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+
+        scorer = AgentScorer()
+        proficiency = scorer.get_current_proficiency(session.id)
+        for i, item in enumerate(items):
+            score = float(i % 2)
+            db.session.add(Response(session_id=session.id, item_id=item.id, graded_score_0_1=score))
+            proficiency = scorer.update_proficiency(session.id, item, score, proficiency)
+        db.session.commit()
+
+        session.posterior = None
+        db.session.commit()
+        replayed = AgentScorer().get_current_proficiency(session.id)
+
+        for competency in competencies:
+            assert replayed[competency]['items_count'] == 2
+            assert replayed[competency]['score'] == pytest.approx(proficiency[competency]['score'])
+            assert replayed[competency]['ci_high'] - replayed[competency]['ci_low'] == pytest.approx(
+                proficiency[competency]['ci_high'] - proficiency[competency]['ci_low'])
+            assert proficiency[competency]['ci_high'] - proficiency[competency]['ci_low'] < 60.0
+
+def test_stored_posterior_resumes_without_replay(app):
+    """Test a new scorer resumes from the session's posterior and replays once it is stale."""
+    with app.app_context():
+        user = User(email='test@oaz.co', consent_ts=db.func.current_timestamp())
+        db.session.add(user)
+        db.session.commit()
+        session = Session(user_id=user.id, initial_response='', status='active')
+        db.session.add(session)
+        competency = Config.COMPETENCIES[0]
+        items = [
+            Item(stem=f'Q{i}', type='mcq', competency=competency,
+                 difficulty_b=0.5 * i, discrimination_a=1.0, answer_key='A')
+            for i in range(3)
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+
+        scorer = AgentScorer()
+        proficiency = scorer.get_current_proficiency(session.id)
+        for item in items[:2]:
+            db.session.add(Response(session_id=session.id, item_id=item.id, graded_score_0_1=1.0))
+            proficiency = scorer.update_proficiency(session.id, item, 1.0, proficiency)
+            db.session.commit()
+        assert session.posterior['responses'] == 2
+
+        resumed_scorer = AgentScorer()
+        resumed = resumed_scorer.get_current_proficiency(session.id)
+        assert resumed == proficiency
+        resumed = resumed_scorer.update_proficiency(session.id, items[2], 0.0, resumed)
+        proficiency = scorer.update_proficiency(session.id, items[2], 0.0, proficiency)
+        assert resumed[competency]['score'] == pytest.approx(proficiency[competency]['score'])
+        db.session.rollback()
+
+        # A response stored without the scorer makes the posterior stale
+        db.session.add(Response(session_id=session.id, item_id=items[2].id, graded_score_0_1=0.0))
+        db.session.commit()
+        replayed = AgentScorer().get_current_proficiency(session.id)
+        assert replayed[competency]['items_count'] == 3
+        assert replayed[competency]['score'] == pytest.approx(proficiency[competency]['score'])
@@ -0,0 +1,159 @@
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.services import activity
+from app.models import ActivityRollup, ProficiencySnapshot, Session, User
+from app.services.activity import (
+    get_activity_quantiles, get_activity_series, rebuild_activity_rollups, record_session_completed,
+    record_session_started, sweep_abandoned_sessions
+)
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+DAY = datetime(2026, 3, 2)
+
+def _start(email, department, started_at):
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        user = User(email=email, department=department)
+        db.session.add(user)
+        db.session.flush()
+    session = Session(user_id=user.id, status='active', started_at=started_at)
+    db.session.add(session)
+    db.session.flush()
+    record_session_started(session)
+    db.session.commit()
+    return session
+
+def _complete(session, minutes, raw_score, level):
+    db.session.add(ProficiencySnapshot(session_id=session.id, raw_score=raw_score, maturity_level=level))
+    session.status = 'completed'
+    session.ended_at = session.started_at + timedelta(minutes=minutes)
+    session.time_spent_s = minutes * 60
+    record_session_completed(session, raw_score, level)
+    db.session.commit()
+
+def _snapshot_rows():
+    return sorted(
+        (row.granularity, row.dimension, row.group_key, row.bucket_start, row.sessions_started,
+         row.sessions_completed, row.sessions_abandoned, row.time_spent_sum, row.time_spent_count,
+         row.score_sum, row.score_count, tuple(sorted(row.level_counts.items())))
+        for row in ActivityRollup.query.all()
+        if row.sessions_started or row.sessions_completed or row.sessions_abandoned
+    )
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        first = _start('ana@oaz.co', 'TI', DAY.replace(hour=9, minute=10))
+        _complete(first, 20, 30, 'Praticante')
+        second = _start('caio@thesaint.com.br', 'RH', DAY.replace(hour=9, minute=50))
+        _complete(second, 30, 12, 'Iniciante')  # ends at 10:20
+        _start('bia@oaz.co', 'TI', DAY.replace(hour=11))
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_hourly_series_buckets_events(app):
+    """Test started counts by started_at and completions by ended_at, with zero-filled gaps."""
+    with app.app_context():
+        series = get_activity_series('hour', DAY.replace(hour=9), DAY.replace(hour=13))['OAZ Global']
+
+    assert [point['started'] for point in series] == [2, 0, 1, 0]
+    assert [point['completed'] for point in series] == [1, 1, 0, 0]
+    assert series[0]['avg_score'] == 30
+    assert series[1]['avg_time_spent_s'] == 1800
+    assert series[1]['level_distribution']['Iniciante'] == 1
+    assert series[3]['avg_score'] is None
+
+def test_incremental_rollups_match_rebuild(app):
+    """Test rollups kept by the event hooks equal a full rebuild."""
+    with app.app_context():
+        incremental = _snapshot_rows()
+        rebuild_activity_rollups()
+        assert _snapshot_rows() == incremental
+
+def test_quantiles_merge_across_buckets(app):
+    """Test score and time percentiles merged over a range of hourly buckets match a rebuild."""
+    with app.app_context():
+        quantiles = get_activity_quantiles('hour', DAY, DAY + timedelta(days=1))
+        assert quantiles['OAZ Global']['raw_score']['p10'] == pytest.approx(12, rel=0.01)
+        assert quantiles['OAZ Global']['time_spent_s']['p50'] == pytest.approx(1200, rel=0.01)
+        assert get_activity_quantiles('hour', DAY, DAY.replace(hour=10), 'department', 'RH') == {
+            'RH': {'raw_score': {'p10': None, 'p50': None, 'p90': None},
+                   'time_spent_s': {'p10': None, 'p50': None, 'p90': None}}
+        }
+
+        rebuild_activity_rollups()
+        assert get_activity_quantiles('hour', DAY, DAY + timedelta(days=1)) == quantiles
+
+def test_sweep_marks_stale_sessions_abandoned(app):
+    """Test the sweep abandons old active sessions and counts them."""
+    with app.app_context():
+        swept = sweep_abandoned_sessions(timedelta(hours=24), now=DAY + timedelta(days=2))
+        db.session.commit()
+
+        assert swept == 1
+        assert Session.query.filter_by(status='abandoned').count() == 1
+        day = get_activity_series('day', DAY, DAY + timedelta(days=1), 'frente', 'SOUQ')
+        assert day['SOUQ'][0]['abandoned'] == 1
+        assert day['SOUQ'][0]['started'] == 2
+
+        incremental = _snapshot_rows()
+        rebuild_activity_rollups()
+        assert _snapshot_rows() == incremental
+
+def test_delete_user_subtracts_activity(app, admin_client):
+    """Test deleting a user removes their sessions from the buckets."""
+    with app.app_context():
+        user_id = User.query.filter_by(email='ana@oaz.co').first().id
+
+    response = admin_client.delete(f'/admin/users/{user_id}')
+    assert response.status_code == 200
+
+    with app.app_context():
+        series = get_activity_series('day', DAY, DAY + timedelta(days=1), 'department', 'TI')['TI']
+        assert series[0]['started'] == 1
+        assert series[0]['completed'] == 0
+
+def test_activity_endpoint(admin_client):
+    """Test the endpoint returns the series and rejects invalid arguments."""
+    response = admin_client.get('/admin/activity?granularity=day&start=2026-03-01&end=2026-03-04&dimension=department')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data['series']) == {'TI', 'RH'}
+    assert [point['started'] for point in data['series']['TI']] == [0, 2, 0]
+
+    assert admin_client.get('/admin/activity?granularity=week').status_code == 400
+    assert admin_client.get('/admin/activity?granularity=hour&start=2025-01-01&end=2026-01-01').status_code == 400
+    assert admin_client.get('/admin/activity?start=yesterday').status_code == 400
+
+def test_default_window_follows_the_clock(admin_client, monkeypatch):
+    """Test a cached response without end is not served once the current bucket has moved on."""
+    class Clock(datetime):
+        now = datetime(2026, 3, 2, 10, 30)
+
+        @classmethod
+        def utcnow(cls):
+            return cls.now
+    monkeypatch.setattr(activity, 'datetime', Clock)
+
+    first = admin_client.get('/admin/activity?granularity=hour').get_json()
+    assert first['end'] == '2026-03-02T11:00:00'
+    assert admin_client.get('/admin/activity?granularity=hour').get_json() == first
+
+    Clock.now = datetime(2026, 3, 2, 11, 5)
+    assert admin_client.get('/admin/activity?granularity=hour').get_json()['end'] == '2026-03-02T12:00:00'
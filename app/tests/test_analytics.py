@@ -0,0 +1,190 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import AnalyticsRollup, ProficiencySnapshot, Response, Session, SnapshotBlockScore, User
+from app.core.utils import backfill_snapshot_block_scores
+from app.services.analytics import (
+    aggregate_completed_snapshots, apply_snapshots_to_rollups, dashboard_payload, get_block_heatmap,
+    get_complete_dashboard_data, get_department_stats, get_global_stats, rebuild_analytics_rollups
+)
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+BLOCK_SCORES = [
+    ('ana@oaz.co', 'Marketing', 'Analista', 'completed', {'Percepção e Atitude': 9, 'Uso Prático': 6, 'Conhecimento e Entendimento': 4, 'Cultura e Autonomia Digital': 8}),
+    ('bia@oaz.co', 'Marketing', 'Gerente', 'completed', {'Percepção e Atitude': 12, 'Uso Prático': 9, 'Conhecimento e Entendimento': 6, 'Cultura e Autonomia Digital': 8}),
+    ('caio@thesaint.com.br', 'TI', 'Analista', 'completed', {'Percepção e Atitude': 6, 'Uso Prático': 3, 'Conhecimento e Entendimento': 2, 'Cultura e Autonomia Digital': 4}),
+    ('duda@THESAINT.com.br', 'TI', 'Analista', 'active', {'Percepção e Atitude': 3, 'Uso Prático': 3, 'Conhecimento e Entendimento': 2, 'Cultura e Autonomia Digital': 2}),
+]
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for email, department, role, status, block_scores in BLOCK_SCORES:
+            user = User(email=email, department=department, role=role)
+            db.session.add(user)
+            db.session.flush()
+            session = Session(user_id=user.id, status=status)
+            db.session.add(session)
+            db.session.flush()
+            snapshot = ProficiencySnapshot(
+                session_id=session.id,
+                raw_score=sum(block_scores.values()),
+                maturity_level='Praticante' if sum(block_scores.values()) >= 28 else 'Explorador'
+            )
+            snapshot.block_scores = block_scores
+            snapshot.block_score_rows = SnapshotBlockScore.rows_for(block_scores)
+            db.session.add(snapshot)
+        db.session.add(User(email='novo@oaz.co', department='RH'))
+        db.session.commit()
+        rebuild_analytics_rollups()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_heatmap_all_averages_completed_snapshots(app):
+    """Test overall block averages only include completed sessions."""
+    with app.app_context():
+        heatmap = get_block_heatmap('all')
+
+    assert heatmap['Percepção e Atitude'] == {'avg_score': 9.0, 'count': 3}
+    assert heatmap['Uso Prático'] == {'avg_score': 6.0, 'count': 3}
+
+def test_heatmap_groups_by_department_and_frente(app):
+    """Test grouped heatmaps, including groups without results."""
+    with app.app_context():
+        by_department = get_block_heatmap('department')
+        by_frente = get_block_heatmap('frente')
+        by_role = get_block_heatmap('role')
+
+    assert by_department['Marketing']['Percepção e Atitude'] == 10.5
+    assert by_department['TI']['Uso Prático'] == 3.0
+    assert by_department['RH']['Percepção e Atitude'] == 0
+    assert by_frente['SOUQ']['Conhecimento e Entendimento'] == 5.0
+    assert by_frente['THESAINT']['Cultura e Autonomia Digital'] == 4.0
+    assert by_role['Analista']['Percepção e Atitude'] == 7.5
+
+def test_heatmap_route(admin_client):
+    """Test the admin heatmap endpoint and unknown groupings."""
+    response = admin_client.get('/admin/heatmap?group_by=role')
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'Analista', 'Gerente'}
+
+    assert admin_client.get('/admin/heatmap?group_by=unknown').get_json() == {}
+
+def test_backfill_block_scores_from_json(app):
+    """Test block rows are rebuilt from block_scores_json when the table is empty."""
+    with app.app_context():
+        SnapshotBlockScore.query.delete()
+        db.session.commit()
+
+        backfill_snapshot_block_scores()
+
+        assert SnapshotBlockScore.query.count() == 4 * len(BLOCK_SCORES)
+        row = SnapshotBlockScore.query.filter_by(block='Uso Prático', score=9).one()
+        assert row.max_score == 12
+        assert get_block_heatmap('all')['Uso Prático']['avg_score'] == 6.0
+
+def test_delete_user_removes_block_scores(admin_client, app):
+    """Test deleting a user also removes the normalized block rows."""
+    with app.app_context():
+        user_id = User.query.filter_by(email='ana@oaz.co').one().id
+
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+
+    with app.app_context():
+        assert SnapshotBlockScore.query.count() == 4 * (len(BLOCK_SCORES) - 1)
+        assert get_block_heatmap('all')['Percepção e Atitude'] == {'avg_score': 9.0, 'count': 2}
+
+def test_rollup_stats_from_rebuild(app):
+    """Test dashboard stats read from the rollups match the fixture snapshots."""
+    with app.app_context():
+        data = get_complete_dashboard_data()
+
+    assert data['global']['count'] == 3
+    assert data['global']['avg_score'] == 25.7
+    assert data['global']['level_distribution'] == {'Iniciante': 0, 'Explorador': 2, 'Praticante': 1, 'Líder Digital': 0}
+    assert data['global']['block_averages']['Uso Prático'] == 6.0
+    assert set(data['frentes']) == {'SOUQ', 'THESAINT'}
+    assert data['departments']['Marketing']['avg_score'] == 31.0
+    assert data['departments']['Marketing']['std_score'] == 4.0
+    assert 'RH' not in data['departments']
+    assert data['roles']['Analista']['count'] == 2
+
+def test_rollups_follow_finalize_and_delete(admin_client, app):
+    """Test incremental rollup updates agree with a full rebuild."""
+    with app.app_context():
+        user = User.query.filter_by(email='novo@oaz.co').one()
+        session = Session(user_id=user.id, status='completed')
+        db.session.add(session)
+        db.session.flush()
+        snapshot = ProficiencySnapshot(session_id=session.id, raw_score=40, maturity_level='Líder Digital')
+        snapshot.block_scores = {'Percepção e Atitude': 12, 'Uso Prático': 12, 'Conhecimento e Entendimento': 8, 'Cultura e Autonomia Digital': 8}
+        db.session.add(snapshot)
+        apply_snapshots_to_rollups(user, [snapshot])
+        db.session.commit()
+        user_id = User.query.filter_by(email='bia@oaz.co').one().id
+
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+
+    with app.app_context():
+        incremental = get_complete_dashboard_data()
+        assert incremental['departments']['RH']['level_distribution']['Líder Digital'] == 1
+        assert incremental['roles'].keys() == {'Analista', 'Não informado'}
+
+        rebuild_analytics_rollups()
+        assert get_complete_dashboard_data() == incremental
+        assert AnalyticsRollup.query.filter_by(dimension='role', group_key='Gerente').first() is None
+
+def test_dashboard_data_in_one_query(app):
+    """Test the complete dashboard is one rollup read and matches a single-pass aggregation."""
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            data = get_complete_dashboard_data()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len(statements) == 1
+        assert data == dashboard_payload(aggregate_completed_snapshots())
+        assert data['global'] == get_global_stats()
+        assert data['departments'] == get_department_stats()
+
+def test_rollup_quantiles_follow_sessions(app):
+    """Test score, time and latency quantiles per group, incrementally and after a rebuild."""
+    with app.app_context():
+        user = User.query.filter_by(email='novo@oaz.co').one()
+        session = Session(user_id=user.id, status='completed', time_spent_s=600)
+        db.session.add(session)
+        db.session.flush()
+        for latency_ms in (1000, 2000, 4000):
+            db.session.add(Response(session_id=session.id, item_id=1, latency_ms=latency_ms))
+        snapshot = ProficiencySnapshot(session_id=session.id, raw_score=20, maturity_level='Explorador')
+        db.session.add(snapshot)
+        apply_snapshots_to_rollups(user, [snapshot])
+        db.session.commit()
+
+        incremental = get_complete_dashboard_data()
+        quantiles = incremental['departments']['RH']['quantiles']
+        assert quantiles['raw_score']['p50'] == pytest.approx(20, rel=0.01)
+        assert quantiles['time_spent_s']['p50'] == pytest.approx(600, rel=0.01)
+        assert quantiles['latency_ms']['p90'] == pytest.approx(2000, rel=0.01)
+        assert incremental['global']['quantiles']['raw_score']['p10'] == pytest.approx(15, rel=0.01)
+
+        rebuild_analytics_rollups()
+        assert get_complete_dashboard_data() == incremental
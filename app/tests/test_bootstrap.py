@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+import pytest
+from app import create_app, db
+from app.models import DataVersion, ProficiencySnapshot, Session, SnapshotBlockScore, User
+from app.services import bootstrap
+from app.services.bootstrap import BOOTSTRAP_MARKER, BOOTSTRAP_STALE_S, BOOTSTRAP_VERSION, bootstrap_data
+from config import Config
+
+BLOCK_SCORES = {'Percepção e Atitude': 9, 'Uso Prático': 6, 'Conhecimento e Entendimento': 4, 'Cultura e Autonomia Digital': 8}
+
+@pytest.fixture
+def make_app(tmp_path):
+    # A file database shared by several apps, like gunicorn workers
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        SEED_ON_START = False
+
+    apps = []
+    def make():
+        app = create_app(TestConfig)
+        apps.append(app)
+        return app
+    yield make
+    with apps[0].app_context():
+        db.session.remove()
+        db.drop_all()
+
+def _add_snapshot():
+    user = User(email='pessoa@oaz.co', name='Pessoa')
+    db.session.add(user)
+    db.session.flush()
+    session = Session(user_id=user.id, status='completed')
+    db.session.add(session)
+    db.session.flush()
+    snapshot = ProficiencySnapshot(session_id=session.id, raw_score=27, maturity_level='Explorador')
+    snapshot.block_scores = BLOCK_SCORES
+    db.session.add(snapshot)
+    db.session.commit()
+
+def test_backfills_run_once_across_workers(make_app):
+    """Test only the first app claims the backfills; later apps read the marker and skip them."""
+    first = make_app()
+    with first.app_context():
+        assert db.session.get(DataVersion, BOOTSTRAP_MARKER).version == BOOTSTRAP_VERSION
+        _add_snapshot()
+        db.session.query(SnapshotBlockScore).delete()
+        db.session.commit()
+
+    second = make_app()
+    with second.app_context():
+        assert db.session.query(SnapshotBlockScore).count() == 0
+        assert not bootstrap_data()
+
+        assert bootstrap_data(force=True)
+        assert db.session.query(SnapshotBlockScore).count() == len(BLOCK_SCORES)
+
+def test_concurrent_claim_has_one_winner(make_app):
+    """Test two processes claiming the same marker state cannot both win."""
+    app = make_app()
+    with app.app_context():
+        marker = bootstrap._read_marker()
+
+        assert bootstrap._set_marker(-BOOTSTRAP_VERSION, marker)
+        assert not bootstrap._set_marker(-BOOTSTRAP_VERSION, marker)
+
+def test_waits_for_a_run_in_progress_and_takes_over_a_stale_one(make_app, monkeypatch):
+    """Test a fresh in-progress marker holds other processes back, and a silent one is taken over."""
+    app = make_app()
+    with app.app_context():
+        marker = db.session.get(DataVersion, BOOTSTRAP_MARKER)
+        marker.version = -BOOTSTRAP_VERSION
+        marker.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        assert not bootstrap_data(wait=False)
+        assert bootstrap._read_marker().version == -BOOTSTRAP_VERSION
+
+        marker = db.session.get(DataVersion, BOOTSTRAP_MARKER)
+        marker.updated_at = datetime.utcnow() - timedelta(seconds=BOOTSTRAP_STALE_S + 1)
+        db.session.commit()
+
+        assert bootstrap_data(wait=False)
+        assert bootstrap._read_marker().version == BOOTSTRAP_VERSION
+
+def test_failed_backfill_leaves_marker_unfinished(make_app, monkeypatch):
+    """Test a failing run is not marked done, so the next boot runs it again."""
+    app = make_app()
+    with app.app_context():
+        def fail():
+            raise RuntimeError('backfill failed')
+        monkeypatch.setattr(bootstrap, '_steps', lambda: [fail])
+
+        with pytest.raises(RuntimeError):
+            bootstrap_data(force=True)
+        assert bootstrap._read_marker().version == 0
+
+        monkeypatch.setattr(bootstrap, '_steps', lambda: [])
+        assert bootstrap_data()
+
+def test_waiting_worker_returns_once_the_run_is_done(make_app, monkeypatch):
+    """Test a worker that finds a run in progress polls until it is marked done, then skips the steps."""
+    app = make_app()
+    with app.app_context():
+        bootstrap._finish(-BOOTSTRAP_VERSION)
+        polls = []
+        def runner_finishes(seconds):
+            polls.append(seconds)
+            bootstrap._finish(BOOTSTRAP_VERSION)
+        monkeypatch.setattr(bootstrap.time, 'sleep', runner_finishes)
+        monkeypatch.setattr(bootstrap, '_steps', lambda: pytest.fail('steps ran twice'))
+
+        assert not bootstrap_data()
+        assert polls == [bootstrap.BOOTSTRAP_POLL_S]
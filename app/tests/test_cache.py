@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import ProficiencySnapshot, Session, User
+from app.routes import admin
+from app.services.analytics import apply_snapshots_to_rollups
+from app.services.cache import bump_data_version, current_data_version
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(email='ana@oaz.co', department='TI'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_unchanged_stats_revalidate_with_304(admin_client):
+    """Test ETag / If-None-Match on a cached stats endpoint."""
+    first = admin_client.get('/admin/overview')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    second = admin_client.get('/admin/overview', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    other = admin_client.get('/admin/heatmap?group_by=role', headers={'If-None-Match': first.headers['ETag']})
+    assert other.status_code == 200
+
+def test_cached_body_served_until_version_bump(admin_client, app, monkeypatch):
+    """Test the view runs once per data version and parameters."""
+    calls = []
+    monkeypatch.setattr(admin, 'get_block_heatmap', lambda group_by: calls.append(group_by) or {})
+
+    admin_client.get('/admin/heatmap?group_by=department')
+    admin_client.get('/admin/heatmap?group_by=department')
+    admin_client.get('/admin/heatmap?group_by=role')
+    assert calls == ['department', 'role']
+
+    with app.app_context():
+        bump_data_version()
+        db.session.commit()
+
+    admin_client.get('/admin/heatmap?group_by=department')
+    assert calls == ['department', 'role', 'department']
+
+def test_writes_bump_the_version(admin_client, app):
+    """Test a completed snapshot and a user delete invalidate cached stats."""
+    before = admin_client.get('/admin/stats/global').get_json()
+    assert before['count'] == 0
+
+    with app.app_context():
+        version = current_data_version()
+        user = User.query.one()
+        session = Session(user_id=user.id, status='completed')
+        db.session.add(session)
+        db.session.flush()
+        snapshot = ProficiencySnapshot(session_id=session.id, raw_score=30, maturity_level='Praticante')
+        snapshot.block_scores = {'Uso Prático': 9}
+        db.session.add(snapshot)
+        apply_snapshots_to_rollups(user, [snapshot])
+        bump_data_version()
+        db.session.commit()
+        user_id = user.id
+        assert current_data_version() == version + 1
+
+    assert admin_client.get('/admin/stats/global').get_json()['count'] == 1
+
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+    assert admin_client.get('/admin/stats/global').get_json()['count'] == 0
+
+def test_bump_applies_after_commit_only(app):
+    """Test the counter is not written by the caller's transaction and a rollback drops the bump."""
+    statements = []
+    def record(conn, cursor, statement, parameters, *args):
+        # The change log sequence counter lives in data_versions too
+        if 'change_log' not in str(parameters):
+            statements.append(statement)
+
+    with app.app_context():
+        version = current_data_version()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            db.session.add(User(email='bia@oaz.co'))
+            bump_data_version()
+            db.session.flush()
+            assert not any('data_versions' in statement for statement in statements)
+            db.session.rollback()
+            assert current_data_version() == version
+
+            db.session.add(User(email='bia@oaz.co'))
+            bump_data_version()
+            bump_data_version()
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert current_data_version() == version + 1
+        assert sum('UPDATE data_versions' in statement for statement in statements) == 1
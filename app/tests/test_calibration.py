@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+from app import create_app, db
+from app.core.calibration import calibrate_group
+from app.models import Audit, Item, Response, Session, User
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _simulate(rng, n_persons, a, b, per_person):
+    persons = np.repeat(np.arange(n_persons), per_person)
+    items = np.concatenate([rng.choice(a.size, per_person, replace=False) for _ in range(n_persons)])
+    theta = rng.normal(size=n_persons)
+    p = 1.0 / (1.0 + np.exp(-a[items] * (theta[persons] - b[items])))
+    return persons, items, (rng.random(persons.size) < p).astype(float)
+
+def test_calibrate_group_recovers_parameters():
+    """Test EM/MML recovers simulated 2PL parameters."""
+    rng = np.random.default_rng(2)
+    a = rng.uniform(0.6, 2.0, 12)
+    b = rng.uniform(-1.5, 1.5, 12)
+    persons, items, scores = _simulate(rng, 3000, a, b, 8)
+
+    fit = calibrate_group(persons, items, scores, a.size)
+
+    assert np.sqrt(np.mean((fit['b'] - b) ** 2)) < 0.2
+    assert np.corrcoef(fit['a'], a)[0, 1] > 0.8
+    assert fit['iterations'] < 200
+
+def test_calibrate_items_command_writes_parameters(app):
+    """Test the CLI command updates items in bulk and records an audit entry."""
+    rng = np.random.default_rng(4)
+    with app.app_context():
+        items = [
+            Item(stem=f'Q{i}', type='mcq', competency=Config.COMPETENCIES[0],
+                 difficulty_b=1.0, discrimination_a=0.5, answer_key='A')
+            for i in range(5)
+        ]
+        user = User(email='test@oaz.co', consent_ts=db.func.current_timestamp())
+        db.session.add_all(items + [user])
+        db.session.commit()
+
+        sessions = [Session(user_id=user.id, status='completed') for _ in range(400)]
+        db.session.add_all(sessions)
+        db.session.commit()
+
+        persons, item_idx, scores = _simulate(rng, 400, np.full(5, 1.2), np.linspace(-1.5, 1.5, 5), 3)
+        db.session.add_all([
+            Response(session_id=sessions[p].id, item_id=items[i].id, graded_score_0_1=float(x))
+            for p, i, x in zip(persons, item_idx, scores)
+        ])
+        db.session.commit()
+        item_ids = [item.id for item in items]
+
+    result = app.test_cli_runner().invoke(args=['calibrate-items', '--min-responses', '50'])
+    assert result.exit_code == 0, result.output
+    assert '5 items calibrated' in result.output
+
+    with app.app_context():
+        calibrated = [db.session.get(Item, item_id) for item_id in item_ids]
+        difficulties = [item.difficulty_b for item in calibrated]
+        assert difficulties == sorted(difficulties)
+        assert all(item.discrimination_a != 0.5 for item in calibrated)
+        assert Audit.query.filter_by(action='calibrate_items').count() == 1
@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+import pytest
+from app import create_app, db
+from sqlalchemy import insert
+from app.models import ChangeLog, ProficiencySnapshot, Response, Session, User
+from app.services.changes import change_watermark, iter_changes
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+def _add_result(email):
+    user = User(email=email, department='TI')
+    db.session.add(user)
+    db.session.flush()
+    session = Session(user_id=user.id, status='completed')
+    db.session.add(session)
+    db.session.flush()
+    db.session.add(Response(session_id=session.id, item_id=1, raw_answer='B', matrix_points=2))
+    db.session.add(ProficiencySnapshot(session_id=session.id, raw_score=20, maturity_level='Explorador'))
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        _add_result('ana@oaz.co')
+        _add_result('bia@oaz.co')
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def _export(admin_client, since, **args):
+    response = admin_client.get('/admin/changes', query_string={'since': since, **args})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines, int(response.headers['X-Change-Watermark'])
+
+def test_flushes_are_recorded_once_per_entity(app):
+    """Test inserts and updates are logged and exported as the latest state of each row."""
+    with app.app_context():
+        user = User.query.filter_by(email='ana@oaz.co').one()
+        user.role = 'Analista'
+        db.session.commit()
+        user.role = 'Gerente'
+        db.session.commit()
+
+        upper = change_watermark(0)
+        assert ChangeLog.query.count() == 10
+        exported = list(iter_changes(0, upper))
+
+    assert len(exported) == 8
+    assert [change['change_id'] for change in exported] == sorted(change['change_id'] for change in exported)
+    assert exported[-1]['entity'] == 'user'
+    assert exported[-1]['data']['role'] == 'Gerente'
+    assert 'frente' in exported[-1]['data']
+    assert {change['entity'] for change in exported} == {'user', 'session', 'response', 'snapshot'}
+
+def test_incremental_export_with_tombstones(admin_client, app):
+    """Test a later window only has new changes, and deletes arrive as tombstones."""
+    lines, watermark = _export(admin_client, 0)
+    assert len(lines) == 8
+
+    again, same = _export(admin_client, watermark)
+    assert again == [] and same == watermark
+
+    with app.app_context():
+        user_id = User.query.filter_by(email='bia@oaz.co').one().id
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+
+    lines, next_watermark = _export(admin_client, watermark)
+    assert next_watermark > watermark
+    assert {(line['entity'], line['op']) for line in lines} == {
+        ('user', 'delete'), ('session', 'delete'), ('snapshot', 'delete'), ('response', 'delete')
+    }
+    assert all(line['data'] is None for line in lines)
+
+def test_export_limit_and_validation(admin_client):
+    """Test limit bounds the window and bad arguments are rejected."""
+    first, watermark = _export(admin_client, 0, limit=3)
+    rest, _ = _export(admin_client, watermark)
+    assert len(first) == 3
+    assert len(first) + len(rest) == 8
+
+    assert admin_client.get('/admin/changes?since=abc').status_code == 400
+    assert admin_client.get('/admin/changes?since=0&limit=0').status_code == 400
+
+def test_late_commit_with_lower_id_is_not_skipped(admin_client, app):
+    """Test a change that becomes visible after higher change ids were exported still reaches the next window."""
+    _, watermark = _export(admin_client, 0)
+
+    with app.app_context():
+        session_id = Session.query.first().id
+        # Flushed before every exported change (lowest id) but committed only now
+        db.session.execute(insert(ChangeLog).values(
+            id=0, entity='session', entity_id=session_id, op='upsert', changed_at=datetime.utcnow()
+        ))
+        db.session.commit()
+
+    lines, next_watermark = _export(admin_client, watermark)
+    assert next_watermark > watermark
+    assert [(line['entity'], line['id']) for line in lines] == [('session', session_id)]
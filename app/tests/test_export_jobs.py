@@ -0,0 +1,96 @@
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+import pytest
+from app import create_app, db
+from app.models import ExportJob, ProficiencySnapshot, Session, User
+from app.services import export_jobs
+from app.services.cache import bump_data_version
+from config import Config
+
+BLOCK_SCORES = {'Percepção e Atitude': 9, 'Uso Prático': 6, 'Conhecimento e Entendimento': 4, 'Cultura e Autonomia Digital': 8}
+
+@pytest.fixture
+def app(tmp_path):
+    # A file database, so the export thread gets its own connection
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        SEED_ON_START = False
+        EXPORT_ARTIFACT_DIR = str(tmp_path / 'exports')
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(6):
+            user = User(email=f'user{i}@{"oaz.co" if i % 2 else "thesaint.com.br"}', name=f'Pessoa {i}', department='TI')
+            db.session.add(user)
+            db.session.flush()
+            session = Session(user_id=user.id, status='completed', time_spent_s=300)
+            db.session.add(session)
+            db.session.flush()
+            snapshot = ProficiencySnapshot(session_id=session.id, raw_score=27, maturity_level='Explorador')
+            snapshot.block_scores = BLOCK_SCORES
+            db.session.add(snapshot)
+        db.session.commit()
+        yield app
+        export_jobs.wait_for_jobs(app)
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_export_job_builds_and_serves_artifact(app, admin_client):
+    """Test a submitted export runs in the background and its artifact is downloadable."""
+    response = admin_client.post('/admin/exports', json={'format': 'csv', 'frente': 'SOUQ'})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+
+    export_jobs.wait_for_jobs(app)
+    status = admin_client.get(f'/admin/exports/{job_id}').get_json()
+    assert status['status'] == 'done'
+    assert status['rows_total'] == status['rows_done'] == 3
+    assert status['progress'] == 1.0
+
+    download = admin_client.get(f'/admin/exports/{job_id}/download')
+    assert download.status_code == 200
+    assert 'oaz_profiler_souq.csv' in download.headers['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(download.get_data().decode('utf-8-sig')), delimiter=';'))
+    assert [row[2] for row in rows[1:]] == ['user1@oaz.co', 'user3@oaz.co', 'user5@oaz.co']
+    download.close()
+
+def test_export_job_reused_until_data_version_changes(app, admin_client):
+    """Test identical requests reuse the artifact and a data change builds (and later prunes) a new one."""
+    first = admin_client.post('/admin/exports', json={'format': 'csv'}).get_json()
+    export_jobs.wait_for_jobs(app)
+
+    repeat = admin_client.post('/admin/exports', json={'format': 'csv', 'role': ''})
+    assert repeat.status_code == 200
+    assert repeat.get_json()['id'] == first['id']
+
+    with app.app_context():
+        bump_data_version()
+        db.session.commit()
+    second = admin_client.post('/admin/exports', json={'format': 'csv'})
+    assert second.status_code == 202
+    export_jobs.wait_for_jobs(app)
+
+    with app.app_context():
+        old = db.session.get(ExportJob, first['id'])
+        path = old.artifact_path
+        assert os.path.exists(path)
+        assert export_jobs.prune_export_artifacts(now=datetime.utcnow() + timedelta(hours=1)) == 1
+        assert not os.path.exists(path)
+        assert db.session.get(ExportJob, second.get_json()['id']).status == 'done'
+
+def test_export_job_rejects_unknown_format(admin_client):
+    """Test an unsupported format is rejected and unknown jobs return 404."""
+    response = admin_client.post('/admin/exports', json={'format': 'pdf'})
+    assert response.status_code == 400
+    assert admin_client.get('/admin/exports/missing').status_code == 404
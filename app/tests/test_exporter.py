@@ -0,0 +1,164 @@
+import csv
+import io
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Item, ProficiencySnapshot, Response, Session, User
+from app.services import exporter
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+BLOCK_SCORES = {'Percepção e Atitude': 9, 'Uso Prático': 6, 'Conhecimento e Entendimento': 4, 'Cultura e Autonomia Digital': 8}
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(12):
+            user = User(email=f'user{i}@{"oaz.co" if i % 2 else "thesaint.com.br"}', name=f'Pessoa {i}',
+                        department='TI' if i % 3 else 'RH')
+            db.session.add(user)
+            db.session.flush()
+            session = Session(user_id=user.id, status='completed' if i < 10 else 'active', time_spent_s=300)
+            db.session.add(session)
+            db.session.flush()
+            snapshot = ProficiencySnapshot(session_id=session.id, raw_score=27, maturity_level='Explorador')
+            snapshot.block_scores = BLOCK_SCORES
+            db.session.add(snapshot)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def _read(body: bytes):
+    assert body.startswith('﻿'.encode('utf-8'))
+    return list(csv.reader(io.StringIO(body.decode('utf-8-sig')), delimiter=';'))
+
+def test_stream_csv_in_chunks_from_one_query(app, monkeypatch):
+    """Test the CSV is produced in batches from a single query, in BLOCKS column order."""
+    monkeypatch.setattr(exporter, 'EXPORT_BATCH', 4)
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            chunks = list(exporter.stream_csv())
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert len(chunks) == 3
+    rows = _read(b''.join(chunks))
+    assert rows[0] == exporter.EXPORT_COLUMNS
+    assert len(rows) == 11
+    assert rows[1][:4] == ['1', 'Pessoa 0', 'user0@thesaint.com.br', 'THESAINT']
+    assert rows[1][7:] == ['5.0', '27', 'Explorador', '9', '6', '4', '8']
+
+def test_csv_route_streams_filtered_rows(admin_client):
+    """Test the export route streams filtered rows and the empty-result message."""
+    response = admin_client.get('/admin/export.csv?frente=SOUQ&department=TI')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'oaz_profiler_souq_ti.csv' in response.headers['Content-Disposition']
+    rows = _read(response.get_data())
+    assert [row[2] for row in rows[1:]] == ['user1@oaz.co', 'user5@oaz.co', 'user7@oaz.co']
+
+    empty = _read(admin_client.get('/admin/export.csv?role=Diretor').get_data())
+    assert empty == [['Nenhum dado disponível']]
+
+def test_xlsx_route_writes_rows(admin_client):
+    """Test the write-only XLSX export has the same header and rows as the CSV."""
+    response = admin_client.get('/admin/export.xlsx?department=RH')
+    assert response.status_code == 200
+    assert 'oaz_profiler_rh.xlsx' in response.headers['Content-Disposition']
+
+    sheet = load_workbook(io.BytesIO(response.get_data()), read_only=True).active
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert rows[0] == exporter.EXPORT_COLUMNS
+    assert [row[2] for row in rows[1:]] == ['user0@thesaint.com.br', 'user3@oaz.co', 'user6@thesaint.com.br', 'user9@oaz.co']
+    assert rows[1][8:] == [27, 'Explorador', 9, 6, 4, 8]
+
+def test_parquet_export_is_typed(admin_client, monkeypatch):
+    """Test the Parquet export has typed, column-prunable data."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(exporter, 'PARQUET_ROW_GROUP', 4)
+
+    response = admin_client.get('/admin/export.parquet?frente=SOUQ')
+    assert response.status_code == 200
+    parquet = pq.ParquetFile(io.BytesIO(response.get_data()))
+    assert parquet.metadata.num_row_groups == 2
+
+    table = parquet.read(columns=['user_id', 'completed_at', 'department', 'block_uso_pratico'])
+    assert table.column('user_id').to_pylist() == [2, 4, 6, 8, 10]
+    assert str(table.schema.field('completed_at').type) == 'timestamp[us, tz=UTC]'
+    assert table.column('department').type.value_type == 'string'
+    assert table.column('block_uso_pratico').to_pylist() == [6] * 5
+
+def test_parquet_export_without_pyarrow(admin_client, monkeypatch):
+    """Test the Parquet route reports a missing optional dependency."""
+    monkeypatch.setattr('app.routes.admin.PARQUET_AVAILABLE', False)
+    response = admin_client.get('/admin/export.parquet')
+    assert response.status_code == 501
+    assert 'error' in response.get_json()
+
+def _add_responses(app):
+    with app.app_context():
+        mapped = Item(stem='Como você usa IA?', type='matrix', block='Uso Prático', progressive_levels=True)
+        mapped.set_metadata({'points_mapping': {'0': 3, '1': 1, '2': 4, '3': 2}})
+        legacy = Item(stem='Pergunta antiga', type='matrix', block='Percepção e Atitude')
+        db.session.add_all([mapped, legacy])
+        db.session.flush()
+        for session in Session.query.order_by(Session.id).limit(3):
+            db.session.add(Response(session_id=session.id, item_id=mapped.id, raw_answer='option_c', latency_ms=1200))
+            db.session.add(Response(session_id=session.id, item_id=legacy.id, raw_answer='b', matrix_points=2, latency_ms=800))
+        db.session.commit()
+
+def test_stream_responses_csv_one_row_per_answer(app, monkeypatch):
+    """Test the item-level export streams every response with letter, points and item detail."""
+    _add_responses(app)
+    monkeypatch.setattr(exporter, 'EXPORT_BATCH', 4)
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            chunks = list(exporter.stream_responses_csv())
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1  # one streamed response query, items joined
+    assert len(chunks) == 2
+    rows = _read(b''.join(chunks))
+    assert rows[0] == exporter.RESPONSE_EXPORT_COLUMNS
+    assert len(rows) == 7
+    assert rows[1][4:] == ['user0@thesaint.com.br', 'THESAINT', 'RH', 'N/A', '1', 'Uso Prático',
+                           'Como você usa IA?', 'C', '4', '1200', rows[1][14]]
+    assert rows[2][9:14] == ['Percepção e Atitude', 'Pergunta antiga', 'B', '2', '800']
+
+def test_responses_routes_filter_rows(app, admin_client):
+    """Test the item-level CSV and Parquet routes apply the summary export filters."""
+    _add_responses(app)
+    response = admin_client.get('/admin/export/responses.csv?frente=SOUQ')
+    assert response.status_code == 200
+    assert 'oaz_profiler_respostas_souq.csv' in response.headers['Content-Disposition']
+    assert [row[4] for row in _read(response.get_data())[1:]] == ['user1@oaz.co', 'user1@oaz.co']
+
+    pq = pytest.importorskip('pyarrow.parquet')
+    response = admin_client.get('/admin/export/responses.parquet?department=RH')
+    table = pq.read_table(io.BytesIO(response.get_data()))
+    assert table.column('points').to_pylist() == [4, 2]
+    assert table.column('answer').to_pylist() == ['C', 'B']
+    assert str(table.schema.field('answered_at').type) == 'timestamp[us, tz=UTC]'
@@ -1,6 +1,7 @@
 import pytest
 from app import create_app, db
-from app.models import User, Session, Item, Response
+from app.models import User, Session, Item, Response, ActivityRollup
+from app.agents.orchestrator_matrix import AgentOrchestratorMatrix
 from app.core.utils import seed_database
 from config import Config
 
@@ -129,3 +130,17 @@ def test_session_finish(authenticated_client, app):
         session = Session.query.get(session_id)
         assert session.status == 'completed'
         assert session.ended_at is not None
+
+def test_finalize_records_completion_activity(app):
+    """Test finalize_assessment commits the activity rollups with the snapshot, not in a later transaction."""
+    with app.app_context():
+        user = User.query.filter_by(email='test@oaz.co').first()
+        session = Session(user_id=user.id, initial_response='Test', status='active')
+        db.session.add(session)
+        db.session.commit()
+        
+        AgentOrchestratorMatrix(session.id).finalize_assessment()
+        db.session.rollback()
+        
+        rollup = ActivityRollup.query.filter_by(granularity='day', dimension='global').one()
+        assert rollup.sessions_completed == 1
@@ -0,0 +1,208 @@
+import pytest
+import numpy as np
+from app import create_app, db
+from app.models import Item
+from app.agents.selector import AgentSelector
+from app.core import item_bank
+from app.core.item_bank import ItemBankIndex, get_item_bank_index, register_item
+from app.core.scoring import IRTScorer, theta_grid, theta_grid_index
+from app.core.utils import seed_database
+from app.services.cache import bump_data_version
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        seed_database()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_vectorized_scores_match_scalar_scoring(app):
+    """Test index scoring reproduces AgentSelector._score_item for every item."""
+    with app.app_context():
+        items = Item.query.order_by(Item.id).all()
+        index = ItemBankIndex.load()
+        selector = AgentSelector.__new__(AgentSelector)
+
+        proficiency = {
+            'Fundamentos de IA/ML & LLMs': {'score': 72.0, 'ci_low': 60.0, 'ci_high': 84.0, 'items_count': 1},
+            'Ferramentas de IA no dia a dia': {'score': 35.0, 'ci_low': 25.0, 'ci_high': 45.0, 'items_count': 3},
+        }
+
+        scores = index.score_candidates(proficiency, 'Fundamentos de IA/ML & LLMs', 'mcq')
+        expected = [
+            selector._score_item(item, proficiency, 'Fundamentos de IA/ML & LLMs', 'mcq')
+            for item in items
+        ]
+
+        assert np.allclose(scores, expected)
+
+def test_available_mask_excludes_answered_and_inactive(app):
+    """Test exclusion of answered ids and inactive items."""
+    with app.app_context():
+        items = Item.query.order_by(Item.id).all()
+        items[1].active = False
+        db.session.commit()
+
+        index = ItemBankIndex.load()
+        mask = index.available_mask([items[0].id, items[2].id])
+
+        assert not mask[0] and not mask[1] and not mask[2]
+        assert mask[3:].all()
+
+        best_id = index.best_item_id({}, None, None, mask)
+        assert best_id not in (items[0].id, items[1].id, items[2].id)
+
+def test_register_item_appends_to_loaded_index(app):
+    """Test generated items are added without rebuilding the index."""
+    with app.app_context():
+        index = get_item_bank_index()
+        size = len(index)
+
+        item = Item(stem='Nova pergunta', type='mcq', competency='LLMOps & Qualidade', answer_key='A')
+        db.session.add(item)
+        db.session.commit()
+        register_item(item)
+
+        assert get_item_bank_index() is index
+        assert len(index) == size + 1
+        assert index.available_mask()[-1]
+
+def test_admin_item_update_invalidates_index(admin_client, app):
+    """Test deactivating an item through the admin API drops the cached index."""
+    with app.app_context():
+        index = get_item_bank_index()
+        item_id = Item.query.first().id
+
+    response = admin_client.delete(f'/admin/items/{item_id}')
+    assert response.status_code == 200
+
+    with app.app_context():
+        rebuilt = get_item_bank_index()
+        assert rebuilt is not index
+        assert not rebuilt.available_mask()[0]
+
+def test_bounded_search_matches_full_argmax():
+    """Test best_item_id agrees with the argmax over score_candidates."""
+    rng = np.random.default_rng(7)
+    competencies = Config.COMPETENCIES + [None]
+    types = ['mcq', 'scenario', 'open_ended', 'prompt_writing']
+    rows = [
+        (i + 1, float(rng.normal()), float(rng.choice([0.5, 0.6, 0.7, 0.8])),
+         competencies[i % len(competencies)], types[i % len(types)], bool(rng.random() > 0.05))
+        for i in range(5000)
+    ]
+    index = ItemBankIndex(rows)
+
+    for _ in range(50):
+        proficiency = {
+            comp: {'score': float(rng.uniform(0, 100)), 'ci_low': 20.0,
+                   'ci_high': float(rng.uniform(25, 80)), 'items_count': int(rng.integers(0, 3))}
+            for comp in Config.COMPETENCIES
+        }
+        mask = index.available_mask(rng.integers(1, 5001, 12).tolist())
+        scores = index.score_candidates(proficiency, Config.COMPETENCIES[0], 'mcq', mask)
+
+        assert index.best_item_id(proficiency, Config.COMPETENCIES[0], 'mcq', mask) == int(index.ids[np.argmax(scores)])
+
+def test_max_information_selects_most_informative_available_item(monkeypatch):
+    """Test CAT selection matches a brute-force information argmax, including exclusions."""
+    monkeypatch.setattr(item_bank, 'INFORMATION_TOP_K', 3)
+    rng = np.random.default_rng(11)
+    competency = Config.COMPETENCIES[0]
+    rows = [
+        (i + 1, float(rng.normal()), float(rng.uniform(0.4, 2.0)), competency, 'mcq', True)
+        for i in range(200)
+    ]
+    index = ItemBankIndex(rows)
+    proficiency = {competency: {'score': 60.0, 'ci_low': 40.0, 'ci_high': 80.0, 'items_count': 2}}
+    theta = theta_grid()[theta_grid_index(IRTScorer._score_to_theta(60.0))]
+    information = IRTScorer.item_information(theta, index.discrimination_a[:200], index.difficulty_b[:200])
+
+    answered = []
+    for _ in range(5):
+        mask = index.available_mask(answered)
+        expected = int(index.ids[np.argmax(np.where(mask, information, -np.inf))])
+        selected = index.max_information_item_id(proficiency, mask)
+        assert selected == expected
+        answered.append(selected)
+
+def test_max_information_prefers_uncertain_competency():
+    """Test the competency with the wider CI gets the item when information is equal."""
+    fundamentos, ferramentas = Config.COMPETENCIES[0], Config.COMPETENCIES[1]
+    index = ItemBankIndex([
+        (1, 0.0, 1.2, fundamentos, 'mcq', True),
+        (2, 0.0, 1.2, ferramentas, 'mcq', True),
+    ])
+    proficiency = {
+        fundamentos: {'score': 50.0, 'ci_low': 45.0, 'ci_high': 55.0, 'items_count': 4},
+        ferramentas: {'score': 50.0, 'ci_low': 20.0, 'ci_high': 80.0, 'items_count': 0},
+    }
+
+    assert index.max_information_item_id(proficiency, index.available_mask()) == 2
+
+def test_max_information_skips_uncalibrated_items(app):
+    """Test generated items are indexed but never selected by CAT until calibrated."""
+    competency = Config.COMPETENCIES[0]
+    with app.app_context():
+        index = get_item_bank_index()
+        proficiency = {competency: {'score': 50.0, 'ci_low': 20.0, 'ci_high': 80.0, 'items_count': 0}}
+        mask = index.available_mask()
+
+        item = Item(stem='Gerada', type='mcq', competency=competency, answer_key='A',
+                    difficulty_b=0.0, discrimination_a=4.0, calibrated=False)
+        db.session.add(item)
+        db.session.commit()
+        register_item(item)
+
+        assert index.available_mask()[-1]
+        assert index.max_information_item_id(proficiency, mask) != item.id
+
+        item.calibrated = True
+        db.session.commit()
+        register_item(item)
+        assert index.max_information_item_id(proficiency, index.available_mask()) == item.id
+
+def test_index_follows_shared_item_bank_version(app):
+    """Test an item edit committed by another worker makes this worker rebuild its index."""
+    with app.app_context():
+        index = get_item_bank_index()
+        assert get_item_bank_index() is index
+
+        # Another worker's invalidation only reaches this one through the database
+        bump_data_version(item_bank.ITEM_BANK_VERSION)
+        db.session.commit()
+
+        assert get_item_bank_index() is not index
+
+def test_selector_skips_items_deactivated_after_indexing(app):
+    """Test a stale index never serves an inactive item; the next candidate is taken."""
+    competency = Config.COMPETENCIES[0]
+    with app.app_context():
+        index = get_item_bank_index()
+        proficiency = {competency: {'score': 50.0, 'ci_low': 20.0, 'ci_high': 80.0, 'items_count': 0}}
+        mask = index.available_mask()
+        first_id = index.max_information_item_id(proficiency, mask)
+
+        db.session.get(Item, first_id).active = False
+        db.session.commit()
+
+        selector = AgentSelector(strategy='max_info')
+        selected = selector._select_max_information(index, proficiency, [], mask)
+        assert selected.id != first_id and selected.active
+        assert not index.available_mask()[index.ids[:len(index)].tolist().index(first_id)]
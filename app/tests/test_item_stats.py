@@ -0,0 +1,115 @@
+import pytest
+from app import create_app, db
+from app.agents.orchestrator_matrix import AgentOrchestratorMatrix
+from app.models import Item, ItemStat, Response, Session, User
+from app.services.item_stats import rebuild_item_stats, record_response, stats_from_totals
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+# (email, [(answer, latency_ms)] for the two items)
+ANSWERS = [
+    ('ana@oaz.co', [('A', 1500), ('D', 4000)]),
+    ('bia@oaz.co', [('C', 9000), ('D', 3000)]),
+    ('caio@oaz.co', [('D', 45000), ('B', None)]),
+]
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        items = []
+        for block in ('Percepção e Atitude', 'Uso Prático'):
+            item = Item(stem=f'Pergunta {block}', type='matrix', block=block, progressive_levels=True)
+            item.choices = ['Nunca', 'Às vezes', 'Frequentemente', 'Sempre']
+            db.session.add(item)
+            items.append(item)
+        db.session.commit()
+
+        for email, answers in ANSWERS:
+            user = User(email=email)
+            db.session.add(user)
+            db.session.flush()
+            session = Session(user_id=user.id, status='active')
+            db.session.add(session)
+            db.session.commit()
+            orchestrator = AgentOrchestratorMatrix(session.id)
+            for item, (answer, latency_ms) in zip(items, answers):
+                orchestrator.process_response(item.id, answer, latency_ms=latency_ms)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def _stats():
+    return {stat.item_id: stats_from_totals(stat.totals) for stat in ItemStat.query.all()}
+
+def test_stats_follow_each_response(app):
+    """Test choice counts, points mean/std and latency histogram kept per answer."""
+    with app.app_context():
+        first = _stats()[1]
+
+    assert first['response_count'] == 3
+    assert first['choice_counts'] == {'A': 1, 'C': 1, 'D': 1}
+    assert first['points_distribution'] == {'1': 1, '3': 1, '4': 1}
+    assert first['points_mean'] == pytest.approx(2.67, abs=0.01)
+    assert first['points_std'] == pytest.approx(1.25, abs=0.01)
+    assert first['avg_latency_ms'] == 18500
+    assert first['latency_histogram']['< 2s'] == 1
+    assert first['latency_histogram']['5-10s'] == 1
+    assert first['latency_histogram']['30-60s'] == 1
+
+def test_incremental_stats_match_rebuild_after_delete(app, admin_client):
+    """Test deleting a user subtracts their responses, matching a full rebuild."""
+    with app.app_context():
+        user_id = User.query.filter_by(email='ana@oaz.co').one().id
+
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+
+    with app.app_context():
+        incremental = _stats()
+        assert incremental[1]['response_count'] == 2
+        assert incremental[1]['points_mean'] == 3.5
+        assert incremental[2]['avg_latency_ms'] == 3000
+
+        rebuild_item_stats()
+        assert _stats() == incremental
+
+def test_items_route_includes_stats(admin_client):
+    """Test /admin/items returns each item's running statistics."""
+    response = admin_client.get('/admin/items')
+    assert response.status_code == 200
+    items = {item['id']: item for item in response.get_json()}
+    assert items[2]['stats']['choice_counts'] == {'B': 1, 'D': 2}
+    assert items[2]['stats']['avg_latency_ms'] == 3500
+
+def test_open_ended_answers_are_not_counted_as_choices(app):
+    """Test free-text answers add to the response count but not to choice_counts."""
+    with app.app_context():
+        item = Item(stem='Descreva um caso de uso de IA', type='open_ended', competency='LLMOps & Qualidade')
+        db.session.add(item)
+        session_id = Session.query.first().id
+        db.session.commit()
+        for text in ('Usei um LLM para resumir atas', 'Automatizei relatórios', 'Ainda não usei'):
+            response = Response(session_id=session_id, item_id=item.id, raw_answer=text, latency_ms=30000)
+            db.session.add(response)
+            record_response(response)
+            db.session.commit()
+
+        stats = _stats()[item.id]
+        assert stats['response_count'] == 3
+        assert stats['choice_counts'] == {}
+
+        incremental = _stats()
+        rebuild_item_stats()
+        assert _stats() == incremental
@@ -0,0 +1,60 @@
+import threading
+import time
+import pytest
+from app.services import logger as logger_module
+from app.services.logger import RPAShipper, get_logger
+
+class SlowMonitor:
+    """Records shipped events; blocks until released, like a slow remote monitor."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+
+    def info(self, msg, regiao=None):
+        self.release.wait(5)
+        self.events.append(('INFO', msg))
+
+    def warn(self, msg, regiao=None):
+        self.events.append(('WARN', msg))
+
+    def error(self, msg, exc=None, regiao=None):
+        self.events.append(('ERROR', msg))
+
+    def screenshot(self, filename, regiao=None, nivel=None):
+        self.events.append(('SCREENSHOT', nivel))
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = SlowMonitor()
+    monkeypatch.setattr(logger_module, 'RPA_AVAILABLE', True)
+    monkeypatch.setattr(logger_module, 'rpa_log', monitor)
+    monkeypatch.setattr(logger_module, 'rpa_shipper', RPAShipper(max_size=3, batch_size=2))
+    return monitor
+
+def test_events_are_queued_off_the_request_path(monitor):
+    """Test logging returns while the monitor is blocked, and flush ships everything in order."""
+    log = get_logger('tests')
+    log.event_start('export')
+    log.event_error('export', error=ValueError('boom'))
+    assert logger_module.rpa_shipper.flush(timeout=0.05) is False
+
+    monitor.release.set()
+    assert logger_module.rpa_shipper.flush(timeout=5)
+    assert [kind for kind, _ in monitor.events] == ['INFO', 'ERROR', 'SCREENSHOT']
+    assert logger_module.rpa_shipper.stats() == {'enqueued': 2, 'shipped': 2, 'dropped': 0, 'failed': 0, 'queued': 0}
+
+def test_full_queue_drops_the_oldest_events(monitor):
+    """Test a full queue drops (and counts) the oldest events instead of blocking."""
+    log = get_logger('tests')
+    log.event_info('first')
+    while logger_module.rpa_shipper.stats()['queued']:
+        time.sleep(0.001)  # until the shipper thread holds 'first' and waits on the monitor
+    for index in range(5):
+        log.event_warning(f'event {index}')
+    assert logger_module.rpa_shipper.stats()['dropped'] == 2
+
+    monitor.release.set()
+    assert logger_module.rpa_shipper.flush(timeout=5)
+    assert [msg.split(' | ')[0] for _, msg in monitor.events] == \
+        ['[INFO] first', '[WARNING] event 2', '[WARNING] event 3', '[WARNING] event 4']
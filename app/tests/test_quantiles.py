@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from app.core.quantiles import QuantileSketch
+
+def test_quantiles_within_relative_accuracy():
+    """Test sketch quantiles stay within the relative accuracy of the exact values."""
+    values = np.random.default_rng(7).lognormal(mean=9, sigma=1, size=20000)
+    sketch = QuantileSketch(0.01).update(values.tolist())
+
+    assert sketch.count == 20000
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+def test_merge_and_subtract_are_exact():
+    """Test merging equals sketching the union, and subtracting undoes a merge."""
+    left, right = list(range(0, 500)), [3.5 * i for i in range(1, 300)]
+    merged = QuantileSketch().update(left).merge(QuantileSketch().update(right))
+
+    assert merged == QuantileSketch().update(right + left)
+    assert merged.merge(QuantileSketch().update(right), sign=-1) == QuantileSketch().update(left)
+
+def test_serialization_round_trip():
+    """Test to_dict/from_dict, empty sketches and invalid input."""
+    sketch = QuantileSketch().update([0, 0, 12, 30, 31, 40])
+    assert QuantileSketch.from_dict(sketch.to_dict()) == sketch
+    assert sketch.quantiles() == {'p10': 0.0, 'p50': 12.1, 'p90': 30.9}
+    assert QuantileSketch.from_dict(None).quantile(0.5) is None
+
+    with pytest.raises(ValueError):
+        sketch.add(-1)
+    with pytest.raises(ValueError):
+        sketch.merge(QuantileSketch(0.05))
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from app.core.scoring import IRTScorer
 from app.agents.grader import AgentGrader
 from app.agents.scorer import AgentScorer
@@ -35,6 +36,14 @@ def test_irt_scorer_update_proficiency():
     assert new_score > 50.0
     assert new_ci < 30.0
 
+def test_item_information_peaks_at_difficulty():
+    """Test 2PL Fisher information is maximal (a^2 / 4) at theta = b."""
+    thetas = np.linspace(-3, 3, 61)
+    information = IRTScorer.item_information(thetas, 1.5, 0.6)
+    
+    assert thetas[np.argmax(information)] == pytest.approx(0.6)
+    assert information.max() == pytest.approx(1.5 ** 2 / 4)
+
 def test_irt_scorer_calculate_level():
     """Test level calculation based on score."""
     scorer = IRTScorer()
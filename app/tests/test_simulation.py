@@ -0,0 +1,68 @@
+import logging
+import pytest
+from app import create_app, db
+from app.agents.generator import AgentGenerator
+from app.services.simulation import simulate
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_stub_matrix_questions_require_explicit_stub_provider(app, monkeypatch):
+    """Test placeholder questions are only produced with LLM_PROVIDER=stub."""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    block = 'Percepção e Atitude'
+    with app.app_context():
+        assert AgentGenerator().generate_matrix_question(block) is None
+
+        app.config['LLM_PROVIDER'] = 'stub'
+        question = AgentGenerator().generate_matrix_question(block)
+
+        assert question['block'] == block
+        assert sorted(question['metadata']['points_mapping'].values()) == [1, 2, 3, 4]
+
+def test_simulate_matrix_engine_reports_accuracy_and_steps(monkeypatch):
+    """Test a small matrix simulation runs end to end and reports per-step metrics."""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    report = simulate('matrix', 3, seed=1, verbose=True)
+
+    assert report['sessions'] == 3
+    assert report['items_to_stop']['max'] == 10
+    assert report['steps']['respond']['calls'] == 30
+    assert report['steps']['respond']['mean_queries'] > 0
+    assert report['rmse'] is not None
+
+def test_simulate_legacy_engine_with_cat(monkeypatch):
+    """Test the legacy engine runs headless with max-information selection."""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    report = simulate('legacy', 2, seed=1, strategy='max_info', bank_size=90, verbose=True)
+
+    assert report['sessions'] == 2
+    assert report['items_to_stop']['mean'] >= Config.MIN_ITEMS_PER_SESSION
+    assert report['bias'] is not None
+
+def test_simulate_sessions_command(app, monkeypatch):
+    """Test the flask simulate-sessions command prints the report."""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    result = app.test_cli_runner().invoke(args=['simulate-sessions', '--sessions', '1', '--seed', '2', '--json'])
+
+    assert result.exit_code == 0, result.output
+    assert '"sessions": 1' in result.output
+
+def test_quiet_simulation_restores_logging(monkeypatch):
+    """Test the in-process worker re-enables INFO logging for the caller once it is done."""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    simulate('matrix', 1, seed=3)
+
+    assert logging.root.manager.disable == logging.NOTSET
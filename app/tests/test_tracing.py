@@ -0,0 +1,83 @@
+import pytest
+from app import create_app, db
+from app.services import tracing
+from app.services.logger import get_logger
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+    TRACE_BUFFER_SIZE = 3
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_request_trace_records_spans_and_db_time(admin_client):
+    """Test a request is recorded as a span tree with event attributes and DB time."""
+    assert admin_client.get('/admin/stats/global').status_code == 200
+
+    traces = admin_client.get('/admin/traces').get_json()['traces']
+    assert traces[0]['name'] == 'GET /admin/stats/global'
+    assert traces[0]['status_code'] == 200
+    assert traces[0]['db_queries'] > 0
+
+    trace = admin_client.get(f"/admin/traces/{traces[0]['id']}").get_json()
+    [span] = trace['root']['children']
+    assert (span['name'], span['module'], span['status']) == ('stats_global_load', 'admin', 'ok')
+    assert span['db_queries'] > 0
+    assert 0 <= span['start_ms'] and span['duration_ms'] <= trace['duration_ms']
+    assert trace['root']['db_ms_total'] == trace['db_ms']
+
+    assert admin_client.get('/admin/traces/unknown').status_code == 404
+    assert admin_client.get('/admin/traces?min_ms=abc').status_code == 400
+
+def test_spans_nest_through_the_logger(app):
+    """Test event_start/event_end nest, unclosed children are closed with their parent, and errors mark the span."""
+    log = get_logger('tests')
+    trace = tracing.Trace('GET /items/next')
+    token = tracing._current_span.set(trace.root)
+    try:
+        log.event_start('route', {'session_id': 7})
+        log.event_start('generate')  # never ended
+        with pytest.raises(RuntimeError):
+            with log.span('validate', {'attempt': 1}):
+                raise RuntimeError('bad question')
+        log.event_end('route', {'result': 'ok'})
+        log.event_end('route')  # unmatched ends are ignored
+        assert tracing.current_span() is trace.root
+    finally:
+        tracing._current_span.reset(token)
+    trace.root.finish()
+
+    [route] = trace.to_dict()['root']['children']
+    assert route['attributes'] == {'session_id': 7, 'result': 'ok'}
+    [generate] = route['children']
+    assert generate['status'] == 'unclosed'
+    [validate] = generate['children']
+    assert validate['status'] == 'error'
+    assert validate['attributes']['error_message'] == 'bad question'
+
+    log.event_start('outside_request')
+    assert tracing.current_span() is None
+
+def test_ring_buffer_keeps_recent_requests(admin_client):
+    """Test only the TRACE_BUFFER_SIZE most recent requests are kept, newest first."""
+    for path in ('/health', '/admin/stats/global', '/health', '/admin/stats/roles'):
+        admin_client.get(path)
+    traces = admin_client.get('/admin/traces').get_json()['traces']
+    assert [trace['name'] for trace in traces] == ['GET /admin/stats/roles', 'GET /health', 'GET /admin/stats/global']
+    assert [trace['name'] for trace in admin_client.get('/admin/traces?path=health').get_json()['traces']] == ['GET /health']
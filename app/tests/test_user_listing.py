@@ -0,0 +1,134 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import ProficiencySnapshot, Session, User
+from app.services.user_listing import SORTS, list_users
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+LEVELS = ['Iniciante', 'Explorador', 'Praticante', 'Líder Digital']
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        start = datetime(2026, 3, 1)
+        for i in range(23):
+            domain = 'oaz.co' if i % 2 else 'thesaint.com.br'
+            user = User(email=f'user{i:02d}@{domain}', name=f'Pessoa {i % 7}', department=['TI', 'RH'][i % 2], role='Analista')
+            db.session.add(user)
+            db.session.flush()
+            if i % 5 == 4:
+                continue  # never completed
+            # An older completed attempt that must not be listed
+            old = Session(user_id=user.id, status='completed', ended_at=start)
+            db.session.add(old)
+            db.session.flush()
+            db.session.add(ProficiencySnapshot(session_id=old.id, raw_score=10, maturity_level='Iniciante'))
+            latest = Session(user_id=user.id, status='completed', ended_at=start + timedelta(days=i), time_spent_s=60 * i)
+            db.session.add(latest)
+            db.session.flush()
+            db.session.add(ProficiencySnapshot(session_id=latest.id, raw_score=10 + i % 6 * 5, maturity_level=LEVELS[i % 4]))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def _all_pages(app, **kwargs):
+    users, cursor = [], None
+    with app.app_context():
+        while True:
+            page = list_users(cursor=cursor, limit=4, **kwargs)
+            users.extend(page['users'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return users
+
+def test_keyset_pages_cover_every_user_in_order(app):
+    """Test cursors walk all users exactly once, in the requested order."""
+    for sort in SORTS:
+        users = _all_pages(app, sort=sort)
+        assert sorted(u['id'] for u in users) == list(range(1, 24))
+
+        if sort == 'score_desc':
+            assert [u['raw_score'] or 0 for u in users] == sorted((u['raw_score'] or 0 for u in users), reverse=True)
+        if sort == 'date':
+            dates = [u['completed_at'] or '' for u in users]
+            assert dates == sorted(dates, reverse=True)
+
+    latest = {u['email']: u for u in _all_pages(app, sort='name')}
+    assert latest['user03@oaz.co']['raw_score'] == 25
+    assert latest['user03@oaz.co']['completed_at'].startswith('2026-03-04')
+    assert latest['user04@thesaint.com.br']['maturity_level'] == 'Pendente'
+
+def test_filters_and_summary(admin_client):
+    """Test server-side filters, date range and first-page summary."""
+    page = admin_client.get('/admin/users/data?frente=SOUQ&level=Explorador&limit=50').get_json()
+    assert {u['email'] for u in page['users']} == {'user01@oaz.co', 'user05@oaz.co', 'user13@oaz.co', 'user17@oaz.co', 'user21@oaz.co'}
+    assert page['summary']['total'] == 5
+    assert page['facets']['departments'] == ['RH', 'TI']
+
+    page = admin_client.get('/admin/users/data?date_from=2026-03-03&date_to=2026-03-05').get_json()
+    assert [u['email'] for u in page['users']] == ['user03@oaz.co', 'user02@thesaint.com.br']
+
+    page = admin_client.get('/admin/users/data?level=Pendente&q=USER1').get_json()
+    assert [u['email'] for u in page['users']] == ['user19@oaz.co', 'user14@thesaint.com.br']
+    assert page['summary'] == {'total': 2, 'completed': 0, 'avg_score': 0}
+
+def test_page_is_one_query_and_bad_arguments_are_rejected(admin_client, app):
+    """Test a page is a single SQL statement; invalid cursors/sorts give 400."""
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            list_users(limit=10)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert len(statements) == 1
+
+    first = admin_client.get('/admin/users/data?limit=5&sort=name').get_json()
+    assert admin_client.get(f"/admin/users/data?cursor={first['next_cursor']}&sort=date").status_code == 400
+    assert admin_client.get('/admin/users/data?cursor=not-a-cursor').status_code == 400
+    assert admin_client.get('/admin/users/data?sort=random').status_code == 400
+    assert admin_client.get('/admin/users/data?date_from=03/03/2026').status_code == 400
+
+def test_frente_is_stored_and_filtered_on_the_indexed_column(app):
+    """Test users.frente is derived from the email, backfilled, and used by the frente filter."""
+    from app.core.utils import backfill_user_frente
+    with app.app_context():
+        assert User.query.filter_by(email='user01@oaz.co').one().frente == 'SOUQ'
+        user = User(email='Pessoa@Parceiro.com')
+        db.session.add(user)
+        db.session.commit()
+        assert user.frente == 'Outro'
+
+        db.session.execute(User.__table__.update().values(frente=None))
+        db.session.commit()
+        backfill_user_frente()
+        assert dict(db.session.query(User.frente, db.func.count()).group_by(User.frente).all()) == \
+            {'SOUQ': 11, 'THESAINT': 12, 'Outro': 1}
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            users = list_users(filters={'frente': 'SOUQ'}, limit=100)['users']
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert len(users) == 11
+        assert 'users.frente = ?' in statements[0]
+        assert 'LIKE' not in statements[0]
@@ -0,0 +1,111 @@
+import pytest
+from app import create_app, db
+from app.models import ProficiencySnapshot, Session, User
+from app.services.cache import bump_data_version
+from app.services.whatif import BLOCK_NAMES, get_snapshot_frame
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEED_ON_START = False
+
+# (email, department, block scores in BLOCKS order)
+RESULTS = [
+    ('ana@oaz.co', 'TI', [3, 3, 2, 2]),
+    ('bia@oaz.co', 'TI', [6, 6, 4, 4]),
+    ('caio@thesaint.com.br', 'RH', [9, 9, 6, 6]),
+    ('duda@thesaint.com.br', 'RH', [12, 12, 8, 8]),
+    ('eva@oaz.co', 'RH', [12, 3, 2, 2]),
+]
+
+def _add_result(email, department, scores):
+    user = User(email=email, department=department)
+    db.session.add(user)
+    db.session.flush()
+    session = Session(user_id=user.id, status='completed')
+    db.session.add(session)
+    db.session.flush()
+    snapshot = ProficiencySnapshot(session_id=session.id, raw_score=sum(scores))
+    snapshot.block_scores = dict(zip(BLOCK_NAMES, scores))
+    db.session.add(snapshot)
+    bump_data_version()
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for result in RESULTS:
+            _add_result(*result)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+def test_default_scenario_matches_current_levels(app):
+    """Test the unchanged scenario reproduces the MATURITY_LEVELS classification."""
+    with app.app_context():
+        result = get_snapshot_frame().evaluate()
+
+    # raw scores 10, 20, 30, 40, 19
+    assert result['count'] == 5
+    assert result['baseline'] == {'Iniciante': 1, 'Explorador': 2, 'Praticante': 1, 'Líder Digital': 1}
+    assert result['scenario'] == result['baseline']
+    assert result['avg_score'] == 23.8
+
+def test_thresholds_weights_and_groups(app):
+    """Test moved boundaries, block weights and grouped distributions."""
+    with app.app_context():
+        frame = get_snapshot_frame()
+        moved = frame.evaluate(thresholds={'Explorador': 20}, group_by='frente')
+        weighted = frame.evaluate(weights={'Percepção e Atitude': 3})
+
+    assert moved['scenario'] == {'Iniciante': 2, 'Explorador': 1, 'Praticante': 1, 'Líder Digital': 1}
+    assert moved['transitions']['Explorador'] == {'Iniciante': 1, 'Explorador': 1, 'Praticante': 0, 'Líder Digital': 0}
+    assert moved['groups']['SOUQ'] == {
+        'count': 3, 'avg_score': 16.33, 'scenario': {'Iniciante': 2, 'Explorador': 1, 'Praticante': 0, 'Líder Digital': 0}
+    }
+
+    # eva: (3*12 + 3 + 2 + 2) * 40 / 64 = 26.9 -> still Explorador; full marks stay at 40
+    assert weighted['scenario'] == {'Iniciante': 1, 'Explorador': 2, 'Praticante': 1, 'Líder Digital': 1}
+    assert weighted['avg_score'] == pytest.approx((10 + 20 + 30 + 40 + 43 * 40 / 64) / 5, abs=0.01)
+
+def test_incremental_and_full_refresh(admin_client, app):
+    """Test new snapshots are appended and deletes trigger a full reload."""
+    with app.app_context():
+        frame = get_snapshot_frame()
+        user = _add_result('fabi@oaz.co', 'TI', [12, 12, 8, 8])
+        assert frame.refresh(frame.version + 1) == 'incremental'
+        assert len(frame) == 6
+        user_id = user.id
+
+    assert admin_client.delete(f'/admin/users/{user_id}').status_code == 200
+
+    with app.app_context():
+        frame = get_snapshot_frame()
+        assert len(frame) == 5
+        assert frame.refresh(frame.version) == 'current'
+
+def test_whatif_endpoint(admin_client):
+    """Test the endpoint and its validation."""
+    response = admin_client.post('/admin/analytics/whatif', json={'thresholds': {'Líder Digital': 30}, 'group_by': 'department'})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['scenario']['Líder Digital'] == 2
+    assert set(data['groups']) == {'TI', 'RH'}
+
+    invalid = (
+        {'thresholds': {'Praticante': 15}}, {'thresholds': {'Líder Digital': 'inf'}}, {'weights': {'Desconhecido': 2}},
+        {'weights': {'Uso Prático': 'nan'}}, {'weights': {'Uso Prático': 'Infinity'}}, {'group_by': 'email'}, {'weights': [1, 2]}
+    )
+    for body in invalid:
+        assert admin_client.post('/admin/analytics/whatif', json=body).status_code == 400
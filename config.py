@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +17,12 @@ class Config:
     BASE_URL = os.getenv('BASE_URL', 'http://localhost:5000')
     
     SEED_ON_START = os.getenv('SEED_ON_START', '1') == '1'
+    # One-time backfills of derived tables at startup (see app.services.bootstrap);
+    # turn off to run them with `flask bootstrap-data` in the release step instead
+    BOOTSTRAP_ON_START = os.getenv('BOOTSTRAP_ON_START', '1') == '1'
+    
+    # 'openai' or 'stub' (deterministic offline questions/grading for tests and simulations)
+    LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'openai')
     
     TOKEN_EXPIRATION_HOURS = 24
     MAX_ITEMS_PER_SESSION = 12
@@ -24,6 +31,28 @@ class Config:
     CONVERGENCE_CI_THRESHOLD = 12
     CONVERGENCE_MIN_COMPETENCIES = 6
     
+    # Per-worker in-memory item bank index (legacy adaptive selector)
+    ITEM_BANK_INDEX_TTL_S = int(os.getenv('ITEM_BANK_INDEX_TTL_S', '300'))
+    # 'heuristic' (bonus scoring + generation) or 'max_info' (Fisher information CAT)
+    ITEM_SELECTION_STRATEGY = os.getenv('ITEM_SELECTION_STRATEGY', 'heuristic')
+    # 'eap' / 'map' (grid posterior per competency) or 'heuristic' (legacy step update)
+    ABILITY_ESTIMATOR = os.getenv('ABILITY_ESTIMATOR', 'eap')
+    
+    # Active sessions older than this are marked abandoned by `flask sweep-abandoned-sessions`
+    SESSION_ABANDON_AFTER_HOURS = int(os.getenv('SESSION_ABANDON_AFTER_HOURS', '24'))
+    
+    # Background export jobs: artifacts are cached on disk per (format, filters,
+    # data version); use a directory shared by all workers
+    EXPORT_ARTIFACT_DIR = os.getenv('EXPORT_ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'oaz_exports'))
+    EXPORT_JOB_WORKERS = int(os.getenv('EXPORT_JOB_WORKERS', '2'))
+    EXPORT_ARTIFACT_RETENTION_HOURS = int(os.getenv('EXPORT_ARTIFACT_RETENTION_HOURS', '24'))
+    # Request tracing (spans from logger event_start/event_end), kept per worker
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '200'))
+    
+    # Processes used by the partitioned export (`flask export-data`); 0 = one per CPU
+    EXPORT_PARALLEL_WORKERS = int(os.getenv('EXPORT_PARALLEL_WORKERS', '0'))
+    
     COMPETENCIES = [
         'Fundamentos de IA/ML & LLMs',
         'Ferramentas de IA no dia a dia',